@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    _REQUESTS_AVAILABLE = True
+except ImportError:
+    _REQUESTS_AVAILABLE = False
+    print("Warning: python-requests not found. AUR features will be disabled.")
+
+from .vercmp import vercmp
+
+DEFAULT_RPC_URL = "https://aur.archlinux.org/rpc/"
+RPC_VERSION = 5
+# حد طول الاستعلام لكل طلب info (خادم AUR يرفض الروابط الأطول من ~4400 بايت)
+# Query length budget per info request (the AUR server rejects URLs longer than ~4400 bytes)
+MAX_QUERY_LENGTH = 4000
+_ARG_PREFIX = "&" + quote("arg[]") + "="
+POOL_SIZE = 4
+REQUEST_TIMEOUT_SECONDS = 15
+DEFAULT_TTL_SECONDS = 60 * 60
+CACHE_FILE_NAME = "aur_rpc.json"
+CACHE_FORMAT_VERSION = 1
+
+# حزمة واحدة كما يصفها AUR RPC
+# One package as described by the AUR RPC
+AURPackage = namedtuple("AURPackage", [
+    "name", "version", "description", "url", "package_base", "maintainer",
+    "votes", "popularity", "out_of_date", "last_modified",
+])
+
+
+class AURError(Exception):
+    pass
+
+
+def _package_from_result(result):
+    return AURPackage(
+        result.get("Name"), result.get("Version"), result.get("Description") or "",
+        result.get("URL") or "", result.get("PackageBase") or result.get("Name"),
+        result.get("Maintainer"), result.get("NumVotes", 0), result.get("Popularity", 0.0),
+        result.get("OutOfDate"), result.get("LastModified"),
+    )
+
+
+def batch_names(names, max_query_length=MAX_QUERY_LENGTH):
+    """
+    تقسيم الأسماء إلى دفعات لا يتجاوز طول استعلام كل منها max_query_length.
+    Splits the names into batches whose query string stays within max_query_length.
+    """
+    batches = []
+    batch, used = [], 0
+    for name in names:
+        length = len(_ARG_PREFIX) + len(quote(name, safe=""))
+        if batch and used + length > max_query_length:
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(name)
+        used += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class AURClient:
+    """
+    عميل AUR RPC (الإصدار 5) بجلسة HTTP مشتركة واستعلامات info مجمعة.
+    AUR RPC (v5) client with a shared HTTP session and batched info queries.
+
+    كل طلب type=info يحمل مئات الأسماء (arg[]=...)، والدفعات تُرسل بالتوازي عبر اتصالات
+    الجلسة المعاد استخدامها. النتائج (بما فيها "غير موجود في AUR") تُحفظ على القرص مع مدة صلاحية،
+    وعند فشل الشبكة تُستخدم النتائج المنتهية إن وجدت.
+    Each type=info request carries hundreds of names (arg[]=...), and batches are sent in
+    parallel over the session's reused connections. Results (including "not in the AUR") are
+    cached on disk with a TTL, and stale results are served if the network fails.
+
+    base_url قابل للتغيير (مرآة AUR أو خادم اختبار محلي).
+    base_url can be changed (an AUR mirror or a local test server).
+    """
+
+    def __init__(self, cache_dir, base_url=DEFAULT_RPC_URL, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 timeout=REQUEST_TIMEOUT_SECONDS):
+        self.base_url = base_url
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.cache_file = os.path.join(cache_dir, CACHE_FILE_NAME) if cache_dir else None
+        self.last_error = None
+        self._session = None
+        self._lock = threading.Lock()
+        # اسم الحزمة -> [وقت الجلب، حقول AURPackage أو None إذا لم تكن في AUR]
+        # package name -> [fetch time, AURPackage fields or None when not in the AUR]
+        self._packages = None
+
+    @staticmethod
+    def is_available():
+        return _REQUESTS_AVAILABLE
+
+    def _get_session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=2)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = "hel-sys-manager"
+            self._session = session
+        return self._session
+
+    def _load_cache(self):
+        if self._packages is not None:
+            return
+        self._packages = {}
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_FORMAT_VERSION or data.get("base_url") != self.base_url:
+            return
+        self._packages = data.get("packages", {})
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        data = {
+            "version": CACHE_FORMAT_VERSION,
+            "base_url": self.base_url,
+            "packages": self._packages,
+        }
+        temp_file = self.cache_file + ".tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            print(f"Warning: Could not save the AUR cache: {e}")
+
+    def _is_fresh(self, entry, now):
+        return entry is not None and now - entry[0] < self.ttl_seconds
+
+    def _request(self, params):
+        """
+        طلب RPC واحد. تعيد قائمة results أو ترفع AURError.
+        One RPC request. Returns the results list or raises AURError.
+        """
+        try:
+            response = self._get_session().get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException as e:
+            raise AURError(f"Could not reach the AUR: {e}")
+        except ValueError:
+            raise AURError("The AUR returned an invalid response.")
+        if data.get("type") == "error":
+            raise AURError(f"AUR error: {data.get('error')}")
+        return data.get("results", [])
+
+    def _fetch_info(self, batch):
+        return self._request([("v", RPC_VERSION), ("type", "info")] + [("arg[]", name) for name in batch])
+
+    def info(self, package_names):
+        """
+        معلومات عدة حزم من AUR: قاموس الاسم -> AURPackage (الحزم غير الموجودة في AUR تُحذف).
+        يتم طلب الحزم غير المحفوظة أو المنتهية فقط، في دفعات.
+        Info for several AUR packages: dict of name -> AURPackage (packages not in the AUR are
+        left out). Only uncached or expired packages are requested, in batches.
+        """
+        if not _REQUESTS_AVAILABLE:
+            raise AURError("python-requests is not installed.")
+        names = list(dict.fromkeys(package_names))
+        with self._lock:
+            self._load_cache()
+            now = time.time()
+            missing = [name for name in names if not self._is_fresh(self._packages.get(name), now)]
+            if missing:
+                batches = batch_names(missing)
+                try:
+                    with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(batches))) as executor:
+                        responses = list(executor.map(self._fetch_info, batches))
+                except AURError as e:
+                    self.last_error = str(e)
+                    if any(name not in self._packages for name in missing):
+                        raise
+                    # كل الحزم لها نتيجة قديمة؛ تُستخدم بدلاً من الفشل
+                    # Every package has a stale result; it is used instead of failing
+                    print(f"Warning: {e}. Using cached AUR results.")
+                else:
+                    self.last_error = None
+                    for name in missing:
+                        self._packages[name] = [now, None]
+                    for results in responses:
+                        for result in results:
+                            self._packages[result["Name"]] = [now, list(_package_from_result(result))]
+                    self._save_cache()
+
+            packages = {}
+            for name in names:
+                entry = self._packages.get(name)
+                if entry is not None and entry[1] is not None:
+                    packages[name] = AURPackage(*entry[1])
+            return packages
+
+    def check_updates(self, installed_versions):
+        """
+        مقارنة إصدارات الحزم المثبتة (قاموس الاسم -> الإصدار) مع AUR بعدد قليل من الطلبات المجمعة.
+        Compares installed package versions (dict of name -> version) against the AUR using a
+        handful of batched requests.
+
+        تعيد (قائمة التحديثات، أسماء الحزم غير الموجودة في AUR).
+        Returns (list of updates, names of packages that are not in the AUR).
+        """
+        packages = self.info(installed_versions)
+        updates = []
+        not_found = []
+        for name, version in sorted(installed_versions.items()):
+            package = packages.get(name)
+            if package is None:
+                not_found.append(name)
+            elif vercmp(package.version, version) > 0:
+                updates.append({
+                    "name": name,
+                    "repo": "aur",
+                    "old_version": version,
+                    "new_version": package.version,
+                    "out_of_date": package.out_of_date,
+                })
+        return updates, not_found
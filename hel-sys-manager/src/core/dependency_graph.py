@@ -0,0 +1,291 @@
+import re
+import threading
+from array import array
+from collections import deque
+
+from .pacman_local_db import REASON_DEPEND
+
+# اسم التبعية بدون قيد الإصدار أو الوصف ("foo>=1.2" أو "foo: وصف" أو "libfoo.so=1-64")
+# Dependency name without its version constraint or description ("foo>=1.2", "foo: desc", "libfoo.so=1-64")
+_DEPENDENCY_NAME_RE = re.compile(r"^([^<>=:\s]+)")
+
+
+def dependency_name(dependency):
+    match = _DEPENDENCY_NAME_RE.match(dependency)
+    return match.group(1) if match else dependency
+
+
+def _build_csr(edges):
+    """
+    بناء مصفوفات تجاور مضغوطة (CSR): إزاحات لكل عقدة ومصفوفة أهداف واحدة.
+    Builds compressed (CSR) adjacency arrays: per-node offsets and one flat target array.
+    """
+    offsets = array('I', [0])
+    targets = array('I')
+    for node_edges in edges:
+        targets.extend(node_edges)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def _reverse_csr(offsets, targets, node_count):
+    """
+    عكس CSR بعدّ الدرجات ثم التوزيع (counting sort)، بدون قوائم لكل عقدة.
+    Reverses a CSR with a degree count then a scatter (counting sort), with no per-node lists.
+    """
+    reverse_offsets = array('I', bytes(4 * (node_count + 1)))
+    for target in targets:
+        reverse_offsets[target + 1] += 1
+    for node in range(node_count):
+        reverse_offsets[node + 1] += reverse_offsets[node]
+    reverse_targets = array('I', bytes(4 * len(targets)))
+    fill = array('I', reverse_offsets)
+    for source in range(node_count):
+        for position in range(offsets[source], offsets[source + 1]):
+            target = targets[position]
+            reverse_targets[fill[target]] = source
+            fill[target] += 1
+    return reverse_offsets, reverse_targets
+
+
+class DependencyGraph:
+    """
+    رسم بياني لتبعيات الحزم المثبتة في مصفوفات أعداد صحيحة مضغوطة.
+    Dependency graph of the installed packages stored in compact integer arrays.
+
+    كل حزمة لها رقم عقدة، والتبعيات (depends) والتبعيات الاختيارية (optdepends) وعكسها محفوظة
+    كمصفوفات CSR، لذلك كل استعلام هو مجرد قطع من مصفوفة. تتم إعادة البناء فقط عند تغير قاعدة
+    البيانات المحلية، مع إعادة تحليل سجلات الحزم التي تغيرت فقط.
+    Every package has a node id, and depends, optdepends and their reverse are kept as CSR
+    arrays, so every query is just an array slice. The graph is rebuilt only when the local
+    database changes, re-parsing only the package records that changed.
+    """
+
+    def __init__(self, local_db):
+        self.local_db = local_db
+        self._lock = threading.RLock()
+        self._generation = None
+        # اسم الحزمة -> (السجل، أسماء depends، أسماء optdepends)
+        # package name -> (record, depends names, optdepends names)
+        self._parsed = {}
+        self.names = []
+        self.records = []
+        self._ids = {}
+        self._satisfiers = {}
+        self._depends = (array('I', [0]), array('I'))
+        self._required_by = (array('I', [0]), array('I'))
+        self._optdepends = (array('I', [0]), array('I'))
+        self._optional_for = (array('I', [0]), array('I'))
+        self._orphans = None
+
+    def refresh(self):
+        """
+        إعادة بناء الرسم البياني إذا تغيرت قاعدة البيانات المحلية. تعيد True إذا أُعيد البناء.
+        Rebuilds the graph if the local database changed. Returns True if it was rebuilt.
+        """
+        with self._lock:
+            packages = self.local_db.packages()
+            if self._generation == self.local_db.generation:
+                return False
+            self._build(packages)
+            self._generation = self.local_db.generation
+            return True
+
+    def _ensure_built(self):
+        # الاستعلامات لا تفحص القرص؛ refresh() تُستدعى صراحةً بعد المعاملات أو قبل المعاينة
+        # Queries never touch the disk; refresh() is called explicitly after transactions or before previews
+        if self._generation is None:
+            self.refresh()
+
+    def _parse(self, record):
+        cached = self._parsed.get(record.name)
+        if cached is not None and cached[0] is record:
+            return cached
+        parsed = (
+            record,
+            [dependency_name(dependency) for dependency in record.depends],
+            [dependency_name(dependency) for dependency in record.optdepends],
+        )
+        self._parsed[record.name] = parsed
+        return parsed
+
+    def _build(self, packages):
+        names = sorted(packages)
+        ids = {name: node for node, name in enumerate(names)}
+        records = [packages[name] for name in names]
+
+        # من يحقق كل اسم: الحزمة نفسها أولاً ثم provides، كما يفعل pacman (الذي لا يحل التبعيات عبر replaces)
+        # Who satisfies each name: the package itself first, then provides, as pacman does
+        # (pacman never resolves dependencies through replaces)
+        satisfiers = {}
+        for node, record in enumerate(records):
+            for provided in record.provides:
+                satisfiers[dependency_name(provided)] = node
+        satisfiers.update(ids)
+
+        parsed = [self._parse(record) for record in records]
+        for stale in set(self._parsed) - set(ids):
+            del self._parsed[stale]
+
+        def resolve(node, dependency_names):
+            # dict.fromkeys يزيل التكرار مع الحفاظ على الترتيب
+            # dict.fromkeys removes duplicates while keeping the order
+            return dict.fromkeys(
+                target for target in map(satisfiers.get, dependency_names)
+                if target is not None and target != node
+            )
+
+        node_count = len(names)
+        depends = _build_csr(resolve(node, entry[1]) for node, entry in enumerate(parsed))
+        optdepends = _build_csr(resolve(node, entry[2]) for node, entry in enumerate(parsed))
+
+        self.names = names
+        self.records = records
+        self._ids = ids
+        self._satisfiers = satisfiers
+        self._depends = depends
+        self._required_by = _reverse_csr(depends[0], depends[1], node_count)
+        self._optdepends = optdepends
+        self._optional_for = _reverse_csr(optdepends[0], optdepends[1], node_count)
+        self._orphans = None
+
+    @staticmethod
+    def _neighbors(csr, node):
+        offsets, targets = csr
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def _node(self, name):
+        self._ensure_built()
+        node = self._ids.get(name)
+        if node is None:
+            node = self._satisfiers.get(name)
+        return node
+
+    def _names(self, nodes):
+        return [self.names[node] for node in nodes]
+
+    def depends_on(self, package_name):
+        with self._lock:
+            node = self._node(package_name)
+            return [] if node is None else self._names(self._neighbors(self._depends, node))
+
+    def required_by(self, package_name):
+        """
+        الحزم المثبتة التي تعتمد على هذه الحزمة (مثل "Required By" في pacman -Qi).
+        Installed packages that depend on this one (like "Required By" in pacman -Qi).
+        """
+        with self._lock:
+            node = self._node(package_name)
+            return [] if node is None else self._names(self._neighbors(self._required_by, node))
+
+    def optional_for(self, package_name):
+        with self._lock:
+            node = self._node(package_name)
+            return [] if node is None else self._names(self._neighbors(self._optional_for, node))
+
+    def orphans(self):
+        """
+        الحزم المثبتة كتبعيات ولم تعد مطلوبة أو مطلوبة اختيارياً من أي حزمة (مثل pacman -Qdt).
+        Packages installed as dependencies that no package requires or optionally requires
+        anymore (like pacman -Qdt).
+        """
+        with self._lock:
+            self._ensure_built()
+            if self._orphans is None:
+                required_offsets = self._required_by[0]
+                optional_offsets = self._optional_for[0]
+                self._orphans = [
+                    name for node, name in enumerate(self.names)
+                    if self.records[node].reason == REASON_DEPEND
+                    and required_offsets[node] == required_offsets[node + 1]
+                    and optional_offsets[node] == optional_offsets[node + 1]
+                ]
+            return list(self._orphans)
+
+    def _removal_nodes(self, targets):
+        removing = set(targets)
+        queue = deque(targets)
+        while queue:
+            node = queue.popleft()
+            for dependency in self._neighbors(self._depends, node):
+                if dependency in removing or self.records[dependency].reason != REASON_DEPEND:
+                    continue
+                if all(user in removing for user in self._neighbors(self._required_by, dependency)):
+                    removing.add(dependency)
+                    queue.append(dependency)
+        return removing
+
+    def removal_sizes(self):
+        """
+        قاموس اسم الحزمة -> المساحة التي يحررها pacman -Rns لها وحدها (مع تبعياتها الخاصة).
+        Dict of package name -> space pacman -Rns would free for it alone (with its private
+        dependencies).
+        """
+        with self._lock:
+            self._ensure_built()
+            records = self.records
+            return {
+                name: sum(records[member].size for member in self._removal_nodes([node]))
+                for node, name in enumerate(self.names)
+            }
+
+    def removal_closure(self, package_names):
+        """
+        ما سيحذفه pacman -Rns لهذه الحزم: الأهداف مع كل تبعياتها المثبتة كتبعيات والتي لا تحتاجها
+        أي حزمة خارج المجموعة.
+        What pacman -Rns would remove for these packages: the targets plus every dependency
+        installed as a dependency that no package outside the set still needs.
+
+        تعيد قاموساً: packages (الأسماء)، size (الحجم المحرر بالبايت)، blockers (هدف -> حزم
+        خارج المجموعة تعتمد عليه، مما سيجعل pacman يرفض الحذف)، missing (أسماء غير مثبتة).
+        Returns a dict: packages (names), size (freed bytes), blockers (target -> packages outside
+        the set that depend on it, which makes pacman refuse the removal), missing (names that are
+        not installed).
+        """
+        with self._lock:
+            self._ensure_built()
+            targets = [self._ids[name] for name in package_names if name in self._ids]
+            missing = [name for name in package_names if name not in self._ids]
+            removing = self._removal_nodes(targets)
+
+            blockers = {}
+            for node in targets:
+                outside = [user for user in self._neighbors(self._required_by, node) if user not in removing]
+                if outside:
+                    blockers[self.names[node]] = self._names(outside)
+            return {
+                "packages": sorted(self._names(removing)),
+                "size": sum(self.records[node].size for node in removing),
+                "blockers": blockers,
+                "missing": missing,
+            }
+
+    def why_installed(self, package_name, limit=10):
+        """
+        مسارات أقصر من حزم مثبتة صراحةً إلى هذه الحزمة عبر سلاسل التبعيات.
+        Shortest paths from explicitly installed packages to this one through dependency chains.
+        """
+        with self._lock:
+            start = self._node(package_name)
+            if start is None:
+                return []
+            # بحث بالعرض على الرسم العكسي مع حفظ الأب لكل عقدة
+            # Breadth-first search over the reverse graph, keeping each node's parent
+            parents = {start: None}
+            queue = deque([start])
+            paths = []
+            while queue and len(paths) < limit:
+                node = queue.popleft()
+                if self.records[node].reason != REASON_DEPEND:
+                    path = []
+                    step = node
+                    while step is not None:
+                        path.append(self.names[step])
+                        step = parents[step]
+                    paths.append(path)
+                    continue
+                for user in self._neighbors(self._required_by, node):
+                    if user not in parents:
+                        parents[user] = node
+                        queue.append(user)
+            return paths
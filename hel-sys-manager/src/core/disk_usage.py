@@ -0,0 +1,54 @@
+from operator import itemgetter
+
+# اسم "المستودع" للحزم المثبتة غير الموجودة في أي مستودع مُعرّف (AUR أو محلية)
+# "Repository" name for installed packages missing from every configured repo (AUR or local builds)
+FOREIGN_REPO = "foreign"
+NO_GROUP = "(none)"
+
+
+def disk_usage_summary(local_db, sync_db=None, dependency_graph=None, top_limit=None):
+    """
+    تجميع الحجم المثبت (%SIZE%) من قاعدة البيانات المحلية في تمريرة واحدة بدون أي عملية فرعية.
+    Aggregates installed sizes (%SIZE%) from the local database in one pass, without any subprocess.
+
+    sync_db (اختياري) يحدد مستودع كل حزمة. dependency_graph (اختياري) يضيف لكل حزمة المساحة
+    التي يحررها حذفها مع تبعياتها الخاصة (pacman -Rns).
+    sync_db (optional) determines each package's repository. dependency_graph (optional) adds,
+    per package, the space freed by removing it together with its private dependencies
+    (pacman -Rns).
+
+    تعيد قاموساً: total، count، packages (قوائم [الاسم، الإصدار، المستودع، الحجم، حجم الحذف أو
+    None] مرتبة تنازلياً حسب الحجم)، repos و groups (قوائم [الاسم، العدد، الحجم]).
+    Returns a dict: total, count, packages ([name, version, repo, size, removal size or None]
+    sorted by size, largest first), repos and groups ([name, count, size]).
+    """
+    available = sync_db.packages() if sync_db is not None and sync_db.is_available() else {}
+    removal_sizes = dependency_graph.removal_sizes() if dependency_graph is not None else {}
+
+    total = 0
+    rows = []
+    repos = {}
+    groups = {}
+    for name, pkg in local_db.packages().items():
+        size = pkg.size
+        total += size
+        candidate = available.get(name)
+        repo = candidate.repo if candidate is not None else FOREIGN_REPO
+        rows.append([name, pkg.version, repo, size, removal_sizes.get(name)])
+
+        repo_totals = repos.setdefault(repo, [repo, 0, 0])
+        repo_totals[1] += 1
+        repo_totals[2] += size
+        for group in pkg.groups or (NO_GROUP,):
+            group_totals = groups.setdefault(group, [group, 0, 0])
+            group_totals[1] += 1
+            group_totals[2] += size
+
+    rows.sort(key=itemgetter(3), reverse=True)
+    return {
+        "total": total,
+        "count": len(rows),
+        "packages": rows[:top_limit] if top_limit else rows,
+        "repos": sorted(repos.values(), key=itemgetter(2), reverse=True),
+        "groups": sorted(groups.values(), key=itemgetter(2), reverse=True),
+    }
@@ -0,0 +1,386 @@
+import os
+import gzip
+import lzma
+import threading
+from collections import namedtuple
+
+from .search_index import PackageSearchIndex
+from .pacman_local_db import format_size
+
+DEFAULT_STATUS_PATH = "/var/lib/dpkg/status"
+DEFAULT_LISTS_DIR = "/var/lib/apt/lists"
+PACKAGES_SUFFIX = "_Packages"
+
+# الحقول المقروءة من كل فقرة؛ بقية الحقول (وأسطر الوصف الطويل) تُتجاهل أثناء القراءة
+# Fields kept from each stanza; every other field (and the long description lines) is
+# skipped while reading
+WANTED_FIELDS = frozenset((
+    "Package", "Status", "Version", "Architecture", "Description", "Section", "Priority",
+    "Installed-Size", "Size", "Maintainer", "Depends", "Pre-Depends", "Recommends",
+    "Provides", "Homepage", "Source",
+))
+
+# سجل حزمة Debian من ملف status (repo فارغ) أو من ملف Packages لمستودع
+# Debian package record from the status file (empty repo) or from a repository Packages file
+DebPackage = namedtuple("DebPackage", [
+    "repo", "name", "version", "description", "arch", "section", "priority",
+    "installed_size", "size", "maintainer", "depends", "recommends", "provides",
+    "homepage", "source",
+])
+
+
+def parse_stanzas(lines, wanted=WANTED_FIELDS):
+    """
+    محلل متدفق لملفات بصيغة deb822 (status و Packages): يعيد قاموساً لكل فقرة مع الحقول المطلوبة فقط.
+    Streaming parser for deb822-format files (status and Packages): yields one dict per stanza
+    holding only the wanted fields.
+
+    أسطر المتابعة (التي تبدأ بمسافة) تُتجاهل، لذلك يبقى من Description السطر الأول (الوصف القصير).
+    Continuation lines (starting with whitespace) are skipped, so Description keeps only its
+    first line (the short description).
+    """
+    record = {}
+    for line in lines:
+        first = line[:1]
+        if first in (" ", "\t"):
+            continue
+        if first in ("\n", ""):
+            if record:
+                yield record
+                record = {}
+            continue
+        key, sep, value = line.partition(":")
+        if sep and key in wanted:
+            record[key] = value.strip()
+    if record:
+        yield record
+
+
+def _split_list(value):
+    return tuple(item.strip() for item in value.split(",") if item.strip()) if value else ()
+
+
+def _int_field(record, key):
+    try:
+        return int(record.get(key, 0))
+    except ValueError:
+        return 0
+
+
+def record_from_stanza(repo, record):
+    depends = record.get("Depends", "")
+    if record.get("Pre-Depends"):
+        depends = record["Pre-Depends"] + (", " + depends if depends else "")
+    return DebPackage(
+        repo=repo,
+        name=record.get("Package", ""),
+        version=record.get("Version", ""),
+        description=record.get("Description", ""),
+        arch=record.get("Architecture", ""),
+        section=record.get("Section", ""),
+        priority=record.get("Priority", ""),
+        # Installed-Size بالكيلوبايت في صيغة Debian
+        # Installed-Size is in KiB in the Debian format
+        installed_size=_int_field(record, "Installed-Size") * 1024,
+        size=_int_field(record, "Size"),
+        maintainer=record.get("Maintainer", ""),
+        depends=_split_list(depends),
+        recommends=_split_list(record.get("Recommends", "")),
+        provides=_split_list(record.get("Provides", "")),
+        homepage=record.get("Homepage", ""),
+        source=record.get("Source", "").split(" ")[0],
+    )
+
+
+def _order(c):
+    if c == "~":
+        return -1
+    if c.isdigit():
+        return 0
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+
+def _compare_part(a, b):
+    i = j = 0
+    while i < len(a) or j < len(b):
+        first_diff = 0
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _order(a[i]) if i < len(a) else 0
+            bc = _order(b[j]) if j < len(b) else 0
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == "0":
+            i += 1
+        while j < len(b) and b[j] == "0":
+            j += 1
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def _split_version(version):
+    epoch, sep, rest = version.partition(":")
+    if not sep:
+        epoch, rest = "0", version
+    upstream, sep, revision = rest.rpartition("-")
+    if not sep:
+        upstream, revision = rest, ""
+    return int(epoch) if epoch.isdigit() else 0, upstream, revision
+
+
+def deb_vercmp(a, b):
+    """
+    مقارنة إصدارات Debian بخوارزمية dpkg (epoch، ثم upstream، ثم revision، مع ترتيب ~ قبل الفراغ).
+    Compares Debian versions with dpkg's algorithm (epoch, then upstream, then revision, with ~
+    sorting before the empty string).
+    تعيد قيمة سالبة أو صفراً أو موجبة.
+    Returns a negative, zero or positive value.
+    """
+    if a == b:
+        return 0
+    epoch_a, upstream_a, revision_a = _split_version(a)
+    epoch_b, upstream_b, revision_b = _split_version(b)
+    if epoch_a != epoch_b:
+        return epoch_a - epoch_b
+    return _compare_part(upstream_a, upstream_b) or _compare_part(revision_a, revision_b)
+
+
+def _open_list(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".xz"):
+        return lzma.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def read_packages_file(repo, path, installed_only=False):
+    """
+    قراءة ملف status أو Packages وإرجاع قائمة DebPackage.
+    Reads a status or Packages file and returns a list of DebPackage records.
+    """
+    records = []
+    with _open_list(path) as f:
+        for stanza in parse_stanzas(f):
+            if "Package" not in stanza:
+                continue
+            # حقل Status بالشكل "install ok installed"؛ الكلمة الأخيرة هي الحالة الفعلية
+            # The Status field looks like "install ok installed"; the last word is the actual state
+            if installed_only and not stanza.get("Status", "").endswith(" installed"):
+                continue
+            records.append(record_from_stanza(repo, stanza))
+    return records
+
+
+class DpkgStatusDB:
+    """
+    قارئ مباشر لقاعدة بيانات dpkg للحزم المثبتة (/var/lib/dpkg/status) مع ذاكرة مؤقتة حسب mtime.
+    In-process reader for dpkg's installed-packages database (/var/lib/dpkg/status), cached by mtime.
+    """
+
+    def __init__(self, status_path=DEFAULT_STATUS_PATH):
+        self.status_path = status_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._by_name = {}
+        self._index = None
+        self.generation = 0
+
+    def is_available(self):
+        return os.path.isfile(self.status_path)
+
+    def refresh(self):
+        """
+        إعادة القراءة فقط إذا تغير وقت تعديل الملف. تعيد True إذا تغير شيء.
+        Re-reads only if the file's mtime changed. Returns True if anything changed.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.status_path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == self._mtime and self._index is not None:
+                return False
+            records = []
+            if mtime is not None:
+                try:
+                    records = read_packages_file("", self.status_path, installed_only=True)
+                except OSError as e:
+                    print(f"Error reading dpkg status '{self.status_path}': {e}")
+            by_name = {}
+            for pkg in records:
+                # الحزم متعددة المعمارية: الأولى بالاسم المجرد والبقية بالشكل name:arch كما يعرضها dpkg
+                # Multi-arch packages: the first keeps the bare name, the others use name:arch as dpkg shows them
+                key = pkg.name if pkg.name not in by_name else f"{pkg.name}:{pkg.arch}"
+                by_name[key] = pkg
+            self._by_name = by_name
+            self._index = PackageSearchIndex(records)
+            self._mtime = mtime
+            self.generation += 1
+            return True
+
+    def packages(self):
+        self.refresh()
+        return self._by_name
+
+    def get(self, package_name):
+        return self.packages().get(package_name)
+
+    def list_names(self):
+        return sorted(self.packages())
+
+    def search(self, query, limit=None):
+        self.refresh()
+        return self._index.search(query, limit=limit)
+
+
+class AptListsDB:
+    """
+    قارئ مباشر لقوائم مستودعات apt (/var/lib/apt/lists/*_Packages) مع فهرس بحث في الذاكرة.
+    In-process reader for apt's repository lists (/var/lib/apt/lists/*_Packages) with an
+    in-memory search index.
+
+    يُعاد قراءة ملفات القوائم التي تغير وقت تعديلها فقط. لكل اسم يُحتفظ بأعلى إصدار بين كل
+    المستودعات (المرشح الذي سيثبته apt افتراضياً).
+    Only list files whose mtime changed are re-read. For each name the highest version across
+    all repositories is kept (the candidate apt installs by default).
+    """
+
+    def __init__(self, lists_dir=DEFAULT_LISTS_DIR):
+        self.lists_dir = lists_dir
+        self._lock = threading.Lock()
+        # مسار الملف -> (mtime_ns، [DebPackage])
+        # file path -> (mtime_ns, [DebPackage])
+        self._lists = {}
+        self._by_name = {}
+        self._index = None
+        self.generation = 0
+
+    def is_available(self):
+        return os.path.isdir(self.lists_dir)
+
+    @staticmethod
+    def repo_name(filename):
+        """
+        اسم مقروء للمستودع من اسم ملف القائمة، مثل "deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages"
+        -> "bookworm/main".
+        A readable repository name from the list file name, e.g.
+        "deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages" -> "bookworm/main".
+        """
+        stem = filename[:filename.rfind(PACKAGES_SUFFIX)]
+        parts = stem.split("_")
+        if "dists" in parts:
+            parts = parts[parts.index("dists") + 1:]
+        parts = [part for part in parts if not part.startswith("binary-")]
+        return "/".join(parts) or stem
+
+    def _list_files(self):
+        mtimes = {}
+        try:
+            with os.scandir(self.lists_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not (name.endswith(PACKAGES_SUFFIX) or name.endswith(PACKAGES_SUFFIX + ".gz")
+                            or name.endswith(PACKAGES_SUFFIX + ".xz")):
+                        continue
+                    try:
+                        mtimes[entry.path] = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Error reading apt lists '{self.lists_dir}': {e}")
+        return mtimes
+
+    def refresh(self):
+        """
+        إعادة قراءة ملفات القوائم التي تغيرت فقط. تعيد True إذا تغير الفهرس.
+        Re-reads only the list files that changed. Returns True if the index changed.
+        """
+        with self._lock:
+            mtimes = self._list_files()
+            changed = set(self._lists) != set(mtimes)
+            for path, mtime in mtimes.items():
+                cached = self._lists.get(path)
+                if cached is not None and cached[0] == mtime:
+                    continue
+                try:
+                    self._lists[path] = (mtime, read_packages_file(self.repo_name(os.path.basename(path)), path))
+                    changed = True
+                except (OSError, EOFError, lzma.LZMAError) as e:
+                    print(f"Error reading apt list '{path}': {e}")
+                    changed = self._lists.pop(path, None) is not None or changed
+            for path in set(self._lists) - set(mtimes):
+                del self._lists[path]
+
+            if not changed and self._index is not None:
+                return False
+            by_name = {}
+            for path in sorted(self._lists):
+                for pkg in self._lists[path][1]:
+                    current = by_name.get(pkg.name)
+                    if current is None or deb_vercmp(pkg.version, current.version) > 0:
+                        by_name[pkg.name] = pkg
+            self._by_name = by_name
+            self._index = PackageSearchIndex(by_name.values())
+            self.generation += 1
+            return True
+
+    def packages(self):
+        """
+        قاموس الاسم -> DebPackage (أعلى إصدار متاح).
+        Dict of name -> DebPackage (the highest available version).
+        """
+        self.refresh()
+        return self._by_name
+
+    def get(self, package_name):
+        return self.packages().get(package_name)
+
+    def search(self, query, limit=None):
+        self.refresh()
+        return self._index.search(query, limit=limit)
+
+
+def deb_info_dict(installed=None, available=None):
+    """
+    قاموس تفاصيل حزمة بمفاتيح قريبة من مخرجات apt show (المثبتة و/أو المتاحة).
+    Package details dict with keys close to apt show output (installed and/or available).
+    """
+    pkg = installed or available
+    info = {
+        "Package": pkg.name,
+        "Version": pkg.version,
+        "Installed": installed.version if installed is not None else "No",
+    }
+    if available is not None:
+        info["Candidate"] = available.version
+        info["Repository"] = available.repo
+    info.update({
+        "Description": pkg.description,
+        "Architecture": pkg.arch,
+        "Section": pkg.section,
+        "Priority": pkg.priority,
+        "Maintainer": pkg.maintainer,
+        "Homepage": pkg.homepage or "None",
+        "Depends": ", ".join(pkg.depends) or "None",
+        "Recommends": ", ".join(pkg.recommends) or "None",
+        "Provides": ", ".join(pkg.provides) or "None",
+    })
+    if installed is not None:
+        info["Installed-Size"] = format_size(installed.installed_size)
+    if available is not None and available.size:
+        info["Download-Size"] = format_size(available.size)
+    return info
+
@@ -0,0 +1,231 @@
+import os
+import bisect
+import threading
+from array import array
+
+from .pacman_local_db import DEFAULT_LOCAL_DB_PATH
+
+# تخطيط المفتاح (64 بت): رقم المجلد | رقم الاسم | رقم الحزمة
+# Key layout (64 bits): directory id | name id | package id
+_PACKAGE_BITS = 16
+_NAME_BITS = 24
+_PACKAGE_MASK = (1 << _PACKAGE_BITS) - 1
+_NAME_SHIFT = _PACKAGE_BITS
+_DIR_SHIFT = _PACKAGE_BITS + _NAME_BITS
+
+
+def _split_path(path):
+    """
+    تقسيم مسار نسبي من ملف files إلى (المجلد، الاسم). المجلدات تنتهي بـ "/".
+    Splits a relative path from a files list into (directory, name). Directories end with "/".
+    """
+    cut = path.rfind("/", 0, len(path) - 1) + 1
+    return path[:cut], path[cut:]
+
+
+def read_files_list(files_path):
+    """
+    قراءة قسم %FILES% من ملف files لحزمة مثبتة.
+    Reads the %FILES% section of an installed package's files list.
+    """
+    with open(files_path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        text = f.read()
+    start = text.find("%FILES%\n")
+    if start == -1:
+        return []
+    start += len("%FILES%\n")
+    end = text.find("\n\n", start)
+    section = text[start:] if end == -1 else text[start:end]
+    return section.split("\n") if section else []
+
+
+class FileOwnershipIndex:
+    """
+    فهرس مضغوط لملكية الملفات (مكافئ سريع لـ pacman -Qo).
+    Compact file-ownership index (a fast pacman -Qo equivalent).
+
+    أجزاء المسارات (المجلد والاسم) مُدمجة كأرقام، وكل ملف مملوك هو مفتاح 64 بت واحد
+    (مجلد | اسم | حزمة) في مصفوفة مرتبة، لذلك البحث عن المالك هو بحث ثنائي. قوائم الملفات
+    تُعاد قراءتها فقط للحزم التي تغير ملف files الخاص بها.
+    Path components (directory and name) are interned as integers and every owned file is one
+    64-bit key (directory | name | package) in a sorted array, so an ownership lookup is a binary
+    search. Files lists are only re-read for packages whose files list changed.
+    """
+
+    def __init__(self, db_path=DEFAULT_LOCAL_DB_PATH, root_dir="/"):
+        self.db_path = db_path
+        self.root_dir = root_dir
+        self._lock = threading.RLock()
+        self._dir_ids = {}
+        self._name_ids = {}
+        self._package_ids = {}
+        self._package_names = []
+        # اسم مجلد الحزمة -> (mtime_ns، اسم الحزمة، مصفوفة مفاتيح الحزمة)
+        # package directory name -> (mtime_ns, package name, the package's key array)
+        self._entries = {}
+        self.keys = array('Q')
+        self._dirty = True
+
+    def _package_id(self, name):
+        package_id = self._package_ids.get(name)
+        if package_id is None:
+            package_id = self._package_ids[name] = len(self._package_names)
+            self._package_names.append(name)
+        return package_id
+
+    def _read_package(self, entry):
+        package_name = entry.name.rsplit("-", 2)[0]
+        package_id = self._package_id(package_name)
+        dir_ids, name_ids = self._dir_ids, self._name_ids
+        keys = []
+        # القائمة مرتبة، لذلك المسارات المتتالية تشترك غالباً في نفس المجلد
+        # The list is sorted, so consecutive paths usually share the same directory
+        last_directory = None
+        dir_bits = 0
+        for path in read_files_list(os.path.join(entry.path, "files")):
+            cut = path.rfind("/", 0, len(path) - 1) + 1
+            directory = path[:cut]
+            if directory != last_directory:
+                dir_id = dir_ids.get(directory)
+                if dir_id is None:
+                    dir_id = dir_ids[directory] = len(dir_ids)
+                dir_bits = (dir_id << _DIR_SHIFT) | package_id
+                last_directory = directory
+            name = path[cut:]
+            name_id = name_ids.get(name)
+            if name_id is None:
+                name_id = name_ids[name] = len(name_ids)
+            keys.append(dir_bits | (name_id << _NAME_SHIFT))
+        return package_name, array('Q', keys)
+
+    def refresh(self):
+        """
+        مزامنة الفهرس مع قاعدة البيانات المحلية. تعيد True إذا تغير شيء.
+        Synchronizes the index with the local database. Returns True if anything changed.
+        """
+        with self._lock:
+            try:
+                entries = os.scandir(self.db_path)
+            except OSError as e:
+                print(f"Error reading pacman local database '{self.db_path}': {e}")
+                return False
+
+            changed = False
+            seen = set()
+            with entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    seen.add(entry.name)
+                    try:
+                        mtime = os.stat(os.path.join(entry.path, "files")).st_mtime_ns
+                    except OSError:
+                        continue
+                    cached = self._entries.get(entry.name)
+                    if cached is not None and cached[0] == mtime:
+                        continue
+                    try:
+                        package_name, keys = self._read_package(entry)
+                    except OSError as e:
+                        print(f"Error reading '{entry.path}/files': {e}")
+                        continue
+                    self._entries[entry.name] = (mtime, package_name, keys)
+                    changed = True
+
+            for stale in set(self._entries) - seen:
+                del self._entries[stale]
+                changed = True
+
+            if changed:
+                self._dirty = True
+            return changed
+
+    def _ensure_keys(self):
+        # الجدول المرتب يُعاد بناؤه عند أول استعلام بعد التغيير فقط
+        # The sorted table is only rebuilt on the first query after a change
+        if self._dirty:
+            keys = array('Q')
+            for _, _, package_keys in self._entries.values():
+                keys.extend(package_keys)
+            self.keys = array('Q', sorted(keys))
+            self._dirty = False
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_keys()
+            return len(self.keys)
+
+    def _relative(self, path):
+        """
+        المسار نسبةً إلى RootDir بصيغة قوائم files، أو None إذا كان خارجه.
+        The path relative to RootDir in files-list form, or None if it is outside of it.
+        """
+        relative = os.path.relpath(os.path.abspath(path), self.root_dir).replace(os.sep, "/")
+        if relative == "." or relative == ".." or relative.startswith("../"):
+            return None
+        return relative
+
+    def _lookup(self, directory, name):
+        dir_id = self._dir_ids.get(directory)
+        name_id = self._name_ids.get(name)
+        if dir_id is None or name_id is None:
+            return []
+        prefix = (dir_id << _DIR_SHIFT) | (name_id << _NAME_SHIFT)
+        low = bisect.bisect_left(self.keys, prefix)
+        high = bisect.bisect_left(self.keys, prefix + _PACKAGE_MASK + 1, low)
+        return [self._package_names[key & _PACKAGE_MASK] for key in self.keys[low:high]]
+
+    def owners(self, path):
+        """
+        الحزم التي تملك المسار (ملفاً أو مجلداً). تعيد قائمة فارغة إذا لم يكن مملوكاً.
+        Packages owning the path (file or directory). Returns an empty list if it is unowned.
+        """
+        with self._lock:
+            self._ensure_keys()
+            for candidate in (path, None):
+                if candidate is None:
+                    # المجلدات الوسيطة قد تكون روابط رمزية (مثل /bin -> usr/bin)
+                    # Intermediate directories may be symlinks (such as /bin -> usr/bin)
+                    candidate = os.path.realpath(path)
+                relative = self._relative(candidate)
+                if relative is None:
+                    continue
+                owners = self._lookup(*_split_path(relative)) or self._lookup(*_split_path(relative + "/"))
+                if owners:
+                    return owners
+            return []
+
+    def unowned_files(self, directory, limit=10000):
+        """
+        الملفات والمجلدات تحت directory التي لا تملكها أي حزمة. المجلد غير المملوك يُذكر مرة
+        واحدة دون الدخول إليه.
+        Files and directories under directory that no package owns. An unowned directory is
+        reported once without descending into it.
+        """
+        with self._lock:
+            self._ensure_keys()
+            unowned = []
+            pending = [os.path.abspath(directory)]
+            while pending and len(unowned) < limit:
+                current = pending.pop()
+                if current == os.path.abspath(self.root_dir):
+                    relative_dir = ""
+                else:
+                    relative_dir = self._relative(current)
+                    if relative_dir is None:
+                        continue
+                    relative_dir += "/"
+                try:
+                    entries = sorted(os.scandir(current), key=lambda entry: entry.name)
+                except OSError:
+                    continue
+                for entry in entries:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    name = entry.name + "/" if is_dir else entry.name
+                    if not self._lookup(relative_dir, name):
+                        unowned.append(entry.path + ("/" if is_dir else ""))
+                        if len(unowned) >= limit:
+                            break
+                    elif is_dir:
+                        pending.append(entry.path)
+            return unowned
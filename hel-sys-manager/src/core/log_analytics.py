@@ -0,0 +1,230 @@
+import re
+import datetime
+import threading
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import itemgetter
+
+from .pacman_log import ACTIONS
+
+try:
+    import numpy
+    _NUMPY_AVAILABLE = True
+except ImportError:
+    _NUMPY_AVAILABLE = False
+
+# رموز العمليات في العمود action؛ أول خمسة تطابق ترتيب ACTIONS
+# Action codes stored in the action column; the first five follow the order of ACTIONS
+TRANSACTION_STARTED = len(ACTIONS)
+TRANSACTION_COMPLETED = len(ACTIONS) + 1
+_ACTION_CODES = {action.encode(): code for code, action in enumerate(ACTIONS)}
+_ACTION_CODES[b"transaction started"] = TRANSACTION_STARTED
+_ACTION_CODES[b"transaction completed"] = TRANSACTION_COMPLETED
+UPGRADED = ACTIONS.index("upgraded")
+
+_ACTIVITY_RE = re.compile(
+    rb"(?m)^\[([^\]\n]+)\] \[ALPM\] "
+    rb"(installed|upgraded|downgraded|reinstalled|removed|transaction started|transaction completed)"
+    rb" ?([^ \n]*)"
+)
+
+
+# جلسة معاملة في عمود العمليات (كبايتات): "started" ثم أي عمليات ثم "completed" بدون بداية أخرى بينهما
+# A transaction session in the action column (as bytes): "started", any operations, then
+# "completed" with no other start in between
+_SESSION_RE = re.compile(
+    bytes([TRANSACTION_STARTED]) + b"[^" + bytes([TRANSACTION_STARTED, TRANSACTION_COMPLETED]) + b"]*"
+    + bytes([TRANSACTION_COMPLETED])
+)
+_UPGRADED_BYTE = bytes([UPGRADED])
+
+
+def _parse_stamp(stamp):
+    """
+    تحويل طابع زمني واحد إلى (ثوانٍ، رقم اليوم الترتيبي بالتوقيت المكتوب في السجل)، أو None إذا كان تالفاً.
+    Converts one timestamp to (epoch seconds, day ordinal in the log's own time zone), or None
+    if it is malformed.
+    """
+    try:
+        moment = datetime.datetime.fromisoformat(stamp.decode("ascii", "replace"))
+        return moment.timestamp(), moment.toordinal()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+class PackageActivity:
+    """
+    تحليلات نشاط الحزم فوق pacman.log بتخزين عمودي.
+    Package-activity analytics over pacman.log using columnar storage.
+
+    يُحوَّل السجل بتمريرة findall واحدة إلى أعمدة متوازية: رقم الطابع الزمني المُدمج، رمز العملية
+    ورقم الحزمة المُدمج. الطوابع الفريدة (ثوانٍ + يوم) تُحلل مرة واحدة في جدول صغير، ثم تُحسب
+    التجميعات على الأعمدة مباشرة (بـ numpy إذا كانت متوفرة). تتم إضافة الأسطر الجديدة فقط عند نمو السجل.
+    The log is turned with a single findall pass into parallel columns: interned timestamp id,
+    action code and interned package id. Unique timestamps (seconds + day) are parsed once into a
+    small table, and aggregations then run over the columns directly (with numpy when available).
+    Only new lines are added when the log grows.
+    """
+
+    def __init__(self, pacman_log):
+        self.pacman_log = pacman_log
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.stamp_ids = array('I')
+        self.actions = array('B')
+        self.package_ids = array('I')
+        self.stamp_times = array('d')
+        self.stamp_days = array('I')
+        self.package_names = []
+        self._stamp_index = {}
+        self._package_index = {}
+        self._scanned_to = 0
+        self._generation = self.pacman_log.generation
+
+    def __len__(self):
+        return len(self.actions)
+
+    def update(self):
+        """
+        إضافة المدخلات الجديدة إلى الأعمدة. تعيد عدد الأسطر المضافة.
+        Appends new entries to the columns. Returns the number of added rows.
+        """
+        with self._lock:
+            if self._generation != self.pacman_log.generation:
+                self._reset()
+            rows = self.pacman_log.findall(_ACTIVITY_RE, self._scanned_to)
+            self._scanned_to = max(self._scanned_to, self.pacman_log.scanned_to)
+            if not rows:
+                return 0
+
+            # كل معاملة تكتب عدة أسطر بنفس الطابع الزمني، لذلك يُحلل كل طابع فريد مرة واحدة فقط.
+            # الطوابع التالفة تُسجل كـ None وتُتجاهل مدخلاتها
+            # A transaction writes many lines with the same timestamp, so each unique one is parsed
+            # once. Malformed stamps are recorded as None and their entries are skipped
+            stamp_index = self._stamp_index
+            for stamp in set(map(itemgetter(0), rows)).difference(stamp_index):
+                parsed = _parse_stamp(stamp)
+                if parsed is None:
+                    stamp_index[stamp] = None
+                    continue
+                stamp_index[stamp] = len(self.stamp_times)
+                self.stamp_times.append(parsed[0])
+                self.stamp_days.append(parsed[1])
+            rows = [row for row in rows if stamp_index[row[0]] is not None]
+
+            stamps = list(map(itemgetter(0), rows))
+            names = list(map(itemgetter(2), rows))
+            self.actions.extend(map(_ACTION_CODES.__getitem__, map(itemgetter(1), rows)))
+            self.stamp_ids.extend(map(stamp_index.__getitem__, stamps))
+
+            package_index = self._package_index
+            for name in set(names).difference(package_index):
+                package_index[name] = len(self.package_names)
+                self.package_names.append(name.decode("utf-8", "replace"))
+            self.package_ids.extend(map(package_index.__getitem__, names))
+            return len(rows)
+
+    def _daily_counts(self):
+        if _NUMPY_AVAILABLE:
+            days = numpy.frombuffer(self.stamp_days, dtype=numpy.uint32)[
+                numpy.frombuffer(self.stamp_ids, dtype=numpy.uint32)]
+            actions = numpy.frombuffer(self.actions, dtype=numpy.uint8)
+            mask = actions < len(ACTIONS)
+            days, actions = days[mask], actions[mask]
+            if not len(days):
+                return []
+            first_day = int(days.min())
+            span = int(days.max()) - first_day + 1
+            grid = numpy.bincount(
+                (days - first_day).astype(numpy.int64) * len(ACTIONS) + actions,
+                minlength=span * len(ACTIONS),
+            ).reshape(span, len(ACTIONS))
+            active = numpy.flatnonzero(grid.sum(axis=1))
+            return [
+                (datetime.date.fromordinal(first_day + int(day)).isoformat(),) + tuple(grid[day].tolist())
+                for day in active
+            ]
+
+        per_day = {}
+        days = map(self.stamp_days.__getitem__, self.stamp_ids)
+        for (day, action), count in Counter(zip(days, self.actions)).items():
+            if action < len(ACTIONS):
+                per_day.setdefault(day, [0] * len(ACTIONS))[action] = count
+        return [
+            (datetime.date.fromordinal(day).isoformat(),) + tuple(row)
+            for day, row in sorted(per_day.items())
+        ]
+
+    def _top_upgraded(self, limit):
+        if _NUMPY_AVAILABLE:
+            ids = numpy.frombuffer(self.package_ids, dtype=numpy.uint32)
+            actions = numpy.frombuffer(self.actions, dtype=numpy.uint8)
+            counts = numpy.bincount(ids[actions == UPGRADED], minlength=len(self.package_names))
+            top = numpy.argsort(counts, kind="stable")[::-1][:limit]
+            return [(self.package_names[i], int(counts[i])) for i in top if counts[i]]
+
+        upgraded = Counter(compress(self.package_ids, map(UPGRADED.__eq__, self.actions)))
+        return [(self.package_names[i], count) for i, count in upgraded.most_common(limit)]
+
+    def _upgrade_sessions(self, limit):
+        """
+        جلسات الترقية: كل "transaction started" مع أول "completed" قبل البداية التالية
+        وتحتوي على ترقية واحدة على الأقل (المعاملات المقطوعة تُتجاهل).
+        Upgrade sessions: each "transaction started" paired with the first "completed" before the
+        next start that contains at least one upgrade (interrupted transactions are skipped).
+        """
+        # البحث في عمود العمليات كبايتات يطابق كل الجلسات في حلقة C واحدة
+        # Searching the action column as bytes matches every session in a single C-level loop
+        column = self.actions.tobytes()
+        sessions = [
+            (match.start(), match.end() - 1, upgrades)
+            for match in _SESSION_RE.finditer(column)
+            for upgrades in (match.group().count(_UPGRADED_BYTE),)
+            if upgrades
+        ]
+        stamp_ids, stamp_times = self.stamp_ids, self.stamp_times
+        starts = [stamp_times[stamp_ids[start]] for start, _, _ in sessions]
+        durations = [stamp_times[stamp_ids[end]] - stamp_times[stamp_ids[start]] for start, end, _ in sessions]
+
+        count = len(durations)
+        if not count:
+            average = median = 0.0
+        elif _NUMPY_AVAILABLE:
+            average, median = float(numpy.mean(durations)), float(numpy.median(durations))
+        else:
+            ordered = sorted(durations)
+            average = sum(ordered) / count
+            median = (ordered[(count - 1) // 2] + ordered[count // 2]) / 2
+        longest = sorted(range(count), key=durations.__getitem__, reverse=True)[:limit]
+        return {
+            "count": count,
+            "average": average,
+            "median": median,
+            "total": sum(durations),
+            "longest": [(starts[i], durations[i], sessions[i][2]) for i in longest],
+        }
+
+    def summary(self, top_limit=20):
+        """
+        ملخص النشاط: عدد العمليات لكل يوم، أكثر الحزم ترقية، ومدة جلسات الترقية.
+        Activity summary: operations per day, most frequently upgraded packages and
+        upgrade-session durations.
+        """
+        self.update()
+        with self._lock:
+            column = self.actions.tobytes()
+            totals = {action: column.count(bytes([code])) for code, action in enumerate(ACTIONS)}
+            first = self.stamp_times[self.stamp_ids[0]] if self.stamp_ids else None
+            last = self.stamp_times[self.stamp_ids[-1]] if self.stamp_ids else None
+            return {
+                "entries": sum(totals.values()),
+                "totals": totals,
+                "first": first,
+                "last": last,
+                "per_day": self._daily_counts(),
+                "top_upgraded": self._top_upgraded(top_limit),
+                "sessions": self._upgrade_sessions(top_limit),
+            }
@@ -0,0 +1,249 @@
+import time
+import ssl
+import random
+import asyncio
+import platform
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+DEFAULT_MIRRORLIST = "/etc/pacman.d/mirrorlist"
+# الملف المستخدم للقياس: قاعدة بيانات core صغيرة وموجودة في كل مرآة
+# The probed file: the core database is small and present on every mirror
+PROBE_REPO = "core"
+PROBE_FILE = "core.db"
+# حجم النقل الثابت لقياس السرعة (يُطلب عبر Range)
+# Fixed transfer size for the rate measurement (requested with Range)
+PROBE_BYTES = 128 * 1024
+# حجم مرجعي لترتيب المرايا: الوقت المتوقع لتنزيل حزمة بهذا الحجم
+# Reference size for ranking: the expected time to download a package of this size
+REFERENCE_BYTES = 4 * 1024 * 1024
+CONNECT_TIMEOUT_SECONDS = 2.0
+PROBE_TIMEOUT_SECONDS = 5.0
+MAX_CONCURRENT_PROBES = 32
+# الحد الأقصى لعدد المرايا المقاسة افتراضياً (mirrorlist الكامل يحوي ~1000 مرآة معلقة)
+# Default cap on the number of probed mirrors (the stock mirrorlist has ~1000 commented ones)
+MAX_CANDIDATES = 100
+_READ_CHUNK = 16 * 1024
+
+# نتيجة قياس مرآة واحدة. latency و rate تكون None عند الفشل، و error يصف السبب
+# One mirror's measurement. latency and rate are None on failure, and error describes why
+MirrorResult = namedtuple("MirrorResult", ["server", "latency", "rate", "error"])
+
+
+def read_mirrorlist(path=DEFAULT_MIRRORLIST):
+    """
+    قراءة أسطر Server من ملف mirrorlist، بما فيها المعلقة (#Server = ...) كمرشحين.
+    Reads the Server lines of a mirrorlist file, including commented ones (#Server = ...)
+    as candidates.
+
+    تعيد قائمة (الرابط، هل هو مفعل) بدون تكرار وبترتيب الملف.
+    Returns a list of (url, enabled) without duplicates, in file order.
+    """
+    servers = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            enabled = not line.startswith("#")
+            line = line.lstrip("#").strip()
+            key, sep, value = line.partition("=")
+            if not sep or key.strip() != "Server":
+                continue
+            url = value.strip()
+            if url:
+                servers[url] = servers.get(url, False) or enabled
+    return list(servers.items())
+
+
+def probe_url(server, arch=None):
+    """
+    رابط ملف القياس لمرآة بصيغة mirrorlist (مع $repo و $arch).
+    The probe file URL for a mirror in mirrorlist form (with $repo and $arch).
+    """
+    url = server.replace("$repo", PROBE_REPO).replace("$arch", arch or platform.machine())
+    return url.rstrip("/") + "/" + PROBE_FILE
+
+
+async def _read_head(reader):
+    status_line = await reader.readline()
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+        raise ValueError("invalid HTTP response")
+    status = int(parts[1])
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return status
+
+
+async def _probe(server, arch, probe_bytes, connect_timeout):
+    """
+    زمن الاتصال (بما فيه مصافحة TLS) ثم معدل نقل أول probe_bytes من ملف القياس.
+    Connect time (including the TLS handshake), then the transfer rate of the probe file's
+    first probe_bytes.
+    """
+    url = urlsplit(probe_url(server, arch))
+    if url.scheme not in ("http", "https") or not url.hostname:
+        raise ValueError(f"unsupported URL '{server}'")
+    secure = url.scheme == "https"
+    port = url.port or (443 if secure else 80)
+    ssl_context = ssl.create_default_context() if secure else None
+
+    start = time.monotonic()
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(url.hostname, port, ssl=ssl_context,
+                                server_hostname=url.hostname if secure else None),
+        connect_timeout,
+    )
+    latency = time.monotonic() - start
+    try:
+        path = url.path or "/"
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            f"Range: bytes=0-{probe_bytes - 1}\r\n"
+            "User-Agent: hel-sys-manager\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        transfer_start = time.monotonic()
+        writer.write(request.encode("ascii"))
+        await writer.drain()
+        status = await _read_head(reader)
+        if status not in (200, 206):
+            raise ValueError(f"HTTP {status}")
+        received = 0
+        while received < probe_bytes:
+            chunk = await reader.read(min(_READ_CHUNK, probe_bytes - received))
+            if not chunk:
+                break
+            received += len(chunk)
+        elapsed = time.monotonic() - transfer_start
+        if received == 0:
+            raise ValueError("empty response")
+        return latency, received / max(elapsed, 1e-6)
+    finally:
+        writer.close()
+
+
+class MirrorRanker:
+    """
+    ترتيب مرايا pacman بقياسات متوازية عبر asyncio.
+    Ranks pacman mirrors with concurrent asyncio probes.
+
+    كل مرآة تُقاس مرة واحدة: زمن الاتصال ثم نقل حجم ثابت صغير، ضمن مهلة صارمة. يتم قياس
+    حتى max_concurrent مرآة في الوقت نفسه، لذلك يستغرق ترتيب 100 مرآة بضع ثوانٍ.
+    Each mirror is probed once: connect latency, then a small fixed-size transfer, under a
+    strict timeout. Up to max_concurrent mirrors are probed at the same time, so ranking 100
+    mirrors takes a few seconds.
+    """
+
+    def __init__(self, mirrorlist_path=DEFAULT_MIRRORLIST, arch=None, probe_bytes=PROBE_BYTES,
+                 connect_timeout=CONNECT_TIMEOUT_SECONDS, timeout=PROBE_TIMEOUT_SECONDS,
+                 max_concurrent=MAX_CONCURRENT_PROBES, max_candidates=MAX_CANDIDATES):
+        self.mirrorlist_path = mirrorlist_path
+        self.arch = arch
+        self.probe_bytes = probe_bytes
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self.max_candidates = max_candidates
+
+    def candidates(self, include_commented=True):
+        """
+        المرايا المرشحة للقياس: كل المرايا المفعلة، ثم عينة عشوائية من المعلقة حتى max_candidates
+        (بترتيب الملف). include_commented=False يقصر القياس على المفعلة.
+        The mirrors to probe: every enabled mirror, then a random sample of the commented ones
+        up to max_candidates (in file order). include_commented=False probes only the enabled
+        ones.
+        """
+        servers = read_mirrorlist(self.mirrorlist_path)
+        enabled = [url for url, is_enabled in servers if is_enabled][:self.max_candidates]
+        commented = [url for url, is_enabled in servers if not is_enabled]
+        room = self.max_candidates - len(enabled) if include_commented else 0
+        if room < len(commented):
+            picked = set(random.sample(commented, max(room, 0)))
+            commented = [url for url in commented if url in picked]
+        return enabled + commented
+
+    async def _probe_all(self, servers, progress_callback):
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        done = 0
+
+        async def probe_one(server):
+            nonlocal done
+            async with semaphore:
+                try:
+                    latency, rate = await asyncio.wait_for(
+                        _probe(server, self.arch, self.probe_bytes, self.connect_timeout), self.timeout
+                    )
+                    result = MirrorResult(server, latency, rate, None)
+                except asyncio.TimeoutError:
+                    result = MirrorResult(server, None, None, "timed out")
+                except (OSError, ValueError, ssl.SSLError) as e:
+                    result = MirrorResult(server, None, None, str(e) or type(e).__name__)
+            done += 1
+            if progress_callback is not None:
+                progress_callback(done, len(servers))
+            return result
+
+        return await asyncio.gather(*(probe_one(server) for server in servers))
+
+    @staticmethod
+    def score(result):
+        """
+        الوقت المتوقع (بالثواني) لتنزيل حزمة بالحجم المرجعي من المرآة. الأقل أفضل.
+        The expected time (seconds) to download a reference-sized package from the mirror.
+        Lower is better.
+        """
+        return result.latency + REFERENCE_BYTES / result.rate
+
+    def rank(self, servers=None, progress_callback=None):
+        """
+        قياس المرايا (افتراضياً مرشحو mirrorlist) وترتيبها. progress_callback(done, total) اختياري.
+        Probes the mirrors (by default the mirrorlist candidates) and ranks them.
+        progress_callback(done, total) is optional.
+
+        تعيد قائمة MirrorResult: المرايا العاملة مرتبة حسب score أولاً، ثم الفاشلة.
+        Returns a list of MirrorResult: working mirrors ordered by score first, then failures.
+        """
+        if servers is None:
+            servers = self.candidates()
+        results = asyncio.run(self._probe_all(list(servers), progress_callback))
+        working = sorted((result for result in results if result.error is None), key=self.score)
+        failed = [result for result in results if result.error is not None]
+        return working + failed
+
+    @staticmethod
+    def render_mirrorlist(results, enabled_count=None, unranked=()):
+        """
+        نص mirrorlist جديد: المرايا العاملة بالترتيب (أول enabled_count منها مفعلة)، والفاشلة معلقة،
+        ثم المرايا التي لم تُقس (unranked) معلقة حتى لا تضيع من الملف.
+        New mirrorlist text: working mirrors in order (the first enabled_count enabled), failed
+        ones commented out, then the mirrors that were not probed (unranked) commented out so
+        they are not lost from the file.
+        """
+        lines = [
+            "##",
+            "## Arch Linux repository mirrorlist",
+            f"## Ranked by hel-sys-manager on {time.strftime('%Y-%m-%d %H:%M')}",
+            "##",
+            "",
+        ]
+        working = [result for result in results if result.error is None]
+        for index, result in enumerate(working):
+            prefix = "" if enabled_count is None or index < enabled_count else "#"
+            lines.append(f"## {result.latency * 1000:.0f} ms, {result.rate / 1024:.0f} KiB/s")
+            lines.append(f"{prefix}Server = {result.server}")
+        failed = [result for result in results if result.error is not None]
+        if failed:
+            lines.append("")
+            lines.append("## Unreachable during ranking")
+            for result in failed:
+                lines.append(f"## {result.error}")
+                lines.append(f"#Server = {result.server}")
+        ranked = {result.server for result in results}
+        unranked = [server for server in unranked if server not in ranked]
+        if unranked:
+            lines.append("")
+            lines.append("## Not ranked")
+            lines.extend(f"#Server = {server}" for server in unranked)
+        return "\n".join(lines) + "\n"
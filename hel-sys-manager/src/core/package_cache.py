@@ -0,0 +1,297 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .vercmp import version_key
+
+# أرشيف حزمة واحد في مجلد ذاكرة pacman المؤقتة
+# One package archive in a pacman cache directory
+CacheArchive = namedtuple("CacheArchive", [
+    "name", "version", "arch", "filename", "directory", "size", "signature",
+])
+
+PACKAGE_SUFFIX = ".pkg.tar"
+SIGNATURE_SUFFIX = ".sig"
+STAT_CHUNK_SIZE = 512
+SCAN_WORKERS = 8
+# حد حجم الوسائط لكل أمر حذف، أقل بكثير من ARG_MAX المعتاد (2 ميجابايت)
+# Argument budget per delete command, well under the usual ARG_MAX (2 MB)
+DELETE_ARGUMENT_BUDGET = 1024 * 1024
+# الوسائط مجموعات (مجلد، عدد، ملفات...): rm واحد لكل مجلد داخل shell واحد. eval يبني فقط
+# مراجع "${N}" للوسائط، ولا يرى أسماء الملفات نفسها
+# The arguments are (directory, count, files...) groups: one rm per directory inside a single
+# shell. eval only builds "${N}" references to the arguments and never sees the file names
+_DELETE_SCRIPT = r"""status=0
+while [ $# -gt 0 ]; do
+    dir=$1; count=$2; shift 2
+    files=""; i=1
+    while [ $i -le $count ]; do files="$files \"\${$i}\""; i=$((i + 1)); done
+    (cd -- "$dir" && eval "rm -f -- $files") || status=1
+    shift $count
+done
+exit $status"""
+
+
+def parse_archive_filename(filename):
+    """
+    استخراج (الاسم، الإصدار، المعمارية) من اسم ملف مثل "foo-1:2.0-3-x86_64.pkg.tar.zst".
+    تعيد None إذا لم يكن أرشيف حزمة.
+    Extracts (name, version, arch) from a filename like "foo-1:2.0-3-x86_64.pkg.tar.zst".
+    Returns None if it is not a package archive.
+    """
+    cut = filename.find(PACKAGE_SUFFIX)
+    if cut <= 0 or filename.endswith(SIGNATURE_SUFFIX) or filename.endswith(".part"):
+        return None
+    parts = filename[:cut].rsplit("-", 3)
+    if len(parts) != 4 or not all(parts):
+        return None
+    name, pkgver, pkgrel, arch = parts
+    return name, f"{pkgver}-{pkgrel}", arch
+
+
+def _stat_sizes(entries):
+    sizes = []
+    for entry in entries:
+        try:
+            sizes.append(entry.stat(follow_symlinks=False).st_size)
+        except OSError:
+            sizes.append(-1)
+    return sizes
+
+
+class PackageCache:
+    """
+    محلل ومنظف لمجلدات ذاكرة pacman المؤقتة (CacheDir في pacman.conf).
+    Analyzer and pruner for pacman's cache directories (CacheDir in pacman.conf).
+
+    يتم فحص المجلدات واستدعاءات stat بالتوازي، وتُجمع الأرشيفات حسب الحزمة مرتبة بـ vercmp
+    (الأحدث أولاً). تتم إعادة الفحص فقط عند تغير وقت تعديل أحد المجلدات، ويُستدعى stat للملفات الجديدة فقط.
+    Directories and stat calls are scanned in parallel, and archives are grouped by package,
+    ordered with vercmp (newest first). Rescans only happen when a directory's mtime changes,
+    and only new files are stat'ed.
+    """
+
+    def __init__(self, config, local_db):
+        self.config = config
+        self.local_db = local_db
+        self._lock = threading.Lock()
+        self._dir_mtimes = None
+        # اسم الحزمة -> قائمة CacheArchive (الأحدث أولاً)
+        # package name -> list of CacheArchive (newest first)
+        self._by_name = {}
+        # المجلد -> قاموس اسم الملف -> CacheArchive، لإعادة الفحص التزايدية
+        # directory -> dict of filename -> CacheArchive, for incremental rescans
+        self._listings = {}
+        self.generation = 0
+
+    @property
+    def cache_dirs(self):
+        self.config.load()
+        return [os.path.normpath(directory) for directory in self.config.cache_dirs]
+
+    def _current_mtimes(self, directories):
+        mtimes = {}
+        for directory in directories:
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtimes[directory] = None
+        return mtimes
+
+    @staticmethod
+    def _list_directory(directory):
+        """
+        قراءة أسماء الأرشيفات في مجلد واحد: (قائمة (entry، الاسم والإصدار والمعمارية)، كل الأسماء).
+        Lists the archives in one directory: (list of (entry, (name, version, arch)), all names).
+        """
+        try:
+            with os.scandir(directory) as entries:
+                entries = [entry for entry in entries if PACKAGE_SUFFIX in entry.name]
+        except OSError as e:
+            print(f"Error reading package cache '{directory}': {e}")
+            return [], set()
+        parsed_entries = []
+        for entry in entries:
+            parsed = parse_archive_filename(entry.name)
+            if parsed is not None:
+                parsed_entries.append((entry, parsed))
+        return parsed_entries, {entry.name for entry in entries}
+
+    def refresh(self):
+        """
+        إعادة فحص المجلدات التي تغيرت فقط، واستدعاء stat للملفات الجديدة فقط. تعيد True إذا تغير شيء.
+        Rescans only the directories that changed, and stats only the new files.
+        Returns True if anything changed.
+        """
+        with self._lock:
+            directories = self.cache_dirs
+            mtimes = self._current_mtimes(directories)
+            if mtimes == self._dir_mtimes:
+                return False
+
+            previous_mtimes = self._dir_mtimes or {}
+            changed = [directory for directory in directories
+                       if mtimes[directory] is not None and mtimes[directory] != previous_mtimes.get(directory)]
+            listings = {directory: self._listings[directory] for directory in directories
+                        if mtimes[directory] is not None and directory in self._listings}
+            by_name = dict(self._by_name)
+            touched = set()
+            # المجلدات التي اختفت أو أزيلت من pacman.conf
+            # Directories that vanished or were dropped from pacman.conf
+            for directory in set(self._listings) - set(listings):
+                touched.update(archive.name for archive in self._listings[directory].values())
+
+            with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+                # المجلدات تُقرأ بالتوازي، ثم توزع استدعاءات stat (التي تحرر GIL) على دفعات متوازية
+                # Directories are listed in parallel, then the stat calls (which release the GIL)
+                # are spread over parallel chunks
+                scanned = list(executor.map(self._list_directory, changed))
+                for directory, (parsed_entries, names) in zip(changed, scanned):
+                    old = listings.get(directory, {})
+                    current = {}
+                    fresh = []
+                    for entry, parsed in parsed_entries:
+                        archive = old.get(entry.name)
+                        if archive is None:
+                            fresh.append((entry, parsed))
+                            continue
+                        signature = entry.name + SIGNATURE_SUFFIX
+                        signature = signature if signature in names else None
+                        if signature != archive.signature:
+                            archive = archive._replace(signature=signature)
+                            touched.add(archive.name)
+                        current[entry.name] = archive
+
+                    chunks = [fresh[i:i + STAT_CHUNK_SIZE] for i in range(0, len(fresh), STAT_CHUNK_SIZE)]
+                    sized = executor.map(_stat_sizes, ([entry for entry, _ in chunk] for chunk in chunks))
+                    for chunk, sizes in zip(chunks, sized):
+                        for (entry, (name, version, arch)), size in zip(chunk, sizes):
+                            if size < 0:
+                                continue
+                            signature = entry.name + SIGNATURE_SUFFIX
+                            current[entry.name] = CacheArchive(
+                                name, version, arch, entry.name, directory, size,
+                                signature if signature in names else None,
+                            )
+                            touched.add(name)
+                    touched.update(old[filename].name for filename in old.keys() - current.keys())
+                    listings[directory] = current
+
+            # إعادة بناء قوائم الحزم المتأثرة فقط
+            # Only the affected packages' lists are rebuilt
+            for name in touched:
+                by_name.pop(name, None)
+            for directory, archives in listings.items():
+                for archive in archives.values():
+                    if archive.name in touched:
+                        by_name.setdefault(archive.name, []).append(archive)
+            for name in touched:
+                archives = by_name.get(name)
+                if archives:
+                    archives.sort(key=lambda archive: version_key(archive.version), reverse=True)
+
+            self._listings = listings
+            self._by_name = by_name
+            self._dir_mtimes = mtimes
+            self.generation += 1
+            return True
+
+    def packages(self):
+        """
+        قاموس اسم الحزمة -> أرشيفاتها المخزنة (الأحدث أولاً).
+        Dict of package name -> its cached archives (newest first).
+        """
+        self.refresh()
+        return self._by_name
+
+    def versions(self, package_name):
+        return self.packages().get(package_name, [])
+
+    def cached_versions(self, package_name):
+        """
+        أرشيفات الحزمة من آخر فحص، بدون أي وصول للقرص (O(1)). يُستدعى refresh عند تغير المجلد.
+        The package's archives from the last scan, without touching the disk (O(1)).
+        refresh is called when a directory changes.
+        """
+        return self._by_name.get(package_name, [])
+
+    def cleanup_plan(self, keep_versions=3, uninstalled_only=False):
+        """
+        معاينة سياسة التنظيف: الإبقاء على آخر keep_versions إصدارات لكل حزمة ومعمارية
+        (كما يفعل paccache -rk)، أو فقط للحزم غير المثبتة إذا كان uninstalled_only.
+        الإصدار المثبت حالياً لا يُحذف أبداً، ويُحسب ضمن الإصدارات المبقاة كما في paccache.
+        Previews the cleanup policy: keep the last keep_versions versions per package and
+        architecture (as paccache -rk does), or only for uninstalled packages when
+        uninstalled_only is set. The currently installed version is never deleted, and it
+        counts toward the kept versions as it does with paccache.
+
+        تعيد قاموساً: archives (ما سيحذف)، size (الحجم المحرر)، total_count و total_size (حجم الذاكرة كلها).
+        Returns a dict: archives (what would be deleted), size (freed bytes), total_count and
+        total_size (the whole cache).
+        """
+        installed = self.local_db.packages()
+        packages = self.packages()
+        doomed = []
+        total_count = total_size = 0
+        for name, archives in packages.items():
+            total_count += len(archives)
+            total_size += sum(archive.size for archive in archives)
+            record = installed.get(name)
+            if uninstalled_only and record is not None:
+                continue
+            kept_per_arch = {}
+            for archive in archives:
+                kept = kept_per_arch.get(archive.arch, 0)
+                if kept < keep_versions or (record is not None and archive.version == record.version):
+                    kept_per_arch[archive.arch] = kept + 1
+                    continue
+                doomed.append(archive)
+        doomed.sort(key=lambda archive: (archive.name, archive.filename))
+        return {
+            "archives": doomed,
+            "size": sum(archive.size for archive in doomed),
+            "total_count": total_count,
+            "total_size": total_size,
+        }
+
+    @staticmethod
+    def build_delete_commands(archives):
+        """
+        أوامر الحذف: عادة أمر shell واحد لكل المجلدات (rm -f للأرشيفات وتواقيعها لكل مجلد)،
+        حتى تظهر نافذة المصادقة مرة واحدة. يُقسم فقط إذا تجاوزت الوسائط حد الوسائط.
+        The delete commands: normally a single shell command for every directory (rm -f of the
+        archives and their signatures per directory), so the authentication prompt appears
+        once. It is only split if the arguments would exceed the argument budget.
+        """
+        by_directory = {}
+        for archive in archives:
+            files = by_directory.setdefault(archive.directory, [])
+            files.append(archive.filename)
+            if archive.signature:
+                files.append(archive.signature)
+
+        commands = []
+        groups, used = [], 0
+
+        def flush():
+            nonlocal groups, used
+            if groups:
+                commands.append(["/bin/sh", "-c", _DELETE_SCRIPT, "sh"] + groups)
+                groups, used = [], 0
+
+        for directory, files in by_directory.items():
+            batch = []
+            for filename in files:
+                if used + len(directory) + len(filename) + 16 > DELETE_ARGUMENT_BUDGET:
+                    if batch:
+                        groups += [directory, str(len(batch))] + batch
+                        batch = []
+                    flush()
+                batch.append(filename)
+                used += len(filename) + 1
+            if batch:
+                groups += [directory, str(len(batch))] + batch
+                used += len(directory) + 16
+        flush()
+        return commands
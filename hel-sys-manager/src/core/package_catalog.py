@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import threading
+
+from .pacman_sync_db import read_sync_db
+
+CATALOG_SCHEMA_VERSION = 2
+
+
+class PackageCatalog:
+    """
+    فهرس دائم للحزم في SQLite مع بحث نصي كامل (FTS5) مرتب حسب الصلة.
+    Persistent SQLite package catalog with relevance-ranked full-text search (FTS5).
+
+    يبقى الفهرس على القرص بين مرات التشغيل، ويُحدَّث مستودع بمستودع فقط عندما
+    يتغير وقت تعديل ملف .db الخاص به.
+    The catalog survives restarts and is refreshed repo by repo, only when that
+    repo's .db file mtime changes.
+    """
+
+    # أوزان bm25 للأعمدة: name, description, provides, groups
+    # bm25 column weights: name, description, provides, groups
+    RANK_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+    def __init__(self, sync_db, catalog_path):
+        self.sync_db = sync_db
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(catalog_path, check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_SCHEMA_VERSION:
+            self._conn.executescript("""
+                DROP TABLE IF EXISTS repos;
+                DROP TABLE IF EXISTS packages;
+            """)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS repos (
+                repo TEXT PRIMARY KEY,
+                mtime INTEGER NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS packages USING fts5(
+                name, description, provides, groups,
+                repo UNINDEXED, version UNINDEXED, isize UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            PRAGMA user_version = {CATALOG_SCHEMA_VERSION};
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def is_supported():
+        """
+        التحقق من أن مكتبة SQLite المثبتة مبنية مع FTS5.
+        Checks that the installed SQLite library was built with FTS5.
+        """
+        try:
+            conn = sqlite3.connect(":memory:")
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+            conn.close()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def refresh(self):
+        """
+        تحديث المستودعات التي تغير ملف .db الخاص بها فقط. تعيد قائمة المستودعات المحدثة.
+        Refreshes only repositories whose .db file changed. Returns the list of refreshed repos.
+        """
+        with self._lock:
+            mtimes = self.sync_db.db_mtimes()
+            stored = dict(self._conn.execute("SELECT repo, mtime FROM repos"))
+            refreshed = []
+
+            with self._conn:
+                for repo in set(stored) - set(mtimes):
+                    self._conn.execute("DELETE FROM packages WHERE repo = ?", (repo,))
+                    self._conn.execute("DELETE FROM repos WHERE repo = ?", (repo,))
+                    refreshed.append(repo)
+
+                for repo, mtime in mtimes.items():
+                    if stored.get(repo) == mtime:
+                        continue
+                    try:
+                        records = read_sync_db(repo, self.sync_db.db_file(repo))
+                    except Exception as e:
+                        print(f"Error indexing sync database '{repo}': {e}")
+                        continue
+                    self._conn.execute("DELETE FROM packages WHERE repo = ?", (repo,))
+                    self._conn.executemany(
+                        "INSERT INTO packages (name, description, provides, groups, repo, version, isize) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        ((pkg.name, pkg.description, " ".join(pkg.provides), " ".join(pkg.groups),
+                          pkg.repo, pkg.version, pkg.isize) for pkg in records)
+                    )
+                    self._conn.execute("INSERT OR REPLACE INTO repos (repo, mtime) VALUES (?, ?)", (repo, mtime))
+                    refreshed.append(repo)
+
+            if refreshed:
+                self._conn.execute("INSERT INTO packages (packages) VALUES ('optimize')")
+                self._conn.commit()
+            return refreshed
+
+    @staticmethod
+    def _fts_query(query):
+        """
+        تحويل نص المستخدم إلى استعلام FTS5 آمن: كل كلمة بين علامتي تنصيص مع بحث بالبادئة.
+        Turns user text into a safe FTS5 query: every word quoted and matched as a prefix.
+        """
+        terms = []
+        for term in query.split():
+            term = term.replace('"', '""')
+            terms.append(f'"{term}"*')
+        return " ".join(terms)
+
+    def search(self, query, limit=None):
+        """
+        بحث مرتب حسب الصلة. يعيد قائمة قواميس تحتوي repo و name و version و description و size.
+        Relevance-ranked search. Returns a list of dicts with repo, name, version, description
+        and size (installed size in bytes).
+
+        افتراضياً تُعاد كل النتائج (الواجهة تعرضها على دفعات)؛ limit يقتصر على أفضل النتائج.
+        Every match is returned by default (the UI streams them in chunks); limit keeps only
+        the best matches.
+        """
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+        self.refresh()
+        weights = ", ".join(str(w) for w in self.RANK_WEIGHTS)
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    f"SELECT repo, name, version, description, isize, bm25(packages, {weights}) AS score "
+                    "FROM packages WHERE packages MATCH ? "
+                    "ORDER BY (lower(name) = lower(?)) DESC, score LIMIT ?",
+                    (fts_query, query.strip(), -1 if limit is None else limit)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                print(f"Error searching package catalog: {e}")
+                return []
+        return [
+            {"repo": repo, "name": name, "version": version, "description": description, "size": isize}
+            for repo, name, version, description, isize, _ in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_default_catalog(sync_db, cache_dir):
+    """
+    فتح الفهرس في مجلد الذاكرة المؤقتة للتطبيق، أو None إذا لم يكن FTS5 مدعوماً.
+    Opens the catalog in the application cache directory, or None if FTS5 is not supported.
+    """
+    if not PackageCatalog.is_supported():
+        print("Warning: SQLite was built without FTS5. Falling back to the in-memory search index.")
+        return None
+    try:
+        return PackageCatalog(sync_db, os.path.join(cache_dir, "package_catalog.sqlite3"))
+    except sqlite3.Error as e:
+        print(f"Warning: Could not open the package catalog: {e}")
+        return None
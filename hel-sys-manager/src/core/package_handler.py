@@ -10,14 +10,50 @@ except ImportError:
     _PACMAN_AUR_MANAGER_AVAILABLE = False
     print("Warning: pacman_aur_manager.py not found. Pacman features will be limited.")
 
+from .package_catalog import open_default_catalog
+from .update_checker import UpdateChecker
+from .aur_client import AURClient, AURError
+from .mirror_ranker import MirrorRanker, read_mirrorlist
+from .dpkg_db import DpkgStatusDB, AptListsDB, deb_info_dict
+from .pacman_log import PacmanLog
+from .log_analytics import PackageActivity
+from .file_ownership import FileOwnershipIndex
+from .disk_usage import disk_usage_summary, FOREIGN_REPO
+from .pacman_local_db import format_size
+from .system_utils import SystemUtils
+
 
 class PackageHandler:
     def __init__(self):
         self.package_manager = self._detect_package_manager()
         if self.package_manager == 'pacman' and _PACMAN_AUR_MANAGER_AVAILABLE:
             self.pacman_handler = PacmanAURManager()
+            # فهرس SQLite دائم للبحث المرتب حسب الصلة
+            # Persistent SQLite catalog for relevance-ranked search
+            self.catalog = open_default_catalog(self.pacman_handler.sync_db, SystemUtils.get_cache_dir())
+            # فاحص التحديثات بدون صلاحيات جذر
+            # Rootless update checker
+            self.update_checker = UpdateChecker(self.pacman_handler.config, self.pacman_handler.local_db,
+                                                SystemUtils.get_cache_dir())
+            # عميل AUR للحزم الأجنبية (غير الموجودة في أي مستودع)
+            # AUR client for foreign packages (those missing from every repository)
+            self.aur_client = AURClient(SystemUtils.get_cache_dir())
         else:
             self.pacman_handler = None
+            self.catalog = None
+            self.update_checker = None
+            self.aur_client = None
+        if self.package_manager == 'apt':
+            # قراءة مباشرة لقاعدة dpkg وقوائم apt بدلاً من تحليل مخرجات apt
+            # Direct reads of the dpkg database and apt lists instead of parsing apt's output
+            self.dpkg_db = DpkgStatusDB()
+            self.apt_lists = AptListsDB()
+        else:
+            self.dpkg_db = None
+            self.apt_lists = None
+        self.pacman_log = None
+        self.package_activity = None
+        self.file_index = None
 
     def _detect_package_manager(self):
         if sys.platform.startswith('linux'):
@@ -48,25 +84,18 @@ class PackageHandler:
 
     def search_packages(self, query):
         if self.package_manager == 'pacman' and self.pacman_handler:
-            packages_data = self.pacman_handler.search_packages(query)
-            if isinstance(packages_data, list):
+            success, packages_data = self.search_packages_detailed(query)
+            if success:
                 package_names = [pkg['name'] for pkg in packages_data if 'name' in pkg]
                 return True, package_names if package_names else ["No packages found for this query."]
             else:
                 return False, packages_data
         elif self.package_manager == 'apt':
-            success, output = self._run_command(['apt', 'search', query])
+            success, packages_data = self.search_packages_detailed(query)
             if success:
-                packages = []
-                for line in output.split('\n'):
-                    if line and not line.startswith('Sorting...') and not line.startswith('Full Text Search...'):
-                        try:
-                            pkg_name = line.split('/')[0].strip()
-                            packages.append(pkg_name)
-                        except IndexError:
-                            pass
-                return True, packages if packages else ["No packages found for this query."]
-            return False, output
+                package_names = [pkg['name'] for pkg in packages_data]
+                return True, package_names if package_names else ["No packages found for this query."]
+            return False, packages_data
         elif self.package_manager == 'dnf' or self.package_manager == 'yum':
             success, output = self._run_command([self.package_manager, 'search', query])
             if success:
@@ -97,21 +126,150 @@ class PackageHandler:
         else:
             return False, "No supported package manager detected."
 
+    def search_packages_detailed(self, query):
+        """
+        بحث يعيد قواميس تحتوي repo و name و version و description مرتبة حسب الصلة.
+        Search returning relevance-ranked dicts with repo, name, version and description (and
+        size when it is known).
+        """
+        if self.package_manager == 'pacman' and self.pacman_handler:
+            if self.catalog is not None:
+                return True, self.catalog.search(query)
+            packages_data = self.pacman_handler.search_packages(query)
+            if isinstance(packages_data, list):
+                return True, packages_data
+            return False, packages_data
+        if self.package_manager == 'apt':
+            if not self.apt_lists.is_available():
+                return False, f"apt lists not found at {self.apt_lists.lists_dir}"
+            return True, [
+                {"repo": pkg.repo, "name": pkg.name, "version": pkg.version, "description": pkg.description,
+                 "size": pkg.installed_size}
+                for pkg in self.apt_lists.search(query)
+            ]
+        success, result = self.search_packages(query)
+        if not success:
+            return False, result
+        return True, [{"repo": "", "name": name, "version": "", "description": ""} for name in result]
+
+    def _installed_packages(self):
+        """
+        قاموس الحزم المثبتة من قاعدة البيانات المباشرة، أو قاموس فارغ.
+        Installed packages dict from the direct database reader, or an empty dict.
+        """
+        if self.package_manager == 'pacman' and self.pacman_handler:
+            return self.pacman_handler.local_db.packages()
+        if self.package_manager == 'apt':
+            return self.dpkg_db.packages()
+        return {}
+
+    def _installed_and_available(self):
+        """
+        (قاموس الحزم المثبتة، قاموس الحزم المتاحة) من قواعد البيانات المباشرة، أو قواميس فارغة.
+        (installed packages dict, available packages dict) from the direct database readers, or
+        empty dicts.
+        """
+        if self.package_manager == 'pacman' and self.pacman_handler:
+            sync_db = self.pacman_handler.sync_db
+            available = sync_db.packages() if sync_db.is_available() else {}
+            return self.pacman_handler.local_db.packages(), available
+        if self.package_manager == 'apt':
+            return self.dpkg_db.packages(), self.apt_lists.packages()
+        return {}, {}
+
+    @staticmethod
+    def _installed_size(pkg):
+        # SyncPackage.isize و DebPackage.installed_size و LocalPackage.size كلها الحجم بعد التثبيت
+        # SyncPackage.isize, DebPackage.installed_size and LocalPackage.size are all installed sizes
+        if pkg is None:
+            return None
+        if hasattr(pkg, "isize"):
+            return pkg.isize
+        if hasattr(pkg, "installed_size"):
+            return pkg.installed_size
+        return pkg.size
+
+    def search_package_rows(self, query):
+        """
+        بحث يعيد صفوف جدول (الاسم، الإصدار، المستودع، الحجم أو None، مثبتة) مرتبة حسب الصلة.
+        Search returning table rows (name, version, repo, size or None, installed), relevance-ranked.
+        """
+        success, packages_data = self.search_packages_detailed(query)
+        if not success:
+            return False, packages_data
+        # الحجم يأتي مع نتيجة البحث (من الفهرس)، فلا تُحلل قواعد بيانات المستودعات كلها هنا
+        # The size comes with each search result (from the catalog), so the sync databases are
+        # not all parsed here
+        installed = self._installed_packages()
+        return True, [
+            (pkg["name"], pkg["version"], pkg["repo"], pkg.get("size"), pkg["name"] in installed)
+            for pkg in packages_data
+        ]
+
+    def list_installed_package_rows(self):
+        """
+        الحزم المثبتة كصفوف جدول (انظر search_package_rows).
+        Installed packages as table rows (see search_package_rows).
+        """
+        installed, available = self._installed_and_available()
+        if not installed:
+            success, result = self.list_installed_packages()
+            if not success:
+                return False, result
+            return True, [(name, "", "", None, True) for name in result if name != "No installed packages found."]
+        rows = []
+        for name, pkg in sorted(installed.items()):
+            candidate = available.get(name)
+            rows.append((name, pkg.version, candidate.repo if candidate is not None else FOREIGN_REPO,
+                         self._installed_size(pkg), True))
+        return True, rows
+
+    def list_available_package_rows(self):
+        """
+        كل الحزم المتاحة في المستودعات كصفوف جدول (انظر search_package_rows).
+        Every package available in the repositories as table rows (see search_package_rows).
+        """
+        installed, available = self._installed_and_available()
+        if not available:
+            return False, "Listing all packages is only supported with pacman and apt."
+        return True, [
+            (name, pkg.version, pkg.repo, self._installed_size(pkg), name in installed)
+            for name, pkg in sorted(available.items())
+        ]
+
+    @staticmethod
+    def _format_package_info(info):
+        if "Error" in info:
+            return False, info["Error"]
+        details_str = ""
+        for key, value in info.items():
+            details_str += f"{key}: {value}\n"
+        return True, details_str
+
+    def get_packages_details(self, package_names):
+        """
+        جلب تفاصيل عدة حزم دفعة واحدة. تعيد قاموس الاسم -> (نجاح، نص التفاصيل).
+        Fetches details for several packages in one batch. Returns name -> (success, details text).
+        """
+        if self.package_manager == 'pacman' and self.pacman_handler:
+            infos = self.pacman_handler.get_packages_info(package_names)
+            return {name: self._format_package_info(infos[name]) for name in package_names}
+        if self.package_manager == 'apt':
+            return {name: self._format_package_info(self._apt_package_info(name)) for name in package_names}
+        return {name: self.get_package_details(name) for name in package_names}
+
+    def _apt_package_info(self, package_name):
+        installed = self.dpkg_db.get(package_name)
+        available = self.apt_lists.get(package_name.split(":")[0])
+        if installed is None and available is None:
+            return {"Error": f"Package '{package_name}' was not found."}
+        return deb_info_dict(installed, available)
+
     def get_package_details(self, package_name):
         if self.package_manager == 'pacman' and self.pacman_handler:
-            info = self.pacman_handler.get_package_info(package_name)
-            if "Error" in info:
-                return False, info["Error"]
-            
-            details_str = ""
-            for key, value in info.items():
-                details_str += f"{key}: {value}\n"
-            return True, details_str
+            return self.get_packages_details([package_name])[package_name]
         elif self.package_manager == 'apt':
-            success, output = self._run_command(['apt', 'show', package_name])
-            if success:
-                return True, output
-            return False, output
+            return self.get_packages_details([package_name])[package_name]
         elif self.package_manager == 'dnf' or self.package_manager == 'yum':
             success, output = self._run_command([self.package_manager, 'info', package_name])
             if success:
@@ -128,23 +286,17 @@ class PackageHandler:
     # دالة جديدة لعرض الحزم المثبتة
     def list_installed_packages(self):
         if self.package_manager == 'pacman' and self.pacman_handler:
-            # PacmanAURManager.list_installed_packages() تعيد قائمة من القواميس
+            # PacmanAURManager.list_installed_packages() تعيد سجلات LocalPackage من قاعدة البيانات المحلية
             installed_packages_data = self.pacman_handler.list_installed_packages()
             if installed_packages_data:
-                package_names = [pkg['name'] for pkg in installed_packages_data if 'name' in pkg]
+                package_names = [pkg.name for pkg in installed_packages_data]
                 return True, package_names
             return False, "Failed to retrieve installed packages from PacmanAURManager."
         elif self.package_manager == 'apt':
-            success, output = self._run_command(['apt', 'list', '--installed'])
-            if success:
-                packages = []
-                for line in output.split('\n'):
-                    if line.startswith('Listing...'): continue
-                    if '/' in line:
-                        pkg_name = line.split('/')[0].strip()
-                        packages.append(pkg_name)
-                return True, packages if packages else ["No installed packages found."]
-            return False, output
+            if not self.dpkg_db.is_available():
+                return False, f"dpkg status file not found at {self.dpkg_db.status_path}"
+            packages = self.dpkg_db.list_names()
+            return True, packages if packages else ["No installed packages found."]
         elif self.package_manager == 'dnf' or self.package_manager == 'yum':
             success, output = self._run_command([self.package_manager, 'list', 'installed'])
             if success:
@@ -172,9 +324,9 @@ class PackageHandler:
         else:
             return False, "No supported package manager detected."
 
-    def install_package(self, package_name):
+    def install_package(self, package_name, output_callback=None, progress_callback=None):
         if self.package_manager == 'pacman' and self.pacman_handler:
-            return_message = self.pacman_handler.install_package(package_name)
+            return_message = self.pacman_handler.install_package(package_name, output_callback, progress_callback)
             if "Error" in return_message:
                 return False, return_message
             return True, return_message
@@ -182,9 +334,9 @@ class PackageHandler:
             return False, "Install not implemented for Winget yet."
         return False, "No supported package manager detected or functionality not implemented."
 
-    def remove_package(self, package_name):
+    def remove_package(self, package_name, output_callback=None, progress_callback=None):
         if self.package_manager == 'pacman' and self.pacman_handler:
-            return_message = self.pacman_handler.remove_package(package_name)
+            return_message = self.pacman_handler.remove_package(package_name, output_callback, progress_callback)
             if "Error" in return_message:
                 return False, return_message
             return True, return_message
@@ -192,9 +344,262 @@ class PackageHandler:
             return False, "Remove not implemented for Winget yet."
         return False, "No supported package manager detected or functionality not implemented."
 
-    def update_system(self):
+    def run_transaction(self, install=(), remove=(), mark_as_deps=(), output_callback=None, progress_callback=None):
+        """
+        تنفيذ معاملة مجمعة (تثبيت، حذف، وسم كتبعيات) لعدة حزم في استدعاء مميز واحد.
+        Runs a batched transaction (install, remove, mark as deps) for many packages in one
+        privileged call.
+
+        تعيد (نجاح، قاموس) حيث يحتوي القاموس على output و packages و summary.
+        Returns (success, dict) where the dict holds output, packages and summary.
+        """
         if self.package_manager == 'pacman' and self.pacman_handler:
-            return_message = self.pacman_handler.update_system()
+            output, results = self.pacman_handler.run_transaction(
+                install, remove, mark_as_deps, output_callback, progress_callback)
+            failed = [name for name, (ok, _) in results.items() if not ok]
+            summary_lines = [f"{name}: {status}" for name, (_, status) in results.items()]
+            summary = "\n".join(summary_lines)
+            if output.startswith("Error:"):
+                summary = f"{summary}\n\n{output}" if summary else output
+            success = not output.startswith("Error:") and not failed
+            return success, {"output": output, "packages": results, "summary": summary}
+        elif self.package_manager == 'winget':
+            return False, {"output": "", "packages": {}, "summary": "Transactions not implemented for Winget yet."}
+        return False, {"output": "", "packages": {},
+                       "summary": "No supported package manager detected or functionality not implemented."}
+
+    def install_packages(self, package_names, output_callback=None, progress_callback=None):
+        success, result = self.run_transaction(install=package_names, output_callback=output_callback,
+                                               progress_callback=progress_callback)
+        return success, result["summary"]
+
+    def remove_packages(self, package_names, output_callback=None, progress_callback=None):
+        success, result = self.run_transaction(remove=package_names, output_callback=output_callback,
+                                               progress_callback=progress_callback)
+        return success, result["summary"]
+
+    def _dependency_graph(self):
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return None
+        graph = self.pacman_handler.dependency_graph
+        graph.refresh()
+        return graph
+
+    def preview_removal(self, package_names):
+        """
+        معاينة ما سيحذفه remove_packages (pacman -Rns) والمساحة التي سيحررها، بدون تشغيل pacman.
+        Previews what remove_packages (pacman -Rns) would remove and the space it would free,
+        without running pacman.
+        """
+        graph = self._dependency_graph()
+        if graph is None:
+            return False, "Removal preview is only supported with pacman."
+        return True, graph.removal_closure(package_names)
+
+    def find_orphans(self):
+        """
+        الحزم اليتيمة (مثبتة كتبعيات ولم تعد مطلوبة) مع أحجامها، كقائمة (الاسم، الإصدار، الحجم).
+        Orphan packages (installed as dependencies and no longer needed) with their sizes,
+        as a list of (name, version, size).
+        """
+        graph = self._dependency_graph()
+        if graph is None:
+            return False, "Orphan detection is only supported with pacman."
+        packages = self.pacman_handler.local_db.packages()
+        return True, [(name, packages[name].version, packages[name].size) for name in graph.orphans()]
+
+    def preview_orphan_removal(self):
+        """
+        الحزم اليتيمة (انظر find_orphans) مع المساحة التي سيحررها حذفها بـ pacman -Rns.
+        تعيد (نجاح، (قائمة اليتيمة، الحجم المحرر)).
+        Orphan packages (see find_orphans) with the space removing them with pacman -Rns would
+        free. Returns (success, (orphan list, freed size)).
+        """
+        success, orphans = self.find_orphans()
+        if not success:
+            return False, orphans
+        success, preview = self.preview_removal([name for name, _, _ in orphans])
+        freed = preview["size"] if success else sum(size for _, _, size in orphans)
+        return True, (orphans, freed)
+
+    def why_installed(self, package_name):
+        """
+        سلاسل التبعيات التي تربط حزماً مثبتة صراحةً بهذه الحزمة.
+        The dependency chains linking explicitly installed packages to this one.
+        """
+        graph = self._dependency_graph()
+        if graph is None:
+            return False, "Dependency information is only supported with pacman."
+        return True, graph.why_installed(package_name)
+
+    def _file_ownership_index(self):
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return None
+        if self.file_index is None:
+            self.file_index = FileOwnershipIndex(self.pacman_handler.config.local_db_path)
+        # تُعاد قراءة قوائم الملفات للحزم التي تغيرت فقط
+        # Only the files lists of packages that changed are re-read
+        self.file_index.refresh()
+        return self.file_index
+
+    def find_file_owner(self, path):
+        """
+        الحزمة التي تملك الملف (مثل pacman -Qo) من فهرس الملكية بدلاً من فحص كل قوائم الملفات.
+        The package owning a file (like pacman -Qo), from the ownership index instead of
+        scanning every files list.
+        """
+        index = self._file_ownership_index()
+        if index is None:
+            return False, "File ownership lookup is only supported with pacman."
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.lexists(path):
+            return False, f"Failed to find '{path}': No such file or directory"
+        owners = index.owners(path)
+        if not owners:
+            return False, f"No package owns {path}"
+        packages = self.pacman_handler.local_db.packages()
+        return True, "\n".join(
+            f"{path} is owned by {name} {packages[name].version if name in packages else ''}".rstrip()
+            for name in owners
+        )
+
+    def find_unowned_files(self, directory):
+        """
+        الملفات والمجلدات تحت directory التي لا تملكها أي حزمة مثبتة.
+        Files and directories under directory that no installed package owns.
+        """
+        index = self._file_ownership_index()
+        if index is None:
+            return False, "File ownership lookup is only supported with pacman."
+        if not os.path.isdir(directory):
+            return False, f"'{directory}' is not a directory."
+        return True, index.unowned_files(directory)
+
+    def get_disk_usage(self, top_limit=None, include_removal_size=True):
+        """
+        استخدام القرص حسب الحزمة والمستودع والمجموعة من قاعدة البيانات المحلية (انظر disk_usage_summary).
+        Disk usage per package, repository and group from the local database (see disk_usage_summary).
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Disk usage is only supported with pacman."
+        local_db = self.pacman_handler.local_db
+        if not local_db.is_available():
+            return False, f"pacman local database not found at {local_db.db_path}"
+        graph = self._dependency_graph() if include_removal_size else None
+        return True, disk_usage_summary(local_db, self.pacman_handler.sync_db, graph, top_limit)
+
+    def get_cache_cleanup_plan(self, keep_versions=3, uninstalled_only=False):
+        """
+        معاينة تنظيف ذاكرة الحزم المؤقتة (انظر PackageCache.cleanup_plan) بدون حذف أي شيء.
+        Previews a package cache cleanup (see PackageCache.cleanup_plan) without deleting anything.
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Package cache management is only supported with pacman."
+        try:
+            return True, self.pacman_handler.package_cache.cleanup_plan(keep_versions, uninstalled_only)
+        except Exception as e:
+            return False, f"Error scanning the package cache: {e}"
+
+    def clean_package_cache(self, archives, output_callback=None, progress_callback=None):
+        """
+        حذف الأرشيفات المختارة من خطة التنظيف تحت مصادقة واحدة.
+        Deletes the archives chosen from a cleanup plan under a single authorization.
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Package cache management is only supported with pacman."
+        success, message = self.pacman_handler.delete_cache_archives(archives, output_callback)
+        if success:
+            freed = sum(archive.size for archive in archives)
+            message = f"{message} Freed {format_size(freed)}."
+        return success, message
+
+    def package_cache_dirs(self):
+        """
+        مجلدات ذاكرة الحزم المؤقتة المراد مراقبتها (فارغة إذا لم يكن pacman).
+        The package cache directories to watch (empty unless pacman is used).
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return []
+        return self.pacman_handler.package_cache.cache_dirs
+
+    def refresh_package_cache(self):
+        """
+        إعادة فهرسة الأرشيفات المخزنة (للملفات الجديدة فقط) وقاعدة البيانات المحلية التي تعتمد عليها
+        get_downgrade_candidates. تعيد (نجاح، هل تغير شيء).
+        Re-indexes the cached archives (new files only) and the local database that
+        get_downgrade_candidates relies on. Returns (success, whether anything changed).
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Package cache management is only supported with pacman."
+        try:
+            local_changed = self.pacman_handler.local_db.refresh()
+            return True, self.pacman_handler.package_cache.refresh() or local_changed
+        except Exception as e:
+            return False, f"Error scanning the package cache: {e}"
+
+    def get_downgrade_candidates(self, package_name):
+        """
+        الإصدارات المخزنة من حزمة مثبتة غير الإصدار الحالي (الأحدث أولاً)، من الفهرس بدون وصول للقرص.
+        Cached versions of an installed package other than the current one (newest first),
+        read from the index without touching the disk. Both indexes are kept current by
+        refresh_package_cache, so this is safe to call from the GUI thread.
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return []
+        installed = self.pacman_handler.local_db.cached(package_name)
+        if installed is None:
+            return []
+        return [archive for archive in self.pacman_handler.package_cache.cached_versions(package_name)
+                if archive.version != installed.version]
+
+    def downgrade_package(self, archive, output_callback=None, progress_callback=None):
+        """
+        تثبيت إصدار مخزن من الحزمة (pacman -U للأرشيف المختار).
+        Installs a cached version of the package (pacman -U of the chosen archive).
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Installing cached versions is only supported with pacman."
+        archive_path = os.path.join(archive.directory, archive.filename)
+        return_message = self.pacman_handler.install_archive(archive_path, output_callback, progress_callback)
+        if "Error" in return_message:
+            return False, return_message
+        return True, f"Installed {archive.name} {archive.version} from the package cache."
+
+    def rank_mirrors(self, progress_callback=None):
+        """
+        قياس وترتيب مرشحي mirrorlist (انظر MirrorRanker.candidates). تعيد (نجاح، قائمة MirrorResult).
+        Probes and ranks the mirrorlist candidates (see MirrorRanker.candidates).
+        Returns (success, list of MirrorResult).
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Mirror ranking is only supported with pacman."
+        ranker = MirrorRanker()
+        try:
+            servers = ranker.candidates()
+        except OSError as e:
+            return False, f"Could not read the mirrorlist: {e}"
+        if not servers:
+            return False, f"No Server lines found in {ranker.mirrorlist_path}."
+        return True, ranker.rank(servers, progress_callback)
+
+    def save_mirror_ranking(self, results, enabled_count=None, output_callback=None):
+        """
+        حفظ ترتيب المرايا في mirrorlist عبر المسار المميز.
+        Saves the mirror ranking to the mirrorlist through the privileged path.
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Mirror ranking is only supported with pacman."
+        ranker = MirrorRanker()
+        try:
+            servers = [url for url, _ in read_mirrorlist(ranker.mirrorlist_path)]
+        except OSError as e:
+            return False, f"Could not read the mirrorlist: {e}"
+        content = MirrorRanker.render_mirrorlist(results, enabled_count, unranked=servers)
+        return self.pacman_handler.write_mirrorlist(content, output_callback)
+
+    def update_system(self, output_callback=None, progress_callback=None):
+        if self.package_manager == 'pacman' and self.pacman_handler:
+            return_message = self.pacman_handler.update_system(output_callback, progress_callback)
             if "Error" in return_message:
                 return False, return_message
             return True, return_message
@@ -202,6 +607,106 @@ class PackageHandler:
             return False, "System update not implemented for Winget yet."
         return False, "No supported package manager detected or functionality not implemented."
 
+    def get_cached_update_status(self):
+        """
+        آخر نتيجة محفوظة لفحص التحديثات (أو None)، بدون أي عمل إضافي.
+        The last saved update-check result (or None), without doing any work.
+        """
+        if self.update_checker is None:
+            return None
+        return self.update_checker.cached_status()
+
+    def check_for_updates(self, sync_interval_seconds=0):
+        """
+        فحص التحديثات المتاحة. تتم المزامنة فقط إذا مرت مدة sync_interval_seconds منذ آخر مزامنة.
+        Checks for available updates. Syncs only if sync_interval_seconds passed since the last sync.
+        """
+        if self.update_checker is None:
+            return False, "Update checking is only supported with pacman."
+        if self.update_checker.needs_sync(sync_interval_seconds):
+            success, message = self.update_checker.sync()
+            if not success:
+                return False, message
+        status = dict(self.update_checker.status())
+        status["aur"] = self.check_aur_updates()
+        return True, status
+
+    def foreign_packages(self):
+        """
+        الحزم المثبتة غير الموجودة في أي مستودع مُعرّف (عادة من AUR): قاموس الاسم -> الإصدار.
+        Installed packages missing from every configured repository (usually from the AUR):
+        dict of name -> version.
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return {}
+        sync_db = self.pacman_handler.sync_db
+        if not sync_db.is_available():
+            return {}
+        available = sync_db.packages()
+        return {name: pkg.version for name, pkg in self.pacman_handler.local_db.packages().items()
+                if name not in available}
+
+    def check_aur_updates(self):
+        """
+        فحص تحديثات الحزم الأجنبية في AUR بطلبات مجمعة. تعيد قاموساً: updates، not_found، error.
+        Checks the foreign packages for AUR updates using batched requests. Returns a dict:
+        updates, not_found, error.
+        """
+        result = {"updates": [], "not_found": [], "error": None}
+        if self.aur_client is None or not self.aur_client.is_available():
+            result["error"] = "AUR support requires python-requests."
+            return result
+        foreign = self.foreign_packages()
+        if not foreign:
+            return result
+        try:
+            result["updates"], result["not_found"] = self.aur_client.check_updates(foreign)
+        except AURError as e:
+            result["error"] = str(e)
+        return result
+
+    def open_package_history(self):
+        """
+        فتح سجل pacman.log كفهرس قابل للتصفية (PacmanLog) بدلاً من قراءته كنص كامل.
+        للأنظمة الأخرى تعيد نص السجل كما في get_package_history.
+        Opens pacman.log as a filterable index (PacmanLog) instead of reading it as one string.
+        Other systems get the log text as returned by get_package_history.
+        """
+        if self.package_manager == 'pacman' and self.pacman_handler:
+            log_path = self.pacman_handler.config.log_file
+            if self.pacman_log is None:
+                # يُحفظ المؤشر والفهرس حتى تُحلل المرات التالية الأسطر الجديدة فقط
+                # The cursor and index are persisted so later opens only parse new lines
+                self.pacman_log = PacmanLog(log_path, os.path.join(SystemUtils.get_cache_dir(), "pacman_log_index"))
+            try:
+                self.pacman_log.open()
+                return True, self.pacman_log
+            except FileNotFoundError:
+                return False, f"pacman log file not found at {log_path}"
+            except PermissionError:
+                return False, f"Permission denied to read '{log_path}'. Run the application as root/administrator."
+            except Exception as e:
+                return False, f"Error reading '{log_path}': {e}"
+        return self.get_package_history()
+
+    def get_package_activity(self, top_limit=20):
+        """
+        إحصائيات نشاط الحزم من سجل pacman: العمليات لكل يوم، أكثر الحزم ترقية ومدة جلسات الترقية.
+        Package-activity statistics from the pacman log: operations per day, most upgraded
+        packages and upgrade-session durations.
+        """
+        if self.package_manager != 'pacman' or not self.pacman_handler:
+            return False, "Package activity statistics are only supported with pacman."
+        success, pacman_log = self.open_package_history()
+        if not success:
+            return False, pacman_log
+        if self.package_activity is None:
+            self.package_activity = PackageActivity(pacman_log)
+        try:
+            return True, self.package_activity.summary(top_limit)
+        except Exception as e:
+            return False, f"Error analyzing the pacman log: {e}"
+
     def get_package_history(self):
         if self.package_manager == 'pacman' and self.pacman_handler:
             log_path = '/var/log/pacman.log'
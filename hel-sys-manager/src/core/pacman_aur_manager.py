@@ -1,6 +1,23 @@
 import subprocess
 import os
+import re
 import sys
+import shlex
+import tempfile
+
+from .pacman_conf import PacmanConfig
+from .pacman_local_db import PacmanLocalDB, LocalPackage, package_info_dict, REASON_DEPEND
+from .pacman_sync_db import PacmanSyncDB, sync_info_dict
+from .process_stream import stream_process, PacmanProgressParser, STDOUT
+from .dependency_graph import DependencyGraph, dependency_name
+from .package_cache import PackageCache
+from .mirror_ranker import DEFAULT_MIRRORLIST
+
+# سطر يطبعه shell المعاملة بعد نجاح كل خطوة (ما عدا الأخيرة) لمعرفة أين توقفت سلسلة &&
+# Line the transaction shell prints after each successful step (except the last) to know
+# where the && chain stopped
+_STEP_DONE = "Transaction step {} of {} finished."
+_STEP_DONE_RE = re.compile(r"^Transaction step (\d+) of \d+ finished\.$")
 
 class PacmanAURManager:
     """
@@ -8,11 +25,25 @@ class PacmanAURManager:
     Class for managing Arch Linux packages using pacman (and potentially AUR later).
     """
 
+    PACMAN_FULL_PATH = "/usr/bin/pacman"
+
+    # قراء مشتركون لقواعد البيانات المحلية والمستودعات مع ذاكرة مؤقتة
+    # Shared, cached readers for the local and repository databases
+    config = PacmanConfig()
+    local_db = PacmanLocalDB(config.local_db_path)
+    sync_db = PacmanSyncDB(config)
+    dependency_graph = DependencyGraph(local_db)
+    package_cache = PackageCache(config, local_db)
+
     @staticmethod
-    def _run_privileged_command(full_command_with_args):
+    def _run_privileged_command(full_command_with_args, output_callback=None, progress_callback=None):
         """
         دالة مساعدة لتشغيل الأوامر بصلاحيات الجذر باستخدام pkexec.
         تستقبل الأمر كاملاً مع وسائطه.
+        output_callback(line) يُستدعى لكل سطر مخرجات، و progress_callback(event)
+        لكل حدث تقدم من pacman (انظر PacmanProgressParser).
+        output_callback(line) is called for every output line and progress_callback(event)
+        for every pacman progress event (see PacmanProgressParser).
         """
         pkexec_path = "/usr/bin/pkexec"
         
@@ -48,47 +79,30 @@ class PacmanAURManager:
         try:
             print(f"Executing privileged command via {chosen_auth_command}: {' '.join(command)}") 
             
-            # التعديل هنا: استخدام Popen ومراقبة الـ stdout و stderr بشكل مباشر
-            # هذا يمنحنا تحكمًا أفضل في التقاط المخرجات، خاصة مع البرامج التي تطلب مصادقة
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1 # لتلقي الـ output أولاً بأول
-            )
-            
-            stdout_output = []
-            stderr_output = []
-
-            # قراءة الـ output في الوقت الفعلي
-            # يمكن تعديل هذه الحلقة لعرض الـ output في الواجهة الرسومية أيضاً
-            while True:
-                line_stdout = process.stdout.readline()
-                line_stderr = process.stderr.readline()
-
-                if line_stdout:
-                    stdout_output.append(line_stdout.strip())
-                    print("Privileged command stdout:", line_stdout.strip())
-                if line_stderr:
-                    stderr_output.append(line_stderr.strip())
-                    print("Privileged command stderr:", line_stderr.strip())
-
-                if not line_stdout and not line_stderr and process.poll() is not None:
-                    break
-
-            # الانتظار حتى تنتهي العملية تماماً
-            process.wait()
-            
-            if process.returncode != 0:
+            progress_parser = PacmanProgressParser()
+
+            # قراءة stdout و stderr معاً عبر selectors حتى لا يحجب أحدهما الآخر
+            # Read stdout and stderr together through selectors so neither blocks the other
+            def on_line(stream, line):
+                print(f"Privileged command {stream}:", line)
+                if output_callback is not None:
+                    output_callback(line)
+                if stream == STDOUT and progress_callback is not None:
+                    event = progress_parser.parse(line)
+                    if event is not None:
+                        progress_callback(event)
+
+            result = stream_process(command, on_line)
+
+            if result.returncode != 0:
                 raise subprocess.CalledProcessError(
-                    returncode=process.returncode,
+                    returncode=result.returncode,
                     cmd=command,
-                    output="".join(stdout_output),
-                    stderr="".join(stderr_output)
+                    output=result.stdout,
+                    stderr=result.stderr
                 )
             
-            return "\n".join(stdout_output)
+            return result.stdout
         except subprocess.CalledProcessError as e:
             error_message = f"Error running privileged command: {e}\n"
             error_message += f"Command: {' '.join(command)}\n"
@@ -113,18 +127,15 @@ class PacmanAURManager:
             return f"Error: Authentication command '{command[0]}' or '/usr/bin/pacman' not found. Please ensure pkexec (or gksu/kdesu) and pacman are installed."
 
     @staticmethod
-    def _run_pacman_command(command_args, requires_sudo=False):
+    def _run_pacman_command(command_args, requires_sudo=False, output_callback=None, progress_callback=None):
         """
         دالة مساعدة لتشغيل أوامر pacman.
         تستخدم _run_privileged_command إذا كانت صلاحيات الجذر مطلوبة.
         """
-        # المسار الكامل لأمر pacman
-        PACMAN_FULL_PATH = "/usr/bin/pacman" 
-
         if requires_sudo:
             # هنا نرسل المسار الكامل لـ pacman كأول عنصر، ثم باقي الـ arguments من command_args
-            full_command = [PACMAN_FULL_PATH] + command_args 
-            return PacmanAURManager._run_privileged_command(full_command)
+            full_command = [PacmanAURManager.PACMAN_FULL_PATH] + command_args 
+            return PacmanAURManager._run_privileged_command(full_command, output_callback, progress_callback)
         else:
             try:
                 result = subprocess.run(
@@ -147,22 +158,42 @@ class PacmanAURManager:
     @staticmethod
     def list_installed_packages():
         """
-        جلب قائمة بجميع الحزم المثبتة.
-        لا تحتاج صلاحيات الجذر.
+        جلب قائمة بجميع الحزم المثبتة كسجلات LocalPackage.
+        لا تحتاج صلاحيات الجذر، وتقرأ قاعدة البيانات المحلية مباشرة.
+        Returns all installed packages as LocalPackage records, read directly from the local database.
         """
-        output = PacmanAURManager._run_pacman_command(["-Qq"])
+        if PacmanAURManager.local_db.is_available():
+            packages = PacmanAURManager.local_db.packages()
+            return [packages[name] for name in sorted(packages)]
+
+        # احتياطي في حال عدم توفر قاعدة البيانات المحلية (مسار DBPath غير افتراضي مثلاً)
+        # Fallback when the local database is not available (e.g. a non-default DBPath)
+        output = PacmanAURManager._run_pacman_command(["-Q"])
         if output.startswith("Error:"):
             return []
-        return output.split('\n')
+        packages = []
+        for line in output.split('\n'):
+            parts = line.split()
+            if len(parts) == 2:
+                packages.append(LocalPackage(name=parts[0], version=parts[1]))
+        return packages
 
     @staticmethod
     def search_packages(query):
         """
-        البحث عن حزم في المستودعات الرسمية.
-        لا تحتاج صلاحيات الجذر.
+        البحث عن حزم في كل المستودعات المفعلة في pacman.conf.
+        لا تحتاج صلاحيات الجذر، وتستخدم فهرس قواعد بيانات المستودعات في الذاكرة.
+        Searches every repository enabled in pacman.conf using the in-memory sync database index.
         """
         if not query:
             return []
+        if PacmanAURManager.sync_db.is_available():
+            return [
+                {"repo": pkg.repo, "name": pkg.name, "version": pkg.version, "description": pkg.description,
+                 "size": pkg.isize}
+                for pkg in PacmanAURManager.sync_db.search(query)
+            ]
+
         output = PacmanAURManager._run_pacman_command(["-Ss", "--color=never", query])
         if output.startswith("Error:"):
             return []
@@ -170,68 +201,326 @@ class PacmanAURManager:
         packages = []
         current_package = {}
         for line in output.split('\n'):
-            line = line.strip()
-            if not line:
+            if not line.strip():
                 continue
 
-            if line.startswith("community/") or line.startswith("core/") or \
-               line.startswith("extra/") or line.startswith("multilib/"):
+            # سطر العنوان لا يبدأ بمسافة: repo/name version [groups] [installed]
+            # The header line is not indented: repo/name version [groups] [installed]
+            if not line[0].isspace() and '/' in line:
                 if current_package:
                     packages.append(current_package)
-                parts = line.split('/')
-                repo_name = parts[0]
-                pkg_info = parts[1].split(' ', 1)
+                repo_name, rest = line.split('/', 1)
+                pkg_info = rest.split(' ', 2)
                 pkg_name = pkg_info[0]
-                pkg_version = pkg_info[1].strip('()') if len(pkg_info) > 1 else ""
+                pkg_version = pkg_info[1] if len(pkg_info) > 1 else ""
 
                 current_package = {"repo": repo_name, "name": pkg_name, "version": pkg_version}
                 current_package["description"] = ""
-            elif line.startswith("Description:"):
-                current_package["description"] = line.replace("Description:", "").strip()
+            elif current_package:
+                current_package["description"] = line.strip()
 
         if current_package:
             packages.append(current_package)
         return packages
 
+    @staticmethod
+    def _parse_info_output(output):
+        """
+        تحليل مخرجات pacman -Si/-Qi لعدة حزم (مفصولة بأسطر فارغة) إلى قاموس الاسم -> المعلومات.
+        Parses pacman -Si/-Qi output for several packages (blank-line separated) into name -> info.
+        """
+        results = {}
+        for block in output.split('\n\n'):
+            info = {}
+            for line in block.split('\n'):
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    info[key.strip()] = value.strip()
+            if "Name" in info:
+                results.setdefault(info["Name"], info)
+        return results
+
+    @staticmethod
+    def _run_pacman_info_query(flag, package_names):
+        """
+        تشغيل pacman -Si أو -Qi مرة واحدة لعدة حزم. لا تتوقف عند عدم وجود بعض الحزم.
+        Runs pacman -Si or -Qi once for several packages; missing packages do not discard the rest.
+        """
+        try:
+            result = subprocess.run(
+                ["pacman", flag, "--color=never"] + list(package_names),
+                capture_output=True,
+                text=True,
+                check=False,
+                shell=False
+            )
+        except FileNotFoundError:
+            return {}
+        return PacmanAURManager._parse_info_output(result.stdout)
+
+    @staticmethod
+    def get_packages_info(package_names):
+        """
+        جلب معلومات عدة حزم دفعة واحدة.
+        تُقرأ من قواعد البيانات المحلية والمستودعات مباشرة، وما تبقى يُجلب باستدعاء
+        واحد لـ pacman -Si ثم -Qi بدلاً من عملية لكل حزمة.
+        Fetches info for several packages at once. Records come from the local and sync
+        databases directly; anything left is fetched with a single pacman -Si (then -Qi)
+        call instead of one process per package.
+        """
+        results = {}
+        remaining = []
+        local_available = PacmanAURManager.local_db.is_available()
+        sync_available = PacmanAURManager.sync_db.is_available()
+        graph = PacmanAURManager.dependency_graph
+        if local_available:
+            graph.refresh()
+        for name in package_names:
+            installed = PacmanAURManager.local_db.get(name) if local_available else None
+            if installed is not None:
+                info = package_info_dict(installed, graph.required_by(name), graph.optional_for(name))
+                if installed.reason == REASON_DEPEND:
+                    # سلاسل التبعيات من حزم مثبتة صراحةً وصولاً إلى هذه الحزمة
+                    # Dependency chains from explicitly installed packages down to this one
+                    paths = graph.why_installed(name, limit=3)
+                    info["Installed For"] = "\n                  ".join(" -> ".join(path) for path in paths) or "None"
+                results[name] = info
+                continue
+            available = PacmanAURManager.sync_db.get(name) if sync_available else None
+            if available is not None:
+                results[name] = sync_info_dict(available)
+                continue
+            remaining.append(name)
+
+        for flag in ("-Si", "-Qi"):
+            if not remaining:
+                break
+            found = PacmanAURManager._run_pacman_info_query(flag, remaining)
+            results.update(found)
+            remaining = [name for name in remaining if name not in found]
+
+        for name in remaining:
+            results[name] = {"Error": "Package not found or not installed."}
+        return results
+
     @staticmethod
     def get_package_info(package_name):
         """
         جلب معلومات مفصلة عن حزمة معينة.
         لا تحتاج صلاحيات الجذر.
+        الحزم المثبتة تُقرأ من قاعدة البيانات المحلية مباشرة دون تشغيل pacman.
+        Installed packages are read from the local database directly without running pacman.
         """
-        output = PacmanAURManager._run_pacman_command(["-Si", package_name])
-        if output.startswith("Error:"):
-            output_installed = PacmanAURManager._run_pacman_command(["-Qi", package_name])
-            if output_installed.startswith("Error:"):
-                return {"Error": "Package not found or not installed."}
-            output = output_installed
-
-        info = {}
-        for line in output.split('\n'):
-            if ":" in line:
-                key, value = line.split(":", 1)
-                info[key.strip()] = value.strip()
-        return info
+        return PacmanAURManager.get_packages_info([package_name])[package_name]
 
     @staticmethod
-    def install_package(package_name):
+    def install_package(package_name, output_callback=None, progress_callback=None):
         """
         تثبيت حزمة معينة. تتطلب صلاحيات الجذر.
         """
-        return PacmanAURManager._run_pacman_command(["-S", "--noconfirm", package_name], requires_sudo=True)
+        return PacmanAURManager._run_pacman_command(["-S", "--noconfirm", package_name], requires_sudo=True,
+                                                    output_callback=output_callback,
+                                                    progress_callback=progress_callback)
 
     @staticmethod
-    def remove_package(package_name):
+    def install_archive(archive_path, output_callback=None, progress_callback=None):
+        """
+        تثبيت أرشيف حزمة محلي (pacman -U)، مثلاً للرجوع لإصدار مخزن. تتطلب صلاحيات الجذر.
+        Installs a local package archive (pacman -U), e.g. to downgrade to a cached version.
+        Requires root privileges.
+        """
+        return PacmanAURManager._run_pacman_command(["-U", "--noconfirm", archive_path], requires_sudo=True,
+                                                    output_callback=output_callback,
+                                                    progress_callback=progress_callback)
+
+    @staticmethod
+    def remove_package(package_name, output_callback=None, progress_callback=None):
         """
         حذف حزمة معينة. تتطلب صلاحيات الجذر.
         """
         # -Rns: حذف الحزمة مع التبعيات غير المستخدمة والملفات الإعدادية
-        return PacmanAURManager._run_pacman_command(["-Rns", "--noconfirm", package_name], requires_sudo=True)
+        return PacmanAURManager._run_pacman_command(["-Rns", "--noconfirm", package_name], requires_sudo=True,
+                                                    output_callback=output_callback,
+                                                    progress_callback=progress_callback)
 
     @staticmethod
-    def update_system():
+    def update_system(output_callback=None, progress_callback=None):
         """
         تحديث النظام بالكامل. تتطلب صلاحيات الجذر.
         """
         # هنا أمر pacman الفعلي (بدون كلمة 'pacman' نفسها)
-        return PacmanAURManager._run_pacman_command(["-Syu", "--noconfirm"], requires_sudo=True)
+        return PacmanAURManager._run_pacman_command(["-Syu", "--noconfirm"], requires_sudo=True,
+                                                    output_callback=output_callback,
+                                                    progress_callback=progress_callback)
+
+    @staticmethod
+    def build_transaction_commands(install=(), remove=(), mark_as_deps=()):
+        """
+        بناء أوامر pacman لمعاملة واحدة: حذف، ثم تثبيت، ثم وسم كتبعيات.
+        Builds the pacman commands of one transaction: remove, then install, then mark as deps.
+        """
+        pacman = PacmanAURManager.PACMAN_FULL_PATH
+        commands = []
+        if remove:
+            commands.append([pacman, "-Rns", "--noconfirm"] + list(remove))
+        if install:
+            commands.append([pacman, "-S", "--noconfirm", "--needed"] + list(install))
+        if mark_as_deps:
+            commands.append([pacman, "-D", "--asdeps"] + list(mark_as_deps))
+        return commands
+
+    @staticmethod
+    def resolve_install_targets(names):
+        """
+        تحويل أهداف التثبيت إلى الحزم التي سيثبتها pacman -S --noconfirm فعلاً: الحزمة نفسها،
+        أو كل أعضاء المجموعة، أو أول مزود حسب ترتيب المستودعات.
+        Resolves install targets to the packages pacman -S --noconfirm actually installs: the
+        package itself, every member of a group, or the first provider in repository order.
+
+        تعيد قاموس الهدف -> صف أسماء الحزم (الهدف نفسه إذا لم يُعرف في المستودعات).
+        Returns a dict of target -> tuple of package names (the target itself if the
+        repositories do not know it).
+        """
+        sync_db = PacmanAURManager.sync_db
+        available = sync_db.packages() if sync_db.is_available() else {}
+        resolved = {}
+        for target in names:
+            name = dependency_name(target.rpartition('/')[2])
+            if name in available:
+                resolved[target] = (name,)
+                continue
+            members = tuple(pkg.name for pkg in available.values() if name in pkg.groups)
+            if members:
+                resolved[target] = members
+                continue
+            providers = [pkg.name for pkg in available.values()
+                         if any(dependency_name(provided) == name for provided in pkg.provides)]
+            resolved[target] = tuple(providers[:1]) or (name,)
+        return resolved
+
+    @staticmethod
+    def _transaction_results(steps, completed, targets):
+        """
+        نتيجة كل حزمة بعد المعاملة. steps هي قائمة (العملية، الأسماء) بترتيب الأوامر، و completed
+        عدد الخطوات التي نجحت. الخطوة التي فشلت تُفحص في قاعدة البيانات المحلية، والخطوات التي
+        بعدها لم تُنفذ فتُعد فاشلة.
+        Each package's outcome after the transaction. steps is a list of (operation, names) in
+        command order and completed is how many steps succeeded. The step that failed is
+        checked against the local database; the steps after it never ran, so they count as
+        failed.
+        """
+        installed = PacmanAURManager.local_db.packages()
+        results = {}
+        for number, (operation, names) in enumerate(steps):
+            for name in names:
+                if number > completed:
+                    results[name] = (False, "not run (an earlier step failed)")
+                elif operation == "remove":
+                    ok = name not in installed
+                    results[name] = (ok, "removed" if ok else "still installed")
+                elif operation == "install":
+                    packages = targets.get(name, (name,))
+                    ok = all(package in installed for package in packages)
+                    status = "installed" if ok else "not installed"
+                    if packages != (name,):
+                        status = f"{status} ({', '.join(packages)})"
+                    results[name] = (ok, status)
+                else:
+                    pkg = installed.get(name)
+                    ok = pkg is not None and pkg.reason == REASON_DEPEND
+                    results[name] = (ok, "marked as dependency" if ok else "not marked")
+        return results
+
+    @staticmethod
+    def run_transaction(install=(), remove=(), mark_as_deps=(), output_callback=None, progress_callback=None):
+        """
+        تنفيذ عدة عمليات على عدة حزم تحت مصادقة واحدة.
+        Runs several operations on several packages under a single authorization.
+
+        كل عملية هي استدعاء pacman واحد لكل الحزم؛ وإذا اجتمعت عدة عمليات تُربط بـ &&
+        داخل shell واحد مميز حتى تظهر نافذة المصادقة مرة واحدة فقط.
+        Each operation is one pacman call for all its packages; several operations are chained
+        with && inside one privileged shell so the authentication prompt appears only once.
+
+        تعيد (المخرجات، قاموس الاسم -> (نجاح، الحالة)).
+        Returns (output, dict of name -> (success, status)).
+        """
+        commands = PacmanAURManager.build_transaction_commands(install, remove, mark_as_deps)
+        if not commands:
+            return "Error: No packages were given for the transaction.", {}
+        # بنفس ترتيب build_transaction_commands
+        # In the same order as build_transaction_commands
+        steps = [(operation, names) for operation, names in
+                 (("remove", remove), ("install", install), ("mark_as_deps", mark_as_deps)) if names]
+        targets = PacmanAURManager.resolve_install_targets(install)
+
+        if len(commands) == 1:
+            full_command = commands[0]
+        else:
+            script = []
+            for number, command in enumerate(commands, 1):
+                script.append(shlex.join(command))
+                if number < len(commands):
+                    script.append(shlex.join(["echo", _STEP_DONE.format(number, len(commands))]))
+            full_command = ["/bin/sh", "-c", " && ".join(script)]
+
+        finished_steps = []
+
+        def on_output(line):
+            match = _STEP_DONE_RE.match(line)
+            if match:
+                finished_steps.append(int(match.group(1)))
+            if output_callback is not None:
+                output_callback(line)
+
+        output = PacmanAURManager._run_privileged_command(full_command, on_output, progress_callback)
+        completed = len(finished_steps) if output.startswith("Error") else len(steps)
+        return output, PacmanAURManager._transaction_results(steps, completed, targets)
+
+    @staticmethod
+    def delete_cache_archives(archives, output_callback=None):
+        """
+        حذف أرشيفات من ذاكرة الحزم المؤقتة (مع تواقيعها) باستدعاء مميز واحد لكل مجلدات
+        الذاكرة المؤقتة، فتظهر نافذة المصادقة مرة واحدة.
+        Deletes archives from the package cache (with their signatures) using a single
+        privileged call for every cache directory, so the authentication prompt appears once.
+
+        تعيد (نجاح، رسالة).
+        Returns (success, message).
+        """
+        commands = PackageCache.build_delete_commands(archives)
+        if not commands:
+            return False, "Error: No cache archives were given."
+        for command in commands:
+            output = PacmanAURManager._run_privileged_command(command, output_callback)
+            if output.startswith("Error"):
+                return False, output
+        return True, f"Removed {len(archives)} cached package archive(s)."
+
+    @staticmethod
+    def write_mirrorlist(content, output_callback=None, mirrorlist_path=DEFAULT_MIRRORLIST):
+        """
+        كتابة mirrorlist جديد عبر أمر install مميز واحد (مع نسخة احتياطية .bak من القديم).
+        Writes a new mirrorlist with a single privileged install call (keeping a .bak copy of
+        the old one).
+
+        تعيد (نجاح، رسالة).
+        Returns (success, message).
+        """
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", prefix="mirrorlist-",
+                                             delete=False) as f:
+                f.write(content)
+                temp_path = f.name
+        except OSError as e:
+            return False, f"Error: Could not write a temporary mirrorlist: {e}"
+        try:
+            output = PacmanAURManager._run_privileged_command(
+                ["/usr/bin/install", "-b", "--suffix=.bak", "-m644", temp_path, mirrorlist_path],
+                output_callback,
+            )
+        finally:
+            os.remove(temp_path)
+        if output.startswith("Error"):
+            return False, output
+        return True, f"Saved the ranked mirrorlist to {mirrorlist_path} (previous version kept as {mirrorlist_path}.bak)."
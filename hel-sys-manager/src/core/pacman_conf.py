@@ -0,0 +1,80 @@
+import os
+
+DEFAULT_PACMAN_CONF = "/etc/pacman.conf"
+
+
+class PacmanConfig:
+    """
+    قارئ بسيط لملف pacman.conf لمعرفة المستودعات المفعلة والمسارات.
+    Minimal pacman.conf reader to discover the enabled repositories and paths.
+
+    لا نحتاج إلا لأسماء الأقسام وبعض خيارات [options]، لذلك لا تُتبع أسطر Include.
+    Only section names and a few [options] keys are needed, so Include lines are not followed.
+    """
+
+    def __init__(self, conf_path=DEFAULT_PACMAN_CONF):
+        self.conf_path = conf_path
+        self.repos = []
+        self.db_path = "/var/lib/pacman/"
+        self.cache_dirs = ["/var/cache/pacman/pkg/"]
+        self.log_file = "/var/log/pacman.log"
+        self.architecture = "auto"
+        self._mtime = None
+        self.load()
+
+    def load(self):
+        """
+        إعادة قراءة الملف إذا تغير منذ آخر قراءة.
+        Re-reads the file if it changed since the last read.
+        """
+        try:
+            mtime = os.stat(self.conf_path).st_mtime_ns
+        except OSError:
+            if not self.repos:
+                # مستودعات Arch الافتراضية في حال عدم وجود الملف
+                # Default Arch repositories when the file is missing
+                self.repos = ["core", "extra", "multilib"]
+            return
+        if mtime == self._mtime:
+            return
+
+        repos = []
+        cache_dirs = []
+        section = None
+        try:
+            with open(self.conf_path, "r", encoding="utf-8", errors="replace") as f:
+                for raw_line in f:
+                    line = raw_line.split('#', 1)[0].strip()
+                    if not line:
+                        continue
+                    if line.startswith('[') and line.endswith(']'):
+                        section = line[1:-1].strip()
+                        if section != "options" and section not in repos:
+                            repos.append(section)
+                        continue
+                    if section != "options" or '=' not in line:
+                        continue
+                    key, value = (part.strip() for part in line.split('=', 1))
+                    if key == "DBPath":
+                        self.db_path = value
+                    elif key == "CacheDir":
+                        cache_dirs.extend(value.split())
+                    elif key == "LogFile":
+                        self.log_file = value
+                    elif key == "Architecture":
+                        self.architecture = value.split()[0]
+        except OSError as e:
+            print(f"Error reading '{self.conf_path}': {e}")
+            return
+
+        self.repos = repos
+        self.cache_dirs = cache_dirs or ["/var/cache/pacman/pkg/"]
+        self._mtime = mtime
+
+    @property
+    def local_db_path(self):
+        return os.path.join(self.db_path, "local")
+
+    @property
+    def sync_db_path(self):
+        return os.path.join(self.db_path, "sync")
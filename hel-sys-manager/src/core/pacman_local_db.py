@@ -0,0 +1,236 @@
+import os
+import threading
+import datetime
+from collections import namedtuple
+
+# المسار الافتراضي لقاعدة بيانات الحزم المثبتة
+# Default path of the installed-packages database
+DEFAULT_LOCAL_DB_PATH = "/var/lib/pacman/local"
+
+# قيم REASON في قاعدة البيانات: 0 = صريح، 1 = كتبعية
+# REASON values in the database: 0 = explicit, 1 = as dependency
+REASON_EXPLICIT = 0
+REASON_DEPEND = 1
+
+# سجل الحزمة المثبتة كما هو مخزن في ملف desc
+# Installed package record as stored in the desc file
+LocalPackage = namedtuple("LocalPackage", [
+    "name", "version", "description", "base", "url", "arch",
+    "build_date", "install_date", "packager", "size", "reason",
+    "licenses", "groups", "depends", "optdepends", "provides",
+    "conflicts", "replaces",
+], defaults=("", "", "", "", 0, 0, "", 0, REASON_EXPLICIT, (), (), (), (), (), (), ()))
+
+
+def parse_desc(text):
+    """
+    تحليل ملف بصيغة desc الخاصة بـ libalpm إلى قاموس من القوائم.
+    Parses a libalpm desc-format file into a dict of lists.
+
+    كل قسم يبدأ بسطر مثل %NAME% وينتهي بسطر فارغ.
+    Each section starts with a line like %NAME% and ends with a blank line.
+    """
+    fields = {}
+    current = None
+    for line in text.split('\n'):
+        if not line:
+            current = None
+        elif current is None and len(line) > 2 and line[0] == '%' and line[-1] == '%':
+            current = fields.setdefault(line[1:-1], [])
+        elif current is not None:
+            current.append(line)
+    return fields
+
+
+def desc_first(fields, key, default=""):
+    values = fields.get(key)
+    return values[0] if values else default
+
+
+def desc_int(fields, key, default=0):
+    try:
+        return int(desc_first(fields, key, default))
+    except ValueError:
+        return default
+
+
+def record_from_desc(fields):
+    """
+    بناء سجل LocalPackage من حقول desc المحللة.
+    Builds a LocalPackage record from parsed desc fields.
+    """
+    return LocalPackage(
+        name=desc_first(fields, "NAME"),
+        version=desc_first(fields, "VERSION"),
+        description=desc_first(fields, "DESC"),
+        base=desc_first(fields, "BASE"),
+        url=desc_first(fields, "URL"),
+        arch=desc_first(fields, "ARCH"),
+        build_date=desc_int(fields, "BUILDDATE"),
+        install_date=desc_int(fields, "INSTALLDATE"),
+        packager=desc_first(fields, "PACKAGER"),
+        size=desc_int(fields, "SIZE"),
+        reason=desc_int(fields, "REASON", REASON_EXPLICIT),
+        licenses=tuple(fields.get("LICENSE", ())),
+        groups=tuple(fields.get("GROUPS", ())),
+        depends=tuple(fields.get("DEPENDS", ())),
+        optdepends=tuple(fields.get("OPTDEPENDS", ())),
+        provides=tuple(fields.get("PROVIDES", ())),
+        conflicts=tuple(fields.get("CONFLICTS", ())),
+        replaces=tuple(fields.get("REPLACES", ())),
+    )
+
+
+def format_size(size_bytes):
+    """
+    تحويل الحجم بالبايت إلى نص مقروء بنفس أسلوب pacman.
+    Converts a size in bytes to a human-readable string in pacman's style.
+    """
+    size = float(size_bytes)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024.0 or unit == "GiB":
+            return f"{size:.2f} {unit}"
+        size /= 1024.0
+
+
+def format_date(timestamp):
+    if not timestamp:
+        return "None"
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%a %d %b %Y %I:%M:%S %p")
+
+
+def format_list(values):
+    return "  ".join(values) if values else "None"
+
+
+def package_info_dict(pkg, required_by=None, optional_for=None):
+    """
+    تحويل سجل الحزمة إلى قاموس بنفس مفاتيح مخرجات pacman -Qi.
+    required_by/optional_for (من الرسم البياني للتبعيات) تضاف إذا تم تمريرها.
+    Converts a package record into a dict with the same keys as pacman -Qi output.
+    required_by/optional_for (from the dependency graph) are included when given.
+    """
+    info = {
+        "Name": pkg.name,
+        "Version": pkg.version,
+        "Description": pkg.description,
+        "Architecture": pkg.arch,
+        "URL": pkg.url,
+        "Licenses": format_list(pkg.licenses),
+        "Groups": format_list(pkg.groups),
+        "Provides": format_list(pkg.provides),
+        "Depends On": format_list(pkg.depends),
+        "Optional Deps": "\n                  ".join(pkg.optdepends) if pkg.optdepends else "None",
+    }
+    if required_by is not None:
+        info["Required By"] = format_list(required_by)
+    if optional_for is not None:
+        info["Optional For"] = format_list(optional_for)
+    info.update({
+        "Conflicts With": format_list(pkg.conflicts),
+        "Replaces": format_list(pkg.replaces),
+        "Installed Size": format_size(pkg.size),
+        "Packager": pkg.packager,
+        "Build Date": format_date(pkg.build_date),
+        "Install Date": format_date(pkg.install_date),
+        "Install Reason": "Explicitly installed" if pkg.reason == REASON_EXPLICIT
+                          else "Installed as a dependency for another package",
+    })
+    return info
+
+
+class PacmanLocalDB:
+    """
+    قارئ مباشر لقاعدة بيانات pacman المحلية (/var/lib/pacman/local/*/desc) بدون تشغيل أي عملية.
+    In-process reader for pacman's local database (/var/lib/pacman/local/*/desc), without spawning any process.
+
+    السجلات مخزنة مؤقتاً حسب وقت تعديل ملف desc لكل حزمة، لذلك لا يُعاد قراءة إلا ما تغير.
+    Records are cached by each package's desc mtime, so only what changed is re-read.
+    """
+
+    def __init__(self, db_path=DEFAULT_LOCAL_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # اسم المجلد -> (mtime_ns, LocalPackage)
+        # directory name -> (mtime_ns, LocalPackage)
+        self._entries = {}
+        # اسم الحزمة -> LocalPackage
+        # package name -> LocalPackage
+        self._by_name = {}
+        self._loaded = False
+        self.generation = 0
+
+    def is_available(self):
+        return os.path.isdir(self.db_path)
+
+    def _read_entry(self, dir_path):
+        with open(os.path.join(dir_path, "desc"), "r", encoding="utf-8", errors="replace") as f:
+            return record_from_desc(parse_desc(f.read()))
+
+    def refresh(self):
+        """
+        مزامنة الذاكرة المؤقتة مع القرص. تعيد True إذا تغير شيء.
+        Synchronizes the cache with the disk. Returns True if anything changed.
+        """
+        with self._lock:
+            try:
+                entries = os.scandir(self.db_path)
+            except OSError as e:
+                print(f"Error reading pacman local database '{self.db_path}': {e}")
+                return False
+
+            changed = False
+            seen = set()
+            with entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    seen.add(entry.name)
+                    try:
+                        mtime = os.stat(os.path.join(entry.path, "desc")).st_mtime_ns
+                    except OSError:
+                        continue
+                    cached = self._entries.get(entry.name)
+                    if cached is not None and cached[0] == mtime:
+                        continue
+                    try:
+                        self._entries[entry.name] = (mtime, self._read_entry(entry.path))
+                        changed = True
+                    except OSError as e:
+                        print(f"Error reading '{entry.path}/desc': {e}")
+
+            for stale in set(self._entries) - seen:
+                del self._entries[stale]
+                changed = True
+
+            if changed or not self._loaded:
+                self._by_name = {pkg.name: pkg for _, pkg in self._entries.values()}
+                self._loaded = True
+                self.generation += 1
+            return changed
+
+    def packages(self):
+        """
+        إرجاع قاموس اسم الحزمة -> LocalPackage بعد التحديث.
+        Returns a dict of package name -> LocalPackage after refreshing.
+        """
+        self.refresh()
+        return self._by_name
+
+    def get(self, package_name):
+        """
+        جلب سجل حزمة مثبتة أو None إذا لم تكن مثبتة.
+        Fetches an installed package record, or None if it is not installed.
+        """
+        return self.packages().get(package_name)
+
+    def cached(self, package_name):
+        """
+        سجل الحزمة من آخر تحديث، بدون أي وصول للقرص (للاستدعاء من خيط الواجهة).
+        The package's record from the last refresh, without touching the disk (safe to call
+        from the GUI thread).
+        """
+        return self._by_name.get(package_name)
+
+    def list_names(self):
+        return sorted(self.packages())
@@ -0,0 +1,335 @@
+import os
+import re
+import json
+import mmap
+import bisect
+import zlib
+import datetime
+import threading
+from array import array
+from collections import namedtuple, OrderedDict
+
+# سجل عملية واحدة من pacman.log
+# One operation record from pacman.log
+HistoryEntry = namedtuple("HistoryEntry", ["timestamp", "action", "package", "old_version", "new_version"])
+
+ACTIONS = ("installed", "upgraded", "downgraded", "reinstalled", "removed")
+
+_match_start = re.Match.start
+
+# يبدأ النمط بنص ثابت ("] [ALPM] ") حتى يستخدم محرك re البحث السريع عن البادئة؛
+# الإزاحة المحفوظة لكل مدخل هي موضع "]" الذي يغلق الطابع الزمني
+# The pattern starts with a literal ("] [ALPM] ") so the re engine can use its fast prefix
+# search; the offset stored for each entry is the position of the "]" closing the timestamp
+_ANCHOR_RE = re.compile(rb"\] \[ALPM\] (?:installed|upgraded|downgraded|reinstalled|removed) ")
+
+_LINE_RE = re.compile(
+    r"^\[([^\]]+)\] \[ALPM\] (installed|upgraded|downgraded|reinstalled|removed) (\S+) \(([^)]*)\)"
+)
+
+# يتم حفظ الطابع الزمني لكل مدخل رقم SPARSE_INTERVAL فقط (فهرس متفرق)
+# Only every SPARSE_INTERVAL-th entry's timestamp is kept (sparse index)
+SPARSE_INTERVAL = 512
+ENTRY_CACHE_SIZE = 2048
+
+# عدد البايتات من بداية الملف المستخدمة لاكتشاف استبدال الملف بنفس الـ inode
+# Number of leading bytes used to detect the file being replaced under the same inode
+HEAD_CHECK_BYTES = 4096
+
+
+def parse_log_timestamp(text):
+    """
+    تحويل الطابع الزمني في pacman.log (الصيغة الحديثة ISO أو القديمة "YYYY-MM-DD HH:MM") إلى ثوانٍ،
+    أو None إذا كان تالفاً.
+    Converts a pacman.log timestamp (modern ISO or legacy "YYYY-MM-DD HH:MM") to epoch seconds,
+    or None if it is malformed.
+    """
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+class PacmanLog:
+    """
+    عارض لسجل pacman.log يعتمد على mmap وفهرس متفرق للإزاحات حسب الوقت.
+    pacman.log viewer backed by mmap and a sparse, time-ordered offset index.
+
+    لا يُحمّل الملف في الذاكرة: نحفظ فقط إزاحة واحدة لكل سطر عملية،
+    ويتم تحليل السجلات عند الطلب فقط (مع ذاكرة مؤقتة صغيرة).
+    The file is never loaded into memory: only one offset per operation line is kept,
+    and records are parsed on demand (with a small cache).
+    """
+
+    def __init__(self, log_path, cursor_path=None):
+        self.log_path = log_path
+        # مسار حفظ المؤشر والفهرس بين مرات التشغيل (بدون امتداد)
+        # Path prefix where the cursor and index are persisted between runs (no extension)
+        self.cursor_path = cursor_path
+        self.offsets = array('Q')
+        self._sparse_times = []
+        self._scanned_to = 0
+        self._identity = None
+        self._file = None
+        self._mmap = None
+        self._lock = threading.RLock()
+        self._entry_cache = OrderedDict()
+        # يزداد عند إعادة بناء الفهرس من الصفر (تدوير أو اقتطاع)
+        # Incremented whenever the index is rebuilt from scratch (rotation or truncation)
+        self.generation = 0
+        self._load_cursor()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _reset(self):
+        self.offsets = array('Q')
+        self._sparse_times = []
+        self._scanned_to = 0
+        self._identity = None
+        self._entry_cache.clear()
+        self.generation += 1
+
+    def _load_cursor(self):
+        """
+        تحميل المؤشر المحفوظ (inode + الإزاحة) والفهرس من القرص إن وجد.
+        Loads the persisted cursor (inode + offset) and index from disk, if any.
+        """
+        if not self.cursor_path:
+            return
+        try:
+            with open(self.cursor_path + ".json", "r", encoding="utf-8") as f:
+                cursor = json.load(f)
+            offsets = array('Q')
+            with open(self.cursor_path + ".offsets", "rb") as f:
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return
+        if len(offsets) != cursor.get("count"):
+            return
+        self.offsets = offsets
+        self._sparse_times = cursor["sparse_times"]
+        self._scanned_to = cursor["offset"]
+        self._identity = tuple(cursor["identity"])
+
+    def _save_cursor(self):
+        if not self.cursor_path:
+            return
+        cursor = {
+            "identity": list(self._identity),
+            "offset": self._scanned_to,
+            "count": len(self.offsets),
+            "sparse_times": self._sparse_times,
+        }
+        try:
+            with open(self.cursor_path + ".offsets.tmp", "wb") as f:
+                self.offsets.tofile(f)
+            with open(self.cursor_path + ".json.tmp", "w", encoding="utf-8") as f:
+                json.dump(cursor, f)
+            os.replace(self.cursor_path + ".offsets.tmp", self.cursor_path + ".offsets")
+            os.replace(self.cursor_path + ".json.tmp", self.cursor_path + ".json")
+        except OSError as e:
+            print(f"Warning: Could not save the pacman log cursor: {e}")
+
+    def _head_checksum(self, length):
+        if self._mmap is None:
+            return zlib.crc32(b"")
+        return zlib.crc32(self._mmap[:length])
+
+    def _is_same_file(self, stat_result):
+        """
+        هل الملف المفتوح هو نفس الملف الذي يشير إليه المؤشر المحفوظ؟
+        نقارن الجهاز والـ inode وبصمة البايتات الأولى حتى نكتشف التدوير والاستبدال.
+        Is the open file the same one the saved cursor points into? Device, inode and a
+        checksum of the leading bytes are compared to catch rotation and replacement.
+        """
+        if self._identity is None:
+            return False
+        dev, ino, head_length, head_crc = self._identity
+        if (dev, ino) != (stat_result.st_dev, stat_result.st_ino):
+            return False
+        if stat_result.st_size < self._scanned_to or stat_result.st_size < head_length:
+            return False
+        return self._head_checksum(head_length) == head_crc
+
+    def open(self):
+        """
+        فتح الملف وفهرسة البايتات المضافة فقط منذ آخر مرة. تعيد عدد المدخلات الجديدة.
+        يرفع OSError عند الفشل.
+        Opens the file and indexes only the bytes appended since last time. Returns the number
+        of new entries. Raises OSError on failure.
+
+        إذا تغير الـ inode (تدوير السجل) أو أصبح الملف أقصر من المؤشر (اقتطاع) أو تغيرت
+        بدايته، تتم إعادة الفهرسة من الصفر.
+        If the inode changed (log rotation), the file became shorter than the cursor
+        (truncation) or its head changed, indexing restarts from zero.
+        """
+        with self._lock:
+            self.close()
+            self._file = open(self.log_path, "rb")
+            stat_result = os.fstat(self._file.fileno())
+            if stat_result.st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if not self._is_same_file(stat_result):
+                self._reset()
+            scanned_to = self._scanned_to
+            added = self._scan()
+
+            head_length = min(stat_result.st_size, HEAD_CHECK_BYTES)
+            identity = (stat_result.st_dev, stat_result.st_ino, head_length, self._head_checksum(head_length))
+            if identity != self._identity or self._scanned_to != scanned_to:
+                self._identity = identity
+                self._save_cursor()
+            return added
+
+    def refresh(self):
+        """
+        إعادة فحص الملف لالتقاط الأسطر الجديدة (مثلاً أثناء معاملة جارية).
+        Re-checks the file to pick up newly appended lines (e.g. during a running transaction).
+        """
+        return self.open()
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _scan(self):
+        """
+        فهرسة الأسطر الكاملة من آخر موضع تمت فهرسته حتى نهاية الملف.
+        Indexes complete lines from the last indexed position up to the end of the file.
+        """
+        if self._mmap is None:
+            return 0
+        # تجاهل السطر الأخير إذا لم يكتمل بعد (pacman ما زال يكتب)
+        # Skip a trailing partial line (pacman may still be writing it)
+        end = self._mmap.rfind(b"\n") + 1
+        if end <= self._scanned_to:
+            return 0
+        # جمع الإزاحات فقط داخل حلقة C؛ الطوابع الزمنية تُحلل لكل SPARSE_INTERVAL مدخل فقط
+        # Collect offsets only inside a C-level loop; timestamps are parsed every SPARSE_INTERVAL entries
+        first_new = len(self.offsets)
+        self.offsets.extend(map(_match_start, _ANCHOR_RE.finditer(self._mmap, self._scanned_to, end)))
+        self._scanned_to = end
+        next_sparse = -(-first_new // SPARSE_INTERVAL) * SPARSE_INTERVAL
+        for index in range(next_sparse, len(self.offsets), SPARSE_INTERVAL):
+            self._sparse_times.append(self._timestamp_at(index))
+        return len(self.offsets) - first_new
+
+    @property
+    def scanned_to(self):
+        return self._scanned_to
+
+    def findall(self, pattern, start=0):
+        """
+        تشغيل pattern.findall على الأسطر الكاملة المفهرسة من الموضع start حتى نهايتها.
+        Runs pattern.findall over the complete, indexed lines from start up to their end.
+        """
+        with self._lock:
+            if self._mmap is None or start >= self._scanned_to:
+                return []
+            return pattern.findall(self._mmap, start, self._scanned_to)
+
+    def _line_start(self, offset):
+        return self._mmap.rfind(b"\n", 0, offset) + 1
+
+    def _timestamp_at(self, index):
+        """
+        الطابع الزمني للمدخل index. السطر ذو الطابع التالف يأخذ طابع آخر مدخل سليم قبله (أو 0)،
+        حتى يبقى الفهرس المتفرق مرتباً زمنياً ويعمل البحث الثنائي.
+        The timestamp of entry index. A line with a malformed stamp takes the stamp of the last
+        valid entry before it (or 0), so the sparse index stays in time order for bisecting.
+        """
+        for i in range(index, -1, -1):
+            offset = self.offsets[i]
+            timestamp = parse_log_timestamp(self._mmap[self._line_start(offset) + 1:offset].decode("ascii", "replace"))
+            if timestamp is not None:
+                return timestamp
+        return 0.0
+
+    def entry(self, index):
+        """
+        تحليل المدخل رقم index إلى HistoryEntry (مع ذاكرة مؤقتة LRU).
+        Parses entry number index into a HistoryEntry (with an LRU cache).
+        """
+        with self._lock:
+            cached = self._entry_cache.get(index)
+            if cached is not None:
+                self._entry_cache.move_to_end(index)
+                return cached
+
+            offset = self.offsets[index]
+            line_end = self._mmap.find(b"\n", offset)
+            line = self._mmap[self._line_start(offset):line_end].decode("utf-8", "replace")
+            match = _LINE_RE.match(line)
+            if match is None:
+                # سطر مقطوع أو تالف: نعرض ما يمكن استخراجه فقط
+                # Truncated or damaged line: show only what can be extracted
+                return HistoryEntry(self._timestamp_at(index), "", line, "", "")
+            timestamp, action, package, versions = match.groups()
+            old_version, _, new_version = versions.partition(" -> ")
+            if action in ("installed", "reinstalled"):
+                old_version, new_version = "", old_version
+            timestamp = parse_log_timestamp(timestamp)
+            if timestamp is None:
+                timestamp = self._timestamp_at(index)
+            entry = HistoryEntry(timestamp, action, package, old_version, new_version)
+
+            self._entry_cache[index] = entry
+            if len(self._entry_cache) > ENTRY_CACHE_SIZE:
+                self._entry_cache.popitem(last=False)
+            return entry
+
+    def _first_index_at_or_after(self, timestamp, strict=False):
+        """
+        أول مدخل طابعه الزمني >= timestamp (أو > إذا كان strict)، عبر الفهرس المتفرق ثم بحث خطي داخل كتلة واحدة.
+        First entry whose timestamp is >= timestamp (or > if strict), via the sparse index then a
+        linear scan inside one block.
+        """
+        search = bisect.bisect_right if strict else bisect.bisect_left
+        block = search(self._sparse_times, timestamp)
+        start = max(0, (block - 1) * SPARSE_INTERVAL)
+        stop = min(len(self.offsets), block * SPARSE_INTERVAL)
+        for index in range(start, stop):
+            entry_time = self.entry(index).timestamp
+            if entry_time > timestamp or (not strict and entry_time == timestamp):
+                return index
+        return stop
+
+    def filter(self, start_time=None, end_time=None, actions=None, package=None):
+        """
+        إرجاع أرقام المدخلات المطابقة للفلاتر كتسلسل (range أو array).
+        Returns the indices of entries matching the filters as a sequence (range or array).
+
+        start_time/end_time: ثوانٍ منذ epoch (شاملة). actions: مجموعة من ACTIONS.
+        package: جزء من اسم الحزمة.
+        start_time/end_time: epoch seconds (inclusive). actions: a set of ACTIONS.
+        package: a substring of the package name.
+        """
+        with self._lock:
+            low, high = 0, len(self.offsets)
+            if start_time is not None:
+                low = self._first_index_at_or_after(start_time)
+            if end_time is not None:
+                high = self._first_index_at_or_after(end_time, strict=True)
+            if low >= high:
+                return range(0)
+            if not actions and not package:
+                return range(low, high)
+
+            # مطابقة العملية واسم الحزمة عبر تعبير منتظم على mmap مباشرة بسرعة C
+            # Match the action and package name with a regex run directly over the mmap at C speed
+            action_pattern = b"|".join(action.encode() for action in (actions or ACTIONS))
+            package_pattern = rb"[^ \n]*" + re.escape(package.encode("utf-8")) + rb"[^ \n]*" if package else rb"\S+"
+            pattern = re.compile(rb"\] \[ALPM\] (?:" + action_pattern + rb") " + package_pattern + rb" \(")
+            end_offset = self.offsets[high] if high < len(self.offsets) else self._scanned_to
+            offsets = self.offsets
+            return array('I', (
+                bisect.bisect_left(offsets, match.start())
+                for match in pattern.finditer(self._mmap, offsets[low], end_offset)
+            ))
@@ -0,0 +1,214 @@
+import io
+import os
+import tarfile
+import threading
+from collections import namedtuple
+
+from .pacman_conf import PacmanConfig
+from .pacman_local_db import parse_desc, desc_first, desc_int, format_size, format_date, format_list
+from .search_index import PackageSearchIndex
+
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _ZSTD_AVAILABLE = False
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# سجل حزمة من قاعدة بيانات مستودع (sync)
+# Package record from a repository (sync) database
+SyncPackage = namedtuple("SyncPackage", [
+    "repo", "name", "version", "description", "base", "url", "arch",
+    "build_date", "packager", "csize", "isize", "filename",
+    "licenses", "groups", "depends", "optdepends", "makedepends",
+    "provides", "conflicts", "replaces",
+])
+
+
+def _record_from_sync_desc(repo, fields):
+    return SyncPackage(
+        repo=repo,
+        name=desc_first(fields, "NAME"),
+        version=desc_first(fields, "VERSION"),
+        description=desc_first(fields, "DESC"),
+        base=desc_first(fields, "BASE"),
+        url=desc_first(fields, "URL"),
+        arch=desc_first(fields, "ARCH"),
+        build_date=desc_int(fields, "BUILDDATE"),
+        packager=desc_first(fields, "PACKAGER"),
+        csize=desc_int(fields, "CSIZE"),
+        isize=desc_int(fields, "ISIZE"),
+        filename=desc_first(fields, "FILENAME"),
+        licenses=tuple(fields.get("LICENSE", ())),
+        groups=tuple(fields.get("GROUPS", ())),
+        depends=tuple(fields.get("DEPENDS", ())),
+        optdepends=tuple(fields.get("OPTDEPENDS", ())),
+        makedepends=tuple(fields.get("MAKEDEPENDS", ())),
+        provides=tuple(fields.get("PROVIDES", ())),
+        conflicts=tuple(fields.get("CONFLICTS", ())),
+        replaces=tuple(fields.get("REPLACES", ())),
+    )
+
+
+def sync_info_dict(pkg):
+    """
+    تحويل سجل حزمة المستودع إلى قاموس بنفس مفاتيح مخرجات pacman -Si.
+    Converts a repository package record into a dict with the same keys as pacman -Si output.
+    """
+    return {
+        "Repository": pkg.repo,
+        "Name": pkg.name,
+        "Version": pkg.version,
+        "Description": pkg.description,
+        "Architecture": pkg.arch,
+        "URL": pkg.url,
+        "Licenses": format_list(pkg.licenses),
+        "Groups": format_list(pkg.groups),
+        "Provides": format_list(pkg.provides),
+        "Depends On": format_list(pkg.depends),
+        "Optional Deps": "\n                  ".join(pkg.optdepends) if pkg.optdepends else "None",
+        "Conflicts With": format_list(pkg.conflicts),
+        "Replaces": format_list(pkg.replaces),
+        "Download Size": format_size(pkg.csize),
+        "Installed Size": format_size(pkg.isize),
+        "Packager": pkg.packager,
+        "Build Date": format_date(pkg.build_date),
+    }
+
+
+def read_sync_db(repo, db_file):
+    """
+    قراءة أرشيف مستودع (.db) وإرجاع قائمة سجلات SyncPackage.
+    Reads a repository archive (.db) and returns a list of SyncPackage records.
+
+    ملفات desc و depends لكل حزمة تُدمج لدعم الصيغة القديمة أيضاً.
+    Each package's desc and depends members are merged to support the older layout too.
+    """
+    with open(db_file, "rb") as f:
+        data = f.read()
+    if data[:4] == _ZSTD_MAGIC:
+        if not _ZSTD_AVAILABLE:
+            raise OSError(f"'{db_file}' is zstd-compressed and python-zstandard is not installed")
+        data = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+
+    entries = {}
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            directory, _, filename = member.name.rpartition('/')
+            if filename not in ("desc", "depends"):
+                continue
+            text = archive.extractfile(member).read().decode("utf-8", errors="replace")
+            entries.setdefault(directory, {}).update(parse_desc(text))
+
+    return [_record_from_sync_desc(repo, fields) for fields in entries.values() if "NAME" in fields]
+
+
+class PacmanSyncDB:
+    """
+    قارئ مباشر لقواعد بيانات المستودعات في /var/lib/pacman/sync مع فهرس بحث في الذاكرة.
+    In-process reader for the repository databases in /var/lib/pacman/sync with an in-memory search index.
+
+    يغطي كل المستودعات المذكورة في pacman.conf (وليس فقط core/extra)، ويُعاد بناء
+    الفهرس فقط عندما يتغير وقت تعديل أحد ملفات .db.
+    Covers every repository listed in pacman.conf (not only core/extra) and rebuilds the
+    index only when one of the .db files' mtime changes.
+    """
+
+    def __init__(self, config=None, sync_db_path=None):
+        self.config = config or PacmanConfig()
+        # مسار بديل لمجلد sync (مثل نسخة خاصة لفحص التحديثات)
+        # Alternative sync directory (e.g. a private copy used for update checks)
+        self._sync_db_path = sync_db_path
+        self._lock = threading.Lock()
+        # اسم المستودع -> (mtime_ns, [SyncPackage])
+        # repo name -> (mtime_ns, [SyncPackage])
+        self._repos = {}
+        self._index = None
+        self._by_name = {}
+        self.generation = 0
+
+    @property
+    def sync_db_path(self):
+        return self._sync_db_path or self.config.sync_db_path
+
+    def db_file(self, repo):
+        return os.path.join(self.sync_db_path, f"{repo}.db")
+
+    def is_available(self):
+        return os.path.isdir(self.sync_db_path)
+
+    def db_mtimes(self):
+        """
+        إرجاع قاموس المستودع -> وقت تعديل ملف .db الخاص به (للمستودعات الموجودة فقط).
+        Returns a dict of repo -> mtime of its .db file (existing repos only).
+        """
+        self.config.load()
+        mtimes = {}
+        for repo in self.config.repos:
+            try:
+                mtimes[repo] = os.stat(self.db_file(repo)).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def refresh(self):
+        """
+        إعادة قراءة المستودعات التي تغيرت فقط. تعيد True إذا تغير الفهرس.
+        Re-reads only the repositories that changed. Returns True if the index changed.
+        """
+        with self._lock:
+            mtimes = self.db_mtimes()
+            changed = set(self._repos) != set(mtimes)
+            for repo, mtime in mtimes.items():
+                cached = self._repos.get(repo)
+                if cached is not None and cached[0] == mtime:
+                    continue
+                try:
+                    self._repos[repo] = (mtime, read_sync_db(repo, self.db_file(repo)))
+                    changed = True
+                except (OSError, tarfile.TarError) as e:
+                    print(f"Error reading sync database '{self.db_file(repo)}': {e}")
+                    changed = self._repos.pop(repo, None) is not None or changed
+            for repo in set(self._repos) - set(mtimes):
+                del self._repos[repo]
+
+            if changed or self._index is None:
+                records = []
+                by_name = {}
+                # ترتيب المستودعات كما في pacman.conf: أول مستودع يحتوي الحزمة هو الفائز
+                # Repositories in pacman.conf order: the first repo containing a package wins
+                for repo in self.config.repos:
+                    if repo not in self._repos:
+                        continue
+                    for pkg in self._repos[repo][1]:
+                        records.append(pkg)
+                        by_name.setdefault(pkg.name, pkg)
+                self._index = PackageSearchIndex(records)
+                self._by_name = by_name
+                self.generation += 1
+                return True
+            return False
+
+    def index(self):
+        self.refresh()
+        return self._index
+
+    def packages(self):
+        """
+        إرجاع قاموس الاسم -> SyncPackage (أول مستودع حسب ترتيب pacman.conf).
+        Returns a dict of name -> SyncPackage (first repo in pacman.conf order).
+        """
+        self.refresh()
+        return self._by_name
+
+    def get(self, package_name):
+        return self.packages().get(package_name)
+
+    def search(self, query, limit=None):
+        return self.index().search(query, limit=limit)
+
+    def search_prefix(self, prefix, limit=None):
+        return self.index().prefix(prefix, limit=limit)
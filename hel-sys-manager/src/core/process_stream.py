@@ -0,0 +1,156 @@
+import os
+import re
+import selectors
+import subprocess
+from collections import deque
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+# عدد الأسطر المحفوظة من مخرجات العملية في الذاكرة
+# Number of process output lines kept in memory
+DEFAULT_TRANSCRIPT_LINES = 5000
+
+
+class ProcessResult:
+    """
+    نتيجة عملية مع سجل محدود الحجم لمخرجاتها.
+    Result of a process with a bounded transcript of its output.
+    """
+
+    def __init__(self, returncode, stdout_lines, stderr_lines):
+        self.returncode = returncode
+        self.stdout_lines = stdout_lines
+        self.stderr_lines = stderr_lines
+
+    @property
+    def stdout(self):
+        return "\n".join(self.stdout_lines)
+
+    @property
+    def stderr(self):
+        return "\n".join(self.stderr_lines)
+
+
+def stream_process(command, line_callback=None, transcript_lines=DEFAULT_TRANSCRIPT_LINES):
+    """
+    تشغيل أمر وقراءة stdout و stderr معاً عبر selectors بدون أن يحجب أحدهما الآخر.
+    Runs a command and reads stdout and stderr together through selectors, so neither
+    stream can stall the other or fill its pipe buffer.
+
+    line_callback(stream, line) يُستدعى لكل سطر فور وصوله.
+    line_callback(stream, line) is called for every line as soon as it arrives.
+
+    يرفع FileNotFoundError إذا لم يوجد الأمر.
+    Raises FileNotFoundError if the command does not exist.
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    transcripts = {
+        STDOUT: deque(maxlen=transcript_lines),
+        STDERR: deque(maxlen=transcript_lines),
+    }
+    buffers = {STDOUT: b"", STDERR: b""}
+
+    def emit(stream, raw_line):
+        # pacman يستخدم \r لتحديث نفس السطر؛ نعتبر آخر جزء هو السطر الفعلي
+        # pacman uses \r to redraw the same line; the last segment is the real line
+        line = raw_line.decode("utf-8", errors="replace").rstrip().rsplit('\r', 1)[-1]
+        transcripts[stream].append(line)
+        if line_callback is not None:
+            line_callback(stream, line)
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ, STDOUT)
+        selector.register(process.stderr, selectors.EVENT_READ, STDERR)
+        open_streams = 2
+        while open_streams:
+            for key, _ in selector.select():
+                stream = key.data
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    open_streams -= 1
+                    if buffers[stream]:
+                        emit(stream, buffers[stream])
+                        buffers[stream] = b""
+                    continue
+                data = buffers[stream] + chunk
+                *lines, buffers[stream] = data.split(b"\n")
+                for raw_line in lines:
+                    emit(stream, raw_line)
+
+    process.stdout.close()
+    process.stderr.close()
+    returncode = process.wait()
+    return ProcessResult(returncode, list(transcripts[STDOUT]), list(transcripts[STDERR]))
+
+
+class PacmanProgressParser:
+    """
+    تحويل أسطر مخرجات pacman (بدون شريط تقدم لأنها ليست طرفية) إلى أحداث تقدم منظمة.
+    Turns pacman output lines (printed without progress bars since it is not a tty) into
+    structured progress events.
+
+    كل حدث قاموس يحتوي: stage, package, current, total, percent.
+    Each event is a dict with: stage, package, current, total, percent.
+    """
+
+    # pacman يحشو العداد بمسافات حتى عرض الإجمالي: "( 1/12) installing foo"
+    # pacman pads the counter to the width of the total: "( 1/12) installing foo"
+    _STEP_RE = re.compile(r"^\(\s*(\d+)/\s*(\d+)\)\s+(\S.*?)\s*$")
+    _DOWNLOAD_RE = re.compile(r"^\s*(\S+)\s+downloading\.\.\.\s*$")
+    _PACKAGES_RE = re.compile(r"^Packages \((\d+)\)")
+    _ACTIONS = ("installing", "upgrading", "reinstalling", "downgrading", "removing")
+
+    def __init__(self):
+        self.total_packages = 0
+        self.downloaded = 0
+
+    def parse(self, line):
+        """
+        إرجاع حدث تقدم للسطر أو None إذا لم يكن سطر تقدم.
+        Returns a progress event for the line, or None if it is not a progress line.
+        """
+        match = self._PACKAGES_RE.match(line)
+        if match:
+            self.total_packages = int(match.group(1))
+            return None
+
+        match = self._DOWNLOAD_RE.match(line)
+        if match:
+            self.downloaded += 1
+            total = max(self.total_packages, self.downloaded)
+            return {
+                "stage": "downloading",
+                "package": match.group(1),
+                "current": self.downloaded,
+                "total": total,
+                "percent": int(self.downloaded * 100 / total),
+            }
+
+        match = self._STEP_RE.match(line)
+        if match:
+            current, total, text = int(match.group(1)), int(match.group(2)), match.group(3)
+            words = text.split()
+            if words and words[0] in self._ACTIONS:
+                stage = words[0]
+                package = words[1] if len(words) > 1 else ""
+            else:
+                # خطوات مثل "checking keys in keyring" أو "checking package integrity"
+                # Steps such as "checking keys in keyring" or "checking package integrity"
+                stage = text
+                package = ""
+            return {
+                "stage": stage,
+                "package": package,
+                "current": current,
+                "total": total,
+                "percent": int(current * 100 / total) if total else 0,
+            }
+        return None
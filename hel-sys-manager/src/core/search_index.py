@@ -0,0 +1,102 @@
+import bisect
+
+
+class PackageSearchIndex:
+    """
+    فهرس بحث في الذاكرة على أسماء الحزم وأوصافها.
+    In-memory search index over package names and descriptions.
+
+    الأسماء مرتبة للبحث بالبادئة عن طريق bisect، والأوصاف مدمجة في نص واحد
+    يُبحث فيه بـ str.find، لذلك تبقى الاستعلامات بزمن أقل من ميلي ثانية تقريباً.
+    Names are sorted for bisect-based prefix lookups and descriptions are joined into
+    one haystack scanned with str.find, so queries stay around sub-millisecond.
+
+    records: قائمة من السجلات تحتوي على الحقلين name و description.
+    records: a list of records exposing name and description attributes.
+    """
+
+    def __init__(self, records):
+        self.records = list(records)
+        keyed = sorted((rec.name.lower(), i) for i, rec in enumerate(self.records))
+        self._sorted_names = [key for key, _ in keyed]
+        self._sorted_ids = [i for _, i in keyed]
+
+        # نص واحد بالشكل "name\tdescription\n" لكل سجل، مع بداية كل سطر
+        # One "name\tdescription\n" line per record, with each line's start offset
+        parts = []
+        self._line_starts = []
+        offset = 0
+        for rec in self.records:
+            line = f"{rec.name}\t{rec.description}\n".lower()
+            self._line_starts.append(offset)
+            parts.append(line)
+            offset += len(line)
+        self._haystack = "".join(parts)
+
+    def __len__(self):
+        return len(self.records)
+
+    def prefix(self, prefix, limit=None):
+        """
+        إرجاع السجلات التي تبدأ أسماؤها بالبادئة المعطاة، مرتبة أبجدياً.
+        Returns records whose names start with the given prefix, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        results = []
+        for pos in range(start, len(self._sorted_names)):
+            if not self._sorted_names[pos].startswith(prefix):
+                break
+            results.append(self.records[self._sorted_ids[pos]])
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def _substring_ids(self, term):
+        ids = set()
+        find = self._haystack.find
+        pos = find(term)
+        while pos != -1:
+            line_id = bisect.bisect_right(self._line_starts, pos) - 1
+            ids.add(line_id)
+            # الانتقال إلى السطر التالي مباشرة لتجنب تكرار نفس السجل
+            # Jump straight to the next line so the same record is not matched twice
+            next_start = self._line_starts[line_id + 1] if line_id + 1 < len(self._line_starts) else len(self._haystack)
+            pos = find(term, next_start)
+        return ids
+
+    def search(self, query, limit=None):
+        """
+        بحث بالنص الجزئي في الاسم والوصف. الكلمات المتعددة تعني "و" كما في pacman -Ss.
+        Substring search over name and description. Multiple words are ANDed, like pacman -Ss.
+
+        الترتيب: تطابق تام للاسم، ثم بادئة الاسم، ثم جزء من الاسم، ثم الوصف.
+        Ordering: exact name, then name prefix, then name substring, then description.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        ids = None
+        for term in terms:
+            term_ids = self._substring_ids(term)
+            ids = term_ids if ids is None else ids & term_ids
+            if not ids:
+                return []
+
+        first = terms[0]
+
+        def rank(i):
+            name = self.records[i].name.lower()
+            if name == first:
+                return (0, name)
+            if name.startswith(first):
+                return (1, name)
+            if first in name:
+                return (2, name)
+            return (3, name)
+
+        ordered = sorted(ids, key=rank)
+        if limit is not None:
+            ordered = ordered[:limit]
+        return [self.records[i] for i in ordered]
@@ -1,11 +1,31 @@
+import time
 import subprocess
 
+from .systemd_manager import (
+    SystemdClient, SystemdError, UNIT_PROPERTY_FIELDS, SERVICE_PROPERTY_FIELDS, service_from_properties,
+    merge_unit_files
+)
+
+# إجراءات تُنشئ وظائف systemd (تُرسل بـ --no-block ثم تُتابع)، وإجراءات ملفات الوحدات (فورية)
+# Actions that create systemd jobs (sent with --no-block, then tracked), and unit file actions
+# (immediate)
+JOB_ACTIONS = ("start", "stop", "restart")
+UNIT_FILE_ACTIONS = ("enable", "disable")
+JOB_POLL_SECONDS = 0.25
+# أطول من مهلة الإيقاف الافتراضية في systemd (90 ثانية)
+# Longer than systemd's default stop timeout (90 seconds)
+JOB_TIMEOUT_SECONDS = 120
+
 class ServicesManager:
     """
     كلاس لإدارة خدمات systemd.
     Class for managing systemd services.
     """
 
+    # اتصال D-Bus مشترك مع systemd
+    # Shared D-Bus connection to systemd
+    systemd = SystemdClient()
+
     @staticmethod
     def _run_systemctl_command(command_args, check_output=True):
         """
@@ -29,37 +49,219 @@ class ServicesManager:
         except FileNotFoundError:
             return "Error: systemctl command not found. Is systemd installed?"
 
+    @staticmethod
+    def _parse_show_output(output):
+        """
+        تحليل مخرجات systemctl show لعدة وحدات: كتل key=value تفصلها أسطر فارغة.
+        Parses systemctl show output for several units: key=value blocks separated by blank lines.
+        """
+        blocks = []
+        properties = {}
+        for line in output.splitlines():
+            if not line.strip():
+                if properties:
+                    blocks.append(properties)
+                    properties = {}
+                continue
+            key, sep, value = line.partition("=")
+            if sep:
+                properties[key] = value
+        if properties:
+            blocks.append(properties)
+        return blocks
+
+    @staticmethod
+    def _show_services(units):
+        """
+        كل خصائص الخدمات المطلوبة (أسماء أو أنماط) باستدعاء systemctl show واحد.
+        Every property of the requested services (names or patterns) with one systemctl show call.
+        """
+        properties = ["Id"] + list(UNIT_PROPERTY_FIELDS) + list(SERVICE_PROPERTY_FIELDS)
+        output = ServicesManager._run_systemctl_command(
+            ["show", "--all", "--no-pager", "-p", ",".join(properties)] + list(units))
+        if output.startswith("Error:"):
+            return None
+        return [service_from_properties(block["Id"], block)
+                for block in ServicesManager._parse_show_output(output) if block.get("Id")]
+
+    @staticmethod
+    def _list_services_systemctl():
+        """
+        المسار البديل عبر systemctl عند عدم توفر D-Bus: استدعاء show واحد يجلب كل الخصائص لكل
+        الخدمات المحملة، واستدعاء list-unit-files واحد لحالات الملفات.
+        Fallback through systemctl when D-Bus is unavailable: one show call fetches every
+        property of every loaded service, and one list-unit-files call the unit file states.
+        """
+        units = ServicesManager._show_services(["*.service"])
+        if units is None:
+            return [] # إرجاع قائمة فارغة في حالة الخطأ
+
+        unit_files = {}
+        output = ServicesManager._run_systemctl_command(
+            ["list-unit-files", "--type=service", "--no-pager", "--plain", "--no-legend"])
+        if not output.startswith("Error:"):
+            for line in output.splitlines():
+                parts = line.split()
+                if len(parts) >= 2:
+                    unit_files[parts[0]] = parts[1]
+        return merge_unit_files(units, unit_files)
+
     @staticmethod
     def list_services():
         """
         جلب قائمة بجميع خدمات systemd النشطة وغير النشطة.
         Fetches a list of all systemd services (active and inactive).
+
+        كل خدمة تحمل حالاتها وحالة ملفها (enabled/disabled ...) والعملية الرئيسية والذاكرة ووقت
+        المعالج، فلا حاجة لاستدعاء is_service_enabled لكل خدمة.
+        Every service carries its states, its unit file state (enabled/disabled, ...), main
+        PID, memory and CPU time, so is_service_enabled is not needed per service.
+
+        تُقرأ عبر اتصال D-Bus الدائم إن أمكن، وإلا عبر systemctl.
+        Read through the persistent D-Bus connection when possible, otherwise through systemctl.
         """
-        output = ServicesManager._run_systemctl_command(["list-units", "--type=service", "--all", "--no-pager"])
-        services = []
-        if output.startswith("Error:"):
-            return services # إرجاع قائمة فارغة في حالة الخطأ
-
-        lines = output.split('\n')
-        # تخطي أول سطرين (العناوين والفاصل) وآخر سطر (ملخص)
-        # Skip first two lines (headers and separator) and last line (summary)
-        for line in lines[1:-1]:
-            parts = line.split()
-            if len(parts) >= 5:
-                name = parts[0]
-                load = parts[1]
-                active = parts[2]
-                sub = parts[3]
-                description = " ".join(parts[4:]) # الوصف قد يحتوي على مسافات
-                services.append({
-                    "name": name,
-                    "load": load,
-                    "active": active,
-                    "sub": sub,
-                    "description": description
-                })
+        if ServicesManager.systemd.is_available():
+            try:
+                return ServicesManager.systemd.list_services()
+            except SystemdError as e:
+                print(f"Warning: {e}. Falling back to systemctl.")
+        return ServicesManager._list_services_systemctl()
+
+    @staticmethod
+    def get_services(service_names):
+        """
+        إعادة قراءة خدمات محددة فقط (بعد إشعار تغيير): قاموس الاسم -> قاموس الخدمة أو None
+        إذا لم تعد موجودة.
+        Re-reads only the given services (after a change notification): dict of name ->
+        service dict, or None when it no longer exists.
+
+        ترفع SystemdError إذا تعذر الوصول إلى systemd عبر D-Bus.
+        Raises SystemdError if systemd cannot be reached over D-Bus.
+        """
+        return ServicesManager.systemd.get_services(service_names)
+
+    @staticmethod
+    def _read_services(service_names):
+        """
+        مثل get_services لكن مع الرجوع إلى systemctl show عند عدم توفر D-Bus.
+        Like get_services, but falling back to systemctl show when D-Bus is unavailable.
+        """
+        if ServicesManager.systemd.is_available():
+            try:
+                return ServicesManager.get_services(service_names)
+            except SystemdError as e:
+                print(f"Warning: {e}. Falling back to systemctl.")
+        services = {name: None for name in service_names}
+        for service in ServicesManager._show_services(service_names) or []:
+            if service["name"] in services and service["load"] != "not-found":
+                services[service["name"]] = service
         return services
 
+    @staticmethod
+    def _pending_job_units():
+        """
+        أسماء الوحدات التي لها وظائف معلقة، عبر D-Bus أو systemctl list-jobs. None إذا تعذرت القراءة.
+        Names of the units that have pending jobs, through D-Bus or systemctl list-jobs.
+        None if they cannot be read.
+        """
+        if ServicesManager.systemd.is_available():
+            try:
+                return set(ServicesManager.systemd.list_jobs())
+            except SystemdError as e:
+                print(f"Warning: {e}. Falling back to systemctl.")
+        output = ServicesManager._run_systemctl_command(["list-jobs", "--no-pager", "--plain", "--no-legend"])
+        if output.startswith("Error:"):
+            return None
+        # JOB UNIT TYPE STATE
+        return {parts[1] for parts in map(str.split, output.splitlines()) if len(parts) >= 4}
+
+    @staticmethod
+    def _action_result(action, service):
+        if service is None:
+            return False, "Unit not found."
+        state = f"{service['active']} ({service['sub']})"
+        if action == "stop":
+            return service["active"] in ("inactive", "failed"), state
+        if action in JOB_ACTIONS:
+            return service["active"] != "failed", state
+        return True, service["unit_file_state"] or state
+
+    @staticmethod
+    def run_service_action(action, service_names, progress_callback=None):
+        """
+        تنفيذ إجراء (start، stop، restart، enable، disable) على عدة خدمات باستدعاء systemctl واحد.
+        Runs an action (start, stop, restart, enable, disable) on several services with a single
+        systemctl call.
+
+        إجراءات الوظائف تُرسل بـ --no-block، ثم تُتابع وظيفة كل وحدة حتى تنتهي (progress_callback(done,
+        total) اختياري)، ثم تُقرأ الحالات النهائية دفعة واحدة. هذه الدالة حاجبة: تُشغل خارج خيط الواجهة.
+        Job actions are sent with --no-block, then each unit's job is tracked until it finishes
+        (progress_callback(done, total) is optional), then the final states are read in one
+        go. This method blocks: run it off the GUI thread.
+
+        تعيد (هل نجحت كلها، قاموس الاسم -> (نجاح، رسالة)).
+        Returns (whether all succeeded, dict of name -> (success, message)).
+        """
+        if action not in JOB_ACTIONS + UNIT_FILE_ACTIONS:
+            raise ValueError(f"Unknown service action '{action}'")
+        names = list(dict.fromkeys(service_names))
+        if not names:
+            return True, {}
+        results = {}
+        args = [action] + names if action in UNIT_FILE_ACTIONS else ["--no-block", action] + names
+        output = ServicesManager._run_systemctl_command(args)
+        if output.startswith("Error:"):
+            # systemctl يتابع بعد فشل وحدة ويذكر اسمها في رسالة الخطأ
+            # systemctl carries on after a unit fails and names it in the error message
+            for line in output[len("Error:"):].strip().splitlines():
+                words = {word.strip(":,.'\"") for word in line.split()}
+                for name in names:
+                    if name in words and name not in results:
+                        results[name] = (False, line.strip())
+            if not results:
+                # فشل عام (مثل رفض المصادقة): لم يُنفذ شيء
+                # A general failure (such as a denied authorization): nothing was done
+                return False, {name: (False, output) for name in names}
+
+        waiting = [name for name in names if name not in results]
+        if progress_callback is not None:
+            progress_callback(len(results), len(names))
+        if action in JOB_ACTIONS:
+            deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+            remaining = set(waiting)
+            while remaining and time.monotonic() < deadline:
+                jobs = ServicesManager._pending_job_units()
+                if jobs is None:
+                    break
+                remaining &= jobs
+                if progress_callback is not None:
+                    progress_callback(len(names) - len(remaining), len(names))
+                if remaining:
+                    time.sleep(JOB_POLL_SECONDS)
+            for name in remaining:
+                results[name] = (False, "The job is still running.")
+            waiting = [name for name in waiting if name not in remaining]
+
+        for name, service in ServicesManager._read_services(waiting).items():
+            results[name] = ServicesManager._action_result(action, service)
+        if progress_callback is not None:
+            progress_callback(len(names), len(names))
+        return all(ok for ok, _ in results.values()), {name: results[name] for name in names}
+
+    @staticmethod
+    def can_watch_services():
+        return ServicesManager.systemd.is_available()
+
+    @staticmethod
+    def watch_services(callback, stop_event):
+        """
+        حلقة حاجبة تستدعي callback(event, name, fields) لكل تغيير تعلنه systemd في الخدمات،
+        حتى يُضبط stop_event. ترفع SystemdError إذا تعذر الاشتراك.
+        Blocking loop that calls callback(event, name, fields) for every service change
+        systemd announces, until stop_event is set. Raises SystemdError if subscribing fails.
+        """
+        ServicesManager.systemd.watch(callback, stop_event)
+
     @staticmethod
     def get_service_status(service_name):
         """
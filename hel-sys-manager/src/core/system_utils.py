@@ -7,6 +7,17 @@ import os
 
 
 class SystemUtils:
+    @staticmethod
+    def get_cache_dir():
+        """
+        إرجاع مجلد الذاكرة المؤقتة الدائمة للتطبيق وإنشاؤه إذا لم يكن موجوداً.
+        Returns the application's persistent cache directory, creating it if needed.
+        """
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(base, "hel-sys-manager")
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
     @staticmethod
     def get_hostname():
         return platform.node()
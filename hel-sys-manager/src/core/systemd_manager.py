@@ -1 +1,500 @@
-pass
+import threading
+
+try:
+    from jeepney import DBusAddress, MessageType, HeaderFields, MatchRule, message_bus, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+    _JEEPNEY_AVAILABLE = True
+except ImportError:
+    _JEEPNEY_AVAILABLE = False
+    print("Warning: python-jeepney not found. Services will be read through systemctl instead of D-Bus.")
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_OBJECT_PATH = "/org/freedesktop/systemd1"
+MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+UNIT_INTERFACE = "org.freedesktop.systemd1.Unit"
+SERVICE_INTERFACE = "org.freedesktop.systemd1.Service"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+CALL_TIMEOUT_SECONDS = 5
+UNIT_PATH_PREFIX = SYSTEMD_OBJECT_PATH + "/unit/"
+# الفاصل بين فحوص طلب الإيقاف أثناء انتظار الإشارات
+# Interval between stop checks while waiting for signals
+WATCH_POLL_SECONDS = 0.5
+
+# خصائص واجهة Unit -> مفاتيح قاموس الخدمة
+# Unit interface properties -> service dict keys
+UNIT_PROPERTY_FIELDS = {
+    "LoadState": "load",
+    "ActiveState": "active",
+    "SubState": "sub",
+    "Description": "description",
+    "UnitFileState": "unit_file_state",
+}
+# خصائص واجهة Service (العملية الرئيسية ومحاسبة الموارد) -> مفاتيح قاموس الخدمة
+# Service interface properties (main process and resource accounting) -> service dict keys
+SERVICE_PROPERTY_FIELDS = {
+    "MainPID": "main_pid",
+    "MemoryCurrent": "memory",
+    "CPUUsageNSec": "cpu_usage",
+}
+# القيمة التي تعني "غير مضبوط" في خصائص المحاسبة (UINT64_MAX)
+# The value meaning "not set" in the accounting properties (UINT64_MAX)
+UNSET_UINT64 = 2 ** 64 - 1
+
+# أحداث المراقبة: (EVENT_UPDATE، الاسم، قاموس الحقول المتغيرة)، (EVENT_REFRESH، الاسم) يجب إعادة
+# قراءتها، (EVENT_UNLOADED، الاسم)، (EVENT_RELOAD، None) يجب إعادة تحميل القائمة كلها
+# Watch events: (EVENT_UPDATE, name, dict of changed fields), (EVENT_REFRESH, name) must be
+# re-read, (EVENT_UNLOADED, name), (EVENT_RELOAD, None) the whole list must be reloaded
+EVENT_UPDATE = "update"
+EVENT_REFRESH = "refresh"
+EVENT_UNLOADED = "unloaded"
+EVENT_RELOAD = "reload"
+
+
+class SystemdError(Exception):
+    pass
+
+
+def service_dict(name, load, active, sub, description, unit_file_state="", main_pid=None, memory=None,
+                 cpu_usage=None):
+    """
+    قاموس خدمة بنفس المفاتيح أياً كان المصدر (D-Bus أو systemctl).
+    A service dict with the same keys whatever the source (D-Bus or systemctl).
+
+    main_pid و memory (بايت) و cpu_usage (نانوثانية) تكون None عندما لا تعمل الخدمة أو
+    عندما تكون المحاسبة معطلة.
+    main_pid, memory (bytes) and cpu_usage (nanoseconds) are None when the service is not
+    running or accounting is disabled.
+    """
+    return {
+        "name": name,
+        "load": load,
+        "active": active,
+        "sub": sub,
+        "description": description,
+        "unit_file_state": unit_file_state,
+        "main_pid": main_pid,
+        "memory": memory,
+        "cpu_usage": cpu_usage,
+    }
+
+
+def runtime_value(value):
+    """
+    قيمة خاصية تشغيل (MainPID أو MemoryCurrent أو CPUUsageNSec) كعدد، أو None إذا لم تكن مضبوطة.
+    تقبل الأعداد من D-Bus والنصوص من systemctl show (بما فيها "[not set]").
+    A runtime property (MainPID, MemoryCurrent or CPUUsageNSec) as a number, or None when it
+    is not set. Accepts numbers from D-Bus and strings from systemctl show (including
+    "[not set]").
+    """
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    if value is None or value == UNSET_UINT64 or value == 0:
+        return None
+    return value
+
+
+def unit_object_path(unit_name):
+    """
+    مسار كائن الوحدة في D-Bus كما يبنيه systemd (bus_label_escape): كل حرف غير أبجدي رقمي، وكذلك
+    الرقم في أول الاسم، يصبح _xx بالست عشري.
+    The unit's D-Bus object path as systemd builds it (bus_label_escape): every non-alphanumeric
+    character, and a digit at the start of the name, becomes _xx in hex.
+    """
+    escaped = "".join(
+        c if c.isascii() and (c.isalpha() or (c.isdigit() and i > 0))
+        else "".join(f"_{byte:02x}" for byte in c.encode("utf-8"))
+        for i, c in enumerate(unit_name)
+    )
+    return f"{SYSTEMD_OBJECT_PATH}/unit/{escaped}"
+
+
+def unit_name_from_path(path):
+    """
+    عكس unit_object_path: اسم الوحدة من مسار كائنها، أو None إذا لم يكن مسار وحدة.
+    The inverse of unit_object_path: the unit name from its object path, or None if it is not
+    a unit path.
+    """
+    if not path.startswith(UNIT_PATH_PREFIX):
+        return None
+    escaped = path[len(UNIT_PATH_PREFIX):]
+    raw = bytearray()
+    i = 0
+    while i < len(escaped):
+        if escaped[i] == "_" and i + 3 <= len(escaped):
+            try:
+                raw.append(int(escaped[i + 1:i + 3], 16))
+                i += 3
+                continue
+            except ValueError:
+                pass
+        raw.extend(escaped[i].encode("ascii"))
+        i += 1
+    return raw.decode("utf-8", errors="replace")
+
+
+def has_processes(service):
+    """
+    هل قد يكون للخدمة عمليات (وبالتالي PID وذاكرة)؟ الخدمات المتوقفة أو الفاشلة أو المنتهية لا.
+    Whether the service may have processes (and so a PID and memory). Stopped, failed or
+    exited services do not.
+    """
+    return service["active"] in ("active", "activating", "deactivating", "reloading") and service["sub"] != "exited"
+
+
+def service_from_properties(name, properties):
+    service = service_dict(name, *(properties.get(key, "") for key in UNIT_PROPERTY_FIELDS))
+    for key, field in SERVICE_PROPERTY_FIELDS.items():
+        service[field] = runtime_value(properties.get(key))
+    return service
+
+
+def merge_unit_files(units, unit_files):
+    """
+    دمج الوحدات المحملة (قائمة قواميس) مع حالات ملفات الوحدات (قاموس الاسم -> الحالة).
+    ملفات الخدمات غير المحملة تُضاف كخدمات متوقفة حتى يمكن تفعيلها، عدا القوالب (foo@.service).
+    Merges the loaded units (list of dicts) with the unit file states (dict of name -> state).
+    Unloaded service files are added as stopped services so they can be enabled, except
+    templates (foo@.service).
+    """
+    services = []
+    seen = set()
+    for unit in units:
+        unit["unit_file_state"] = unit_files.get(unit["name"], unit["unit_file_state"])
+        services.append(unit)
+        seen.add(unit["name"])
+    for name, state in unit_files.items():
+        if name in seen or name.endswith("@.service"):
+            continue
+        services.append(service_dict(name, "not-loaded", "inactive", "dead", "", state))
+    services.sort(key=lambda service: service["name"])
+    return services
+
+
+class SystemdClient:
+    """
+    اتصال D-Bus دائم مع systemd (org.freedesktop.systemd1) عبر jeepney.
+    Persistent D-Bus connection to systemd (org.freedesktop.systemd1) through jeepney.
+
+    قائمة الوحدات تُجلب باستدعاء ListUnitsByPatterns واحد وحالات ملفاتها باستدعاء
+    ListUnitFilesByPatterns واحد، بحقول دقيقة بدلاً من تحليل نص systemctl. قراءة الخصائص
+    لعدة وحدات تُرسل كلها أولاً ثم تُجمع الردود (بدون انتظار كل رد على حدة).
+    The unit list is fetched with one ListUnitsByPatterns call and the unit file states with
+    one ListUnitFilesByPatterns call, with exact fields instead of parsing systemctl text.
+    Property reads for several units are all sent first and the replies collected afterwards
+    (without waiting for each reply in turn).
+
+    bus: "SYSTEM" أو "SESSION" أو عنوان ناقل (مثل ناقل خاص لخدمة systemd وهمية في الاختبارات).
+    bus: "SYSTEM", "SESSION" or a bus address (e.g. a private bus hosting a mock systemd in tests).
+    """
+
+    def __init__(self, bus="SYSTEM", timeout=CALL_TIMEOUT_SECONDS):
+        self.bus = bus
+        self.timeout = timeout
+        self._connection = None
+        self._lock = threading.Lock()
+        self._manager = DBusAddress(SYSTEMD_OBJECT_PATH, bus_name=SYSTEMD_BUS_NAME,
+                                    interface=MANAGER_INTERFACE) if _JEEPNEY_AVAILABLE else None
+
+    @staticmethod
+    def is_available():
+        return _JEEPNEY_AVAILABLE
+
+    def _connect(self):
+        if self._connection is None:
+            try:
+                self._connection = open_dbus_connection(bus=self.bus)
+            except Exception as e:
+                raise SystemdError(f"Could not connect to the {self.bus} bus: {e}")
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _drop_connection(self):
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    @staticmethod
+    def _reply_body(reply):
+        if reply.header.message_type == MessageType.error:
+            error_name = reply.header.fields.get(HeaderFields.error_name, "D-Bus error")
+            detail = reply.body[0] if reply.body else ""
+            raise SystemdError(f"{error_name}: {detail}")
+        return reply.body
+
+    def _send_all(self, messages):
+        """
+        إرسال عدة رسائل دفعة واحدة ثم جمع ردودها بالترتيب. يعاد الاتصال مرة واحدة إذا انقطع.
+        Sends several messages at once, then collects their replies in order. Reconnects once
+        if the connection dropped.
+        """
+        if not _JEEPNEY_AVAILABLE:
+            raise SystemdError("python-jeepney is not installed.")
+        with self._lock:
+            for attempt in (1, 2):
+                connection = self._connect()
+                try:
+                    serials = []
+                    for message in messages:
+                        serial = next(connection.outgoing_serial)
+                        connection.send(message, serial=serial)
+                        serials.append(serial)
+                    pending = set(serials)
+                    replies = {}
+                    while pending:
+                        reply = connection.receive(timeout=self.timeout)
+                        reply_to = reply.header.fields.get(HeaderFields.reply_serial)
+                        if reply_to in pending:
+                            pending.discard(reply_to)
+                            replies[reply_to] = reply
+                    return [replies[serial] for serial in serials]
+                except TimeoutError:
+                    self._drop_connection()
+                    raise SystemdError("Timed out waiting for systemd.")
+                except (OSError, EOFError, ConnectionError) as e:
+                    self._drop_connection()
+                    if attempt == 2:
+                        raise SystemdError(f"Lost the connection to systemd: {e}")
+
+    def _call_manager(self, method, signature=None, body=()):
+        message = new_method_call(self._manager, method, signature, body)
+        return self._reply_body(self._send_all([message])[0])
+
+    def list_units(self, patterns=("*.service",)):
+        """
+        الوحدات المحملة المطابقة للأنماط كقواميس خدمات.
+        Loaded units matching the patterns, as service dicts.
+        """
+        return self._units_from_body(self._call_manager("ListUnitsByPatterns", "asas", ([], list(patterns))))
+
+    def list_unit_files(self, patterns=("*.service",)):
+        """
+        قاموس اسم ملف الوحدة -> حالته (enabled أو disabled أو static ...).
+        Dict of unit file name -> its state (enabled, disabled, static, ...).
+        """
+        return self._unit_files_from_body(self._call_manager("ListUnitFilesByPatterns", "asas", ([], list(patterns))))
+
+    @staticmethod
+    def _units_from_body(body):
+        # (name, description, load, active, sub, following, path, job id, job type, job path)
+        return [service_dict(name, load, active, sub, description)
+                for name, description, load, active, sub, *_ in body[0]]
+
+    @staticmethod
+    def _unit_files_from_body(body):
+        return {path.rpartition("/")[2]: state for path, state in body[0]}
+
+    def list_services(self):
+        """
+        لقطة لكل الخدمات: حالاتها، حالات ملفاتها، العملية الرئيسية، الذاكرة ووقت المعالج.
+        القائمة وحالات الملفات تُطلب معاً في رحلة ذهاب وإياب واحدة، ثم خصائص التشغيل للخدمات
+        التي لها عمليات فقط في رحلة ثانية.
+        A snapshot of every service: states, unit file states, main PID, memory and CPU time.
+        The list and the unit file states are requested together in one round trip, then the
+        runtime properties of services that have processes only, in a second one.
+        """
+        patterns = ["*.service"]
+        units_reply, files_reply = self._send_all([
+            new_method_call(self._manager, "ListUnitsByPatterns", "asas", ([], patterns)),
+            new_method_call(self._manager, "ListUnitFilesByPatterns", "asas", ([], patterns)),
+        ])
+        units = self._units_from_body(self._reply_body(units_reply))
+        runtime = self.service_runtime(unit["name"] for unit in units if has_processes(unit))
+        for unit in units:
+            unit.update(runtime.get(unit["name"], ()))
+        return merge_unit_files(units, self._unit_files_from_body(self._reply_body(files_reply)))
+
+    @staticmethod
+    def _property_calls(unit_name, interface, properties):
+        address = DBusAddress(unit_object_path(unit_name), bus_name=SYSTEMD_BUS_NAME,
+                              interface=PROPERTIES_INTERFACE)
+        return [new_method_call(address, "Get", "ss", (interface, key)) for key in properties]
+
+    @staticmethod
+    def _runtime_from_replies(replies):
+        runtime = {}
+        for field, reply in zip(SERVICE_PROPERTY_FIELDS.values(), replies):
+            failed = reply.header.message_type == MessageType.error
+            # Get يعيد قيمة بالشكل (توقيع، قيمة)
+            # Get returns a (signature, value) variant
+            runtime[field] = None if failed else runtime_value(reply.body[0][1])
+        return runtime
+
+    def service_runtime(self, unit_names):
+        """
+        العملية الرئيسية والذاكرة ووقت المعالج لعدة خدمات، بطلبات Get صغيرة تُرسل كلها معاً.
+        تعيد قاموس الاسم -> {main_pid, memory, cpu_usage}.
+        Main PID, memory and CPU time for several services, with small Get requests all sent
+        together. Returns a dict of name -> {main_pid, memory, cpu_usage}.
+        """
+        unit_names = list(unit_names)
+        if not unit_names:
+            return {}
+        count = len(SERVICE_PROPERTY_FIELDS)
+        replies = self._send_all([message for name in unit_names
+                                  for message in self._property_calls(name, SERVICE_INTERFACE, SERVICE_PROPERTY_FIELDS)])
+        return {name: self._runtime_from_replies(replies[i * count:(i + 1) * count])
+                for i, name in enumerate(unit_names)}
+
+    def list_jobs(self):
+        """
+        الوظائف المعلقة في systemd كقاموس اسم الوحدة -> نوع الوظيفة (start، stop ...).
+        The jobs pending in systemd, as a dict of unit name -> job type (start, stop, ...).
+        """
+        # (id, unit, type, state, job path, unit path)
+        return {unit: job_type for _, unit, job_type, *_ in self._call_manager("ListJobs")[0]}
+
+    def unit_properties(self, unit_names, interface=UNIT_INTERFACE):
+        """
+        كل خصائص واجهة معينة لعدة وحدات، بإرسال الطلبات كلها دفعة واحدة.
+        تعيد قاموس اسم الوحدة -> قاموس الخاصية -> القيمة (الوحدات الفاشلة تُحذف).
+        Every property of an interface for several units, sending all requests at once.
+        Returns a dict of unit name -> dict of property -> value (failed units are left out).
+        """
+        unit_names = list(unit_names)
+        if not unit_names:
+            return {}
+        replies = self._send_all([
+            new_method_call(DBusAddress(unit_object_path(name), bus_name=SYSTEMD_BUS_NAME,
+                                        interface=PROPERTIES_INTERFACE), "GetAll", "s", (interface,))
+            for name in unit_names
+        ])
+        properties = {}
+        for name, reply in zip(unit_names, replies):
+            if reply.header.message_type == MessageType.error:
+                continue
+            # كل قيمة بالشكل (توقيع، قيمة) في jeepney
+            # jeepney returns every value as (signature, value)
+            properties[name] = {key: value for key, (_, value) in reply.body[0].items()}
+        return properties
+
+    def get_services(self, unit_names):
+        """
+        الحالة الحالية لعدة خدمات في رحلة ذهاب وإياب واحدة: قاموس الاسم -> قاموس الخدمة أو None
+        إذا لم تعد موجودة.
+        The current state of several services in a single round trip: dict of name -> service
+        dict, or None when it no longer exists.
+        """
+        unit_names = list(unit_names)
+        if not unit_names:
+            return {}
+        count = 1 + len(SERVICE_PROPERTY_FIELDS)
+        messages = []
+        for name in unit_names:
+            address = DBusAddress(unit_object_path(name), bus_name=SYSTEMD_BUS_NAME, interface=PROPERTIES_INTERFACE)
+            messages.append(new_method_call(address, "GetAll", "s", (UNIT_INTERFACE,)))
+            messages.extend(self._property_calls(name, SERVICE_INTERFACE, SERVICE_PROPERTY_FIELDS))
+        replies = self._send_all(messages)
+        services = {}
+        for i, name in enumerate(unit_names):
+            unit_reply = replies[i * count]
+            props = None
+            if unit_reply.header.message_type != MessageType.error:
+                props = {key: value for key, (_, value) in unit_reply.body[0].items()}
+            if props is None or (props.get("LoadState") == "not-found" and not props.get("UnitFileState")):
+                services[name] = None
+            else:
+                services[name] = service_from_properties(name, props)
+                services[name].update(self._runtime_from_replies(replies[i * count + 1:(i + 1) * count]))
+        return services
+
+    def _signal_event(self, message, suffix):
+        fields = message.header.fields
+        member = fields.get(HeaderFields.member)
+        if member in ("UnitNew", "UnitRemoved"):
+            name = message.body[0]
+            if not name.endswith(suffix):
+                return None
+            # لا يُعاد قراءة الوحدة المزالة: القراءة عبر D-Bus تحملها من جديد ثم تُزال مرة أخرى
+            # A removed unit is not re-read: reading it over D-Bus loads it again, and it would
+            # be removed again
+            return (EVENT_REFRESH, name, None) if member == "UnitNew" else (EVENT_UNLOADED, name, None)
+        if member in ("UnitFilesChanged", "Reloading"):
+            if member == "Reloading" and message.body and message.body[0]:
+                # بداية إعادة التحميل؛ الإشارة الثانية (False) تعني انتهاءه
+                # Reload started; the second signal (False) means it finished
+                return None
+            return (EVENT_RELOAD, None, None)
+        if member == "PropertiesChanged":
+            interface, changed, invalidated = message.body
+            if interface == UNIT_INTERFACE:
+                property_fields = UNIT_PROPERTY_FIELDS
+            elif interface == SERVICE_INTERFACE:
+                property_fields = SERVICE_PROPERTY_FIELDS
+            else:
+                return None
+            name = unit_name_from_path(fields.get(HeaderFields.path, ""))
+            if name is None or not name.endswith(suffix):
+                return None
+            # عند تغير ActiveState تتغير العملية والذاكرة أيضاً (وهي لا تُعلن بإشارات)، فتُعاد قراءة الخدمة
+            # When ActiveState changes the process and memory change too (they are not
+            # announced by signals), so the service is re-read
+            if "ActiveState" in changed or any(key in property_fields for key in invalidated):
+                return (EVENT_REFRESH, name, None)
+            update = {}
+            for key, (_, value) in changed.items():
+                if key in property_fields:
+                    update[property_fields[key]] = runtime_value(value) if interface == SERVICE_INTERFACE else value
+            return (EVENT_UPDATE, name, update) if update else None
+        return None
+
+    def watch(self, callback, stop_event, suffix=".service"):
+        """
+        حلقة مراقبة حاجبة (تُشغل في خيط منفصل) على اتصال خاص بها: تشترك في إشارات systemd
+        (UnitNew، UnitRemoved، PropertiesChanged، UnitFilesChanged) وتستدعي callback(event, name, fields)
+        لكل تغيير في وحدات تنتهي بـ suffix، حتى يُضبط stop_event.
+        Blocking watch loop (run it in its own thread) on its own connection: subscribes to
+        systemd's signals (UnitNew, UnitRemoved, PropertiesChanged, UnitFilesChanged) and calls
+        callback(event, name, fields) for every change to units ending in suffix, until
+        stop_event is set.
+
+        ترفع SystemdError إذا تعذر الاشتراك.
+        Raises SystemdError if subscribing fails.
+        """
+        if not _JEEPNEY_AVAILABLE:
+            raise SystemdError("python-jeepney is not installed.")
+        try:
+            connection = open_dbus_connection(bus=self.bus)
+        except Exception as e:
+            raise SystemdError(f"Could not connect to the {self.bus} bus: {e}")
+        try:
+            rules = [
+                MatchRule(type="signal", sender=SYSTEMD_BUS_NAME, interface=MANAGER_INTERFACE,
+                          path=SYSTEMD_OBJECT_PATH),
+                MatchRule(type="signal", sender=SYSTEMD_BUS_NAME, interface=PROPERTIES_INTERFACE,
+                          member="PropertiesChanged", path_namespace=SYSTEMD_OBJECT_PATH + "/unit"),
+            ]
+            try:
+                for rule in rules:
+                    self._reply_body(connection.send_and_get_reply(message_bus.AddMatch(rule),
+                                                                   timeout=self.timeout))
+                # systemd لا يرسل إشارات الوحدات إلا للعملاء المشتركين
+                # systemd only emits unit signals to subscribed clients
+                self._reply_body(connection.send_and_get_reply(
+                    new_method_call(self._manager, "Subscribe"), timeout=self.timeout))
+            except (OSError, EOFError) as e:
+                raise SystemdError(f"Could not subscribe to systemd signals: {e}")
+
+            while not stop_event.is_set():
+                try:
+                    message = connection.receive(timeout=WATCH_POLL_SECONDS)
+                except TimeoutError:
+                    continue
+                except (OSError, EOFError) as e:
+                    raise SystemdError(f"Lost the connection to systemd: {e}")
+                if message.header.message_type != MessageType.signal:
+                    continue
+                event = self._signal_event(message, suffix)
+                if event is not None:
+                    callback(*event)
+        finally:
+            connection.close()
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import shutil
+import subprocess
+import threading
+
+from .pacman_sync_db import PacmanSyncDB
+from .vercmp import vercmp
+
+
+class UpdateChecker:
+    """
+    فاحص تحديثات بدون صلاحيات جذر على طريقة checkupdates.
+    Rootless update checker in the style of checkupdates.
+
+    تتم مزامنة قواعد بيانات المستودعات في مجلد dbpath خاص (مع رابط لقاعدة البيانات المحلية)
+    عبر fakeroot، لذلك لا حاجة للجذر ولا يتم حجز قفل pacman الحقيقي. قائمة التحديثات
+    تُحسب بمقارنة الإصدارات مع قاعدة البيانات المحلية وتُحفظ حتى المزامنة التالية.
+    Repository databases are synced into a private dbpath (with a link to the local database)
+    through fakeroot, so no root is needed and the real pacman lock is never taken. The update
+    list is computed by comparing versions against the local database and cached until the
+    next sync.
+    """
+
+    SYNC_TIMEOUT_SECONDS = 300
+    # هامش لـ needs_sync: مؤقت الفحص يطلق كل N دقيقة بالضبط، فالفحص التالي قد يأتي قبل
+    # مرور N دقيقة كاملة على بداية المزامنة السابقة ببضعة أجزاء من الثانية
+    # Slack for needs_sync: the check timer fires exactly every N minutes, so the next check
+    # may come a few milliseconds before N full minutes have passed since the previous sync started
+    SYNC_MARGIN_SECONDS = 60
+
+    def __init__(self, config, local_db, cache_dir):
+        self.config = config
+        self.local_db = local_db
+        self.db_path = os.path.join(cache_dir, "checkup-db")
+        self.results_file = os.path.join(cache_dir, "updates.json")
+        self.sync_db = PacmanSyncDB(config, sync_db_path=os.path.join(self.db_path, "sync"))
+        self._lock = threading.Lock()
+        self._last_sync = 0
+        self._last_error = None
+        self._cached = None
+        self._cached_generation = None
+        self._saved_status = None
+        self._load_results()
+
+    def _load_results(self):
+        try:
+            with open(self.results_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._last_sync = data.get("last_sync", 0)
+            self._saved_status = data
+        except (OSError, ValueError):
+            self._last_sync = 0
+
+    def _save_results(self, status):
+        self._saved_status = status
+        try:
+            with open(self.results_file, "w", encoding="utf-8") as f:
+                json.dump(status, f)
+        except OSError as e:
+            print(f"Warning: Could not save update check results: {e}")
+
+    def _prepare_db_path(self):
+        os.makedirs(os.path.join(self.db_path, "sync"), exist_ok=True)
+        local_link = os.path.join(self.db_path, "local")
+        if not os.path.islink(local_link):
+            if os.path.exists(local_link):
+                shutil.rmtree(local_link)
+            os.symlink(self.config.local_db_path, local_link)
+
+    def sync(self):
+        """
+        مزامنة النسخة الخاصة من قواعد بيانات المستودعات. تعيد (نجاح، رسالة).
+        Syncs the private copy of the repository databases. Returns (success, message).
+        """
+        with self._lock:
+            try:
+                self._prepare_db_path()
+            except OSError as e:
+                self._last_error = f"Could not prepare '{self.db_path}': {e}"
+                return False, self._last_error
+
+            command = ["pacman", "-Sy", "--dbpath", self.db_path, "--logfile", "/dev/null"]
+            fakeroot = shutil.which("fakeroot")
+            if fakeroot:
+                command = [fakeroot, "--"] + command
+            elif os.geteuid() != 0:
+                # بدون fakeroot يرفض pacman المزامنة لغير الجذر؛ رسالة واضحة بدلاً من خطأ pacman العام
+                # Without fakeroot pacman refuses to sync for non-root users; a clear message
+                # instead of pacman's generic error
+                self._last_error = "fakeroot is not installed. Install the 'fakeroot' package to enable update checks."
+                return False, self._last_error
+
+            # يُسجل وقت بداية المزامنة وليس نهايتها، حتى لا تؤخر مدة المزامنة الفحص التالي
+            # The sync start time is recorded, not its end, so the sync duration does not delay the next check
+            started = time.time()
+            try:
+                result = subprocess.run(command, capture_output=True, text=True,
+                                        timeout=self.SYNC_TIMEOUT_SECONDS, stdin=subprocess.DEVNULL)
+            except FileNotFoundError:
+                self._last_error = "pacman command not found. Is Arch Linux installed?"
+                return False, self._last_error
+            except subprocess.TimeoutExpired:
+                self._last_error = "Timed out while syncing the update check databases."
+                return False, self._last_error
+
+            if result.returncode != 0:
+                self._last_error = f"Could not sync the update check databases: {result.stderr.strip()}"
+                return False, self._last_error
+
+            self._last_sync = started
+            self._last_error = None
+            self._cached = None
+        self.status()
+        return True, "Databases synced."
+
+    def _compute_updates(self):
+        """
+        مقارنة إصدارات الحزم المثبتة مع النسخة الخاصة من المستودعات.
+        Compares installed package versions against the private repository copy.
+        """
+        available = self.sync_db.packages()
+        updates = []
+        for name, installed in self.local_db.packages().items():
+            candidate = available.get(name)
+            if candidate is None or vercmp(candidate.version, installed.version) <= 0:
+                continue
+            updates.append({
+                "name": name,
+                "repo": candidate.repo,
+                "old_version": installed.version,
+                "new_version": candidate.version,
+                "download_size": candidate.csize,
+            })
+        updates.sort(key=lambda update: update["name"])
+        return updates
+
+    def pending_updates(self):
+        """
+        قائمة التحديثات المعلقة من الذاكرة المؤقتة. تُعاد حسابها فقط عند تغير قاعدة البيانات المحلية.
+        The cached pending-update list. Only recomputed when the local database changes.
+        """
+        with self._lock:
+            self.local_db.refresh()
+            if self._cached is None or self._cached_generation != self.local_db.generation:
+                self._cached = self._compute_updates() if self.sync_db.is_available() else []
+                self._cached_generation = self.local_db.generation
+            return self._cached
+
+    def status(self):
+        """
+        ملخص الحالة: عدد الحزم المثبتة، التحديثات، حجم التنزيل ووقت آخر مزامنة.
+        Status summary: installed count, updates, download size and last sync time.
+        """
+        updates = self.pending_updates()
+        status = {
+            "total": len(self.local_db.packages()),
+            "updates": updates,
+            "updates_count": len(updates),
+            "download_size": sum(update["download_size"] for update in updates),
+            "last_sync": self._last_sync,
+            "error": self._last_error,
+        }
+        if status != self._saved_status:
+            self._save_results(status)
+        return status
+
+    def cached_status(self):
+        """
+        آخر حالة محفوظة على القرص بدون أي حساب، لعرضها فوراً عند فتح التبويبة.
+        The last status saved on disk without any computation, shown instantly when the tab opens.
+        """
+        return self._saved_status
+
+    def needs_sync(self, interval_seconds):
+        if interval_seconds <= 0:
+            return True
+        return time.time() - self._last_sync >= interval_seconds - self.SYNC_MARGIN_SECONDS
@@ -0,0 +1,113 @@
+import functools
+
+
+def _rpmvercmp(a, b):
+    """
+    نقل مباشر لدالة rpmvercmp من libalpm لمقارنة جزء واحد من الإصدار.
+    Direct port of libalpm's rpmvercmp, comparing a single version segment.
+    """
+    if a == b:
+        return 0
+
+    one = two = 0
+    ptr1 = ptr2 = 0
+    len_a, len_b = len(a), len(b)
+
+    while one < len_a and two < len_b:
+        while one < len_a and not a[one].isalnum():
+            one += 1
+        while two < len_b and not b[two].isalnum():
+            two += 1
+
+        if one >= len_a or two >= len_b:
+            break
+
+        # إذا اختلف طول الفواصل فقد انتهت المقارنة
+        # If the separator lengths differ, the comparison is over
+        if (one - ptr1) != (two - ptr2):
+            return -1 if (one - ptr1) < (two - ptr2) else 1
+
+        ptr1, ptr2 = one, two
+        if a[ptr1].isdigit():
+            while ptr1 < len_a and a[ptr1].isdigit():
+                ptr1 += 1
+            while ptr2 < len_b and b[ptr2].isdigit():
+                ptr2 += 1
+            isnum = True
+        else:
+            while ptr1 < len_a and a[ptr1].isalpha():
+                ptr1 += 1
+            while ptr2 < len_b and b[ptr2].isalpha():
+                ptr2 += 1
+            isnum = False
+
+        seg1, seg2 = a[one:ptr1], b[two:ptr2]
+        if not seg1:
+            return -1
+        if not seg2:
+            return 1 if isnum else -1
+
+        if isnum:
+            seg1 = seg1.lstrip('0')
+            seg2 = seg2.lstrip('0')
+            if len(seg1) > len(seg2):
+                return 1
+            if len(seg2) > len(seg1):
+                return -1
+
+        if seg1 != seg2:
+            return -1 if seg1 < seg2 else 1
+
+        one, two = ptr1, ptr2
+
+    if one >= len_a and two >= len_b:
+        return 0
+
+    # لا نريد أبداً أن يتفوق جزء حرفي متبقٍ على نص فارغ
+    # We never want a remaining alpha string to beat an empty string
+    if (one >= len_a and not b[two].isalpha()) or (one < len_a and a[one].isalpha()):
+        return -1
+    return 1
+
+
+def _parse_evr(version):
+    """
+    تقسيم الإصدار إلى (epoch, version, release) كما يفعل parseEVR في libalpm.
+    Splits a version into (epoch, version, release) like libalpm's parseEVR.
+    """
+    pos = 0
+    while pos < len(version) and version[pos].isdigit():
+        pos += 1
+    if pos < len(version) and version[pos] == ':':
+        epoch = version[:pos] or "0"
+        rest = version[pos + 1:]
+    else:
+        epoch = "0"
+        rest = version
+    if '-' in rest:
+        ver, release = rest.rsplit('-', 1)
+    else:
+        ver, release = rest, None
+    return epoch, ver, release
+
+
+def vercmp(a, b):
+    """
+    مقارنة إصدارين بنفس قواعد pacman (vercmp). تعيد -1 أو 0 أو 1.
+    Compares two versions using pacman's rules (vercmp). Returns -1, 0 or 1.
+    """
+    if a == b:
+        return 0
+    epoch1, ver1, rel1 = _parse_evr(a)
+    epoch2, ver2, rel2 = _parse_evr(b)
+    result = _rpmvercmp(epoch1, epoch2)
+    if result == 0:
+        result = _rpmvercmp(ver1, ver2)
+        if result == 0 and rel1 is not None and rel2 is not None:
+            result = _rpmvercmp(rel1, rel2)
+    return result
+
+
+# مفتاح ترتيب للإصدارات يمكن استخدامه مع sorted()
+# Sort key for versions, usable with sorted()
+version_key = functools.cmp_to_key(vercmp)
@@ -0,0 +1,88 @@
+import datetime
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTabWidget, QTableWidget, QTableWidgetItem,
+    QHeaderView, QPushButton, QAbstractItemView
+)
+from PyQt5.QtCore import Qt
+from src.core.pacman_log import ACTIONS
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes}m {seconds}s"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
+def _format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ActivityDialog(QDialog):
+    """
+    نافذة إحصائيات نشاط الحزم المحسوبة من سجل pacman.
+    Package-activity statistics window computed from the pacman log.
+    """
+
+    def __init__(self, summary, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Package Activity")
+        self.setMinimumSize(700, 500)
+
+        layout = QVBoxLayout(self)
+
+        sessions = summary["sessions"]
+        totals = ", ".join(f"{summary['totals'][action]} {action}" for action in ACTIONS)
+        period = ""
+        if summary["first"] is not None:
+            period = f" between {_format_time(summary['first'])} and {_format_time(summary['last'])}"
+        summary_label = QLabel(
+            f"{summary['entries']} operations{period}: {totals}.\n"
+            f"{sessions['count']} upgrade sessions, average {_format_duration(sessions['average'])}, "
+            f"median {_format_duration(sessions['median'])}, total {_format_duration(sessions['total'])}."
+        )
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        tabs = QTabWidget()
+        # الأيام الأحدث أولاً
+        # Most recent days first
+        tabs.addTab(self._create_table(
+            ["Day"] + [action.capitalize() for action in ACTIONS],
+            list(reversed(summary["per_day"])),
+        ), "Per Day")
+        tabs.addTab(self._create_table(["Package", "Upgrades"], summary["top_upgraded"]), "Most Upgraded")
+        tabs.addTab(self._create_table(
+            ["Started", "Duration", "Upgrades"],
+            [(_format_time(start), _format_duration(duration), upgrades)
+             for start, duration, upgrades in sessions["longest"]],
+        ), "Longest Upgrade Sessions")
+        layout.addWidget(tabs)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addStretch(1)
+        ok_button = QPushButton("OK")
+        ok_button.clicked.connect(self.accept)
+        bottom_layout.addWidget(ok_button)
+        layout.addLayout(bottom_layout)
+
+    @staticmethod
+    def _create_table(headers, rows):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                # الأرقام تُخزن كأرقام حتى يكون الترتيب صحيحاً
+                # Numbers are stored as numbers so sorting works correctly
+                item.setData(Qt.DisplayRole, value)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        return table
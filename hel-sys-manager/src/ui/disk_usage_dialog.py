@@ -0,0 +1,83 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTabWidget, QTableWidget, QTableWidgetItem,
+    QHeaderView, QPushButton, QAbstractItemView
+)
+from PyQt5.QtCore import Qt
+from src.core.pacman_local_db import format_size
+
+
+class SizeItem(QTableWidgetItem):
+    """
+    خلية تعرض الحجم بصيغة مقروءة وتُرتب حسب عدد البايتات.
+    Cell showing a human-readable size that sorts by its byte count.
+    """
+
+    def __init__(self, size):
+        super().__init__(format_size(size) if size is not None else "")
+        self.size = size if size is not None else -1
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        if isinstance(other, SizeItem):
+            return self.size < other.size
+        return super().__lt__(other)
+
+
+class DiskUsageDialog(QDialog):
+    """
+    نافذة استخدام القرص: أكبر الحزم، والمجاميع حسب المستودع والمجموعة.
+    Disk usage window: largest packages, and totals per repository and group.
+    """
+
+    def __init__(self, summary, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Disk Usage")
+        self.setMinimumSize(750, 550)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(
+            f"{summary['count']} installed packages use {format_size(summary['total'])}. "
+            "\"Freed on Removal\" includes dependencies nothing else needs (pacman -Rns)."
+        ))
+
+        tabs = QTabWidget()
+        tabs.addTab(self._create_table(
+            ["Package", "Version", "Repository", "Installed Size", "Freed on Removal"],
+            summary["packages"], size_columns=(3, 4),
+        ), "Packages")
+        tabs.addTab(self._create_table(
+            ["Repository", "Packages", "Installed Size"], summary["repos"], size_columns=(2,),
+        ), "Repositories")
+        tabs.addTab(self._create_table(
+            ["Group", "Packages", "Installed Size"], summary["groups"], size_columns=(2,),
+        ), "Groups")
+        layout.addWidget(tabs)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addStretch(1)
+        ok_button = QPushButton("OK")
+        ok_button.clicked.connect(self.accept)
+        bottom_layout.addWidget(ok_button)
+        layout.addLayout(bottom_layout)
+
+    @staticmethod
+    def _create_table(headers, rows, size_columns=()):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                if column in size_columns:
+                    item = SizeItem(value)
+                else:
+                    item = QTableWidgetItem()
+                    item.setData(Qt.DisplayRole, value)
+                table.setItem(row, column, item)
+        # الترتيب الافتراضي حسب الحجم تنازلياً؛ النقر على أي عمود يعيد الترتيب
+        # Sorted by size, largest first, by default; clicking any header re-sorts
+        table.setSortingEnabled(True)
+        table.sortItems(size_columns[0], Qt.DescendingOrder)
+        return table
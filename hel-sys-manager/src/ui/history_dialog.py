@@ -0,0 +1,189 @@
+import datetime
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QDateEdit,
+    QCheckBox, QTableView, QHeaderView, QPushButton, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QDate, QFileSystemWatcher
+from src.core.pacman_log import ACTIONS
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    نموذج جدول افتراضي لسجل pacman: يحتفظ فقط بأرقام المدخلات المطابقة ويحلل الصفوف الظاهرة فقط.
+    Virtual table model for the pacman log: keeps only the matching entry indices and parses
+    only the rows that are actually shown.
+    """
+
+    HEADERS = ["Date", "Action", "Package", "Old Version", "New Version"]
+
+    def __init__(self, pacman_log, parent=None):
+        super().__init__(parent)
+        self.pacman_log = pacman_log
+        self.indices = range(0)
+
+    def set_indices(self, indices):
+        self.beginResetModel()
+        self.indices = indices
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.indices)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        entry = self.pacman_log.entry(self.indices[index.row()])
+        column = index.column()
+        if column == 0:
+            return datetime.datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        if column == 1:
+            return entry.action
+        if column == 2:
+            return entry.package
+        if column == 3:
+            return entry.old_version
+        return entry.new_version
+
+
+class HistoryDialog(QDialog):
+    """
+    نافذة عرض سجل الحزم مع فلاتر للتاريخ والعملية واسم الحزمة.
+    Package history window with date-range, action and package filters.
+    """
+
+    def __init__(self, pacman_log, parent=None):
+        super().__init__(parent)
+        self.pacman_log = pacman_log
+        self.setWindowTitle("Package History")
+        self.setMinimumSize(800, 500)
+
+        layout = QVBoxLayout(self)
+
+        # شريط الفلاتر
+        # Filter bar
+        filters_layout = QHBoxLayout()
+        self.from_check = QCheckBox("From")
+        self.from_date = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.from_date.setCalendarPopup(True)
+        self.to_check = QCheckBox("To")
+        self.to_date = QDateEdit(QDate.currentDate())
+        self.to_date.setCalendarPopup(True)
+        self.action_combo = QComboBox()
+        self.action_combo.addItem("All actions")
+        self.action_combo.addItems(ACTIONS)
+        self.package_input = QLineEdit()
+        self.package_input.setPlaceholderText("Filter by package...")
+
+        # متابعة السجل مباشرة أثناء المعاملات الجارية
+        # Follow the log live while transactions are running
+        self.live_check = QCheckBox("Live")
+        self.live_check.setToolTip("Show new log entries as they are written")
+
+        for widget in (self.from_check, self.from_date, self.to_check, self.to_date,
+                       self.action_combo, self.package_input, self.live_check):
+            filters_layout.addWidget(widget)
+        layout.addLayout(filters_layout)
+
+        self.model = HistoryTableModel(pacman_log, self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table_view.verticalHeader().hide()
+        # ارتفاع صف ثابت حتى لا يحتاج Qt لقياس كل الصفوف
+        # Fixed row height so Qt never has to measure every row
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table_view)
+
+        bottom_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        bottom_layout.addWidget(self.count_label)
+        bottom_layout.addStretch(1)
+        ok_button = QPushButton("OK")
+        ok_button.clicked.connect(self.accept)
+        bottom_layout.addWidget(ok_button)
+        layout.addLayout(bottom_layout)
+
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self._apply_filters)
+
+        self.from_check.toggled.connect(self.filter_timer.start)
+        self.to_check.toggled.connect(self.filter_timer.start)
+        self.from_date.dateChanged.connect(self.filter_timer.start)
+        self.to_date.dateChanged.connect(self.filter_timer.start)
+        self.action_combo.currentIndexChanged.connect(self.filter_timer.start)
+        self.package_input.textChanged.connect(self.filter_timer.start)
+
+        # QFileSystemWatcher يستخدم inotify على لينكس؛ نجمع التغييرات المتتالية في تحديث واحد
+        # QFileSystemWatcher uses inotify on Linux; bursts of changes are coalesced into one refresh
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_log_changed)
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(300)
+        self.live_timer.timeout.connect(self._refresh_log)
+        self.live_check.toggled.connect(self._set_live)
+
+        self._apply_filters()
+        self.table_view.scrollToBottom()
+
+    @staticmethod
+    def _date_to_timestamp(qdate, end_of_day=False):
+        day = datetime.datetime(qdate.year(), qdate.month(), qdate.day())
+        if end_of_day:
+            day += datetime.timedelta(days=1, microseconds=-1)
+        return day.timestamp()
+
+    def _apply_filters(self):
+        start_time = self._date_to_timestamp(self.from_date.date()) if self.from_check.isChecked() else None
+        end_time = self._date_to_timestamp(self.to_date.date(), end_of_day=True) if self.to_check.isChecked() else None
+        actions = {self.action_combo.currentText()} if self.action_combo.currentIndex() > 0 else None
+        package = self.package_input.text().strip() or None
+
+        indices = self.pacman_log.filter(start_time, end_time, actions, package)
+        self.model.set_indices(indices)
+        self.count_label.setText(f"{len(indices)} of {len(self.pacman_log)} entries")
+
+    def _set_live(self, enabled):
+        log_path = self.pacman_log.log_path
+        if enabled:
+            self.watcher.addPath(log_path)
+            self._refresh_log()
+        elif log_path in self.watcher.files():
+            self.watcher.removePath(log_path)
+
+    def _on_log_changed(self, path):
+        # بعد التدوير يُستبدل الملف ويفقد المراقب مساره، لذلك نعيد إضافته
+        # After rotation the file is replaced and the watcher drops it, so add it back
+        if path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.live_timer.start()
+
+    def _refresh_log(self):
+        at_bottom = self.table_view.verticalScrollBar().value() == self.table_view.verticalScrollBar().maximum()
+        try:
+            added = self.pacman_log.refresh()
+        except OSError as e:
+            self.count_label.setText(f"Could not read the log: {e}")
+            return
+        if added or len(self.model.indices) > len(self.pacman_log):
+            self._apply_filters()
+            if at_bottom:
+                self.table_view.scrollToBottom()
+
+    def done(self, result):
+        self.live_timer.stop()
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        super().done(result)
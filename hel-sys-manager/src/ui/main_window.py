@@ -8,9 +8,11 @@ import os
 from .system_tab import SystemTab
 from .services_tab import ServicesTab
 from .packages_tab import PackagesTab
+from .system_update_tab import SystemUpdateTab
 from .dotfiles_tab import DotfilesTab
 from .about_dialog import AboutDialog 
 from .help_dialog import HelpDialog # Import the new help dialog
+from src.core.package_handler import PackageHandler
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -44,7 +46,11 @@ class MainWindow(QMainWindow):
 
         self.tab_widget.addTab(SystemTab(), self.system_icon, "System")
         self.tab_widget.addTab(ServicesTab(), self.services_icon, "Services")
-        self.tab_widget.addTab(PackagesTab(), self.packages_icon, "Packages")
+        # معالج حزم واحد مشترك بين تبويبي الحزم والتحديثات
+        # One package handler shared by the Packages and Updates tabs
+        self.package_handler = PackageHandler()
+        self.tab_widget.addTab(PackagesTab(self.package_handler), self.packages_icon, "Packages")
+        self.tab_widget.addTab(SystemUpdateTab(self.package_handler), self.packages_icon, "Updates")
         self.tab_widget.addTab(DotfilesTab(), self.dotfiles_icon, "Dotfiles")
 
     def _create_menu_bar(self):
@@ -0,0 +1,152 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QCheckBox, QPlainTextEdit, QPushButton
+)
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+from src.core.pacman_local_db import format_size
+
+
+class CleanupPlanWorker(QThread):
+    # (keep_versions، uninstalled_only، نجاح، الخطة أو رسالة الخطأ)
+    # (keep_versions, uninstalled_only, success, plan or error message)
+    plan_ready = pyqtSignal(int, bool, bool, object)
+
+    def __init__(self, handler, keep_versions, uninstalled_only):
+        super().__init__()
+        self.handler = handler
+        self.keep_versions = keep_versions
+        self.uninstalled_only = uninstalled_only
+
+    def run(self):
+        success, plan = self.handler.get_cache_cleanup_plan(self.keep_versions, self.uninstalled_only)
+        self.plan_ready.emit(self.keep_versions, self.uninstalled_only, success, plan)
+
+
+class PackageCacheDialog(QDialog):
+    """
+    معاينة سياسة تنظيف ذاكرة الحزم المؤقتة. عند الموافقة تكون الأرشيفات المختارة في self.archives.
+    Previews the package cache cleanup policy. When accepted, the chosen archives are in self.archives.
+    """
+
+    def __init__(self, handler, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.archives = []
+        self.setWindowTitle("Package Cache")
+        self.setMinimumSize(700, 500)
+
+        layout = QVBoxLayout(self)
+
+        policy_layout = QHBoxLayout()
+        policy_layout.addWidget(QLabel("Keep the last"))
+        self.keep_spin = QSpinBox()
+        self.keep_spin.setRange(0, 50)
+        self.keep_spin.setValue(3)
+        policy_layout.addWidget(self.keep_spin)
+        policy_layout.addWidget(QLabel("versions of each package"))
+        self.uninstalled_check = QCheckBox("Only uninstalled packages")
+        policy_layout.addWidget(self.uninstalled_check)
+        policy_layout.addStretch(1)
+        layout.addLayout(policy_layout)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.archives_view = QPlainTextEdit()
+        self.archives_view.setReadOnly(True)
+        layout.addWidget(self.archives_view)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addStretch(1)
+        self.clean_button = QPushButton("Clean Cache")
+        self.clean_button.setEnabled(False)
+        self.clean_button.clicked.connect(self._clean)
+        bottom_layout.addWidget(self.clean_button)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        bottom_layout.addWidget(cancel_button)
+        layout.addLayout(bottom_layout)
+
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(150)
+        self.preview_timer.timeout.connect(self._update_preview)
+        self.keep_spin.valueChanged.connect(self.preview_timer.start)
+        self.uninstalled_check.toggled.connect(self.preview_timer.start)
+
+        # فحص الذاكرة المؤقتة يتم في خيط؛ طلب واحد فقط في كل مرة، ويُعاد إذا تغيرت السياسة أثناءه
+        # The cache is scanned on a worker thread; one request at a time, repeated if the policy
+        # changed meanwhile
+        self.plan_worker = None
+        self._preview_pending = False
+        self.summary_label.setText("Scanning the package cache...")
+        self._update_preview()
+
+    def _policy(self):
+        return self.keep_spin.value(), self.uninstalled_check.isChecked()
+
+    def _update_preview(self):
+        if self.plan_worker is not None:
+            self._preview_pending = True
+            return
+        self._preview_pending = False
+        self.clean_button.setEnabled(False)
+        self.plan_worker = CleanupPlanWorker(self.handler, *self._policy())
+        self.plan_worker.plan_ready.connect(self._handle_plan)
+        self.plan_worker.start()
+
+    def _handle_plan(self, keep_versions, uninstalled_only, success, plan):
+        if self.sender() is not self.plan_worker:
+            return
+        self.plan_worker.wait()
+        self.plan_worker = None
+        if self._preview_pending or (keep_versions, uninstalled_only) != self._policy():
+            self._update_preview()
+            return
+        self._show_plan(success, plan)
+
+    def _clean(self):
+        """
+        إعادة حساب الخطة مباشرة قبل القبول حتى لا تُحذف أرشيفات من معاينة قديمة. إذا تغيرت
+        الخطة تُعرض من جديد ليؤكدها المستخدم.
+        Recomputes the plan right before accepting so archives from a stale preview are never
+        deleted. If the plan changed it is shown again for the user to confirm.
+        """
+        self.preview_timer.stop()
+        self._stop_plan_worker()
+        success, plan = self.handler.get_cache_cleanup_plan(*self._policy())
+        shown = self.archives
+        self._show_plan(success, plan)
+        if success and self.archives and self.archives == shown:
+            self.accept()
+
+    def _stop_plan_worker(self):
+        if self.plan_worker is not None:
+            self.plan_worker.wait()
+            self.plan_worker = None
+        self._preview_pending = False
+
+    def done(self, result):
+        # لا يُترك خيط الفحص يعمل بعد إغلاق النافذة
+        # The scan thread is not left running once the dialog closes
+        self.preview_timer.stop()
+        self._stop_plan_worker()
+        super().done(result)
+
+    def _show_plan(self, success, plan):
+        if not success:
+            self.archives = []
+            self.summary_label.setText(plan)
+            self.archives_view.clear()
+            self.clean_button.setEnabled(False)
+            return
+
+        self.archives = plan["archives"]
+        self.summary_label.setText(
+            f"The cache holds {plan['total_count']} archives ({format_size(plan['total_size'])}). "
+            f"This policy removes {len(self.archives)} of them, freeing {format_size(plan['size'])}."
+        )
+        self.archives_view.setPlainText("\n".join(
+            f"{archive.filename} ({format_size(archive.size)})" for archive in self.archives
+        ))
+        self.clean_button.setEnabled(bool(self.archives))
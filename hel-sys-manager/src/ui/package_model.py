@@ -0,0 +1,254 @@
+from array import array
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from src.core.pacman_local_db import format_size
+from src.core.vercmp import version_key
+
+
+class PackageTableModel(QAbstractTableModel):
+    """
+    نموذج جدول للحزم مبني على مخزن أعمدة مضغوط بدلاً من عنصر واجهة لكل صف.
+    Table model for packages backed by a compact columnar store instead of one widget item per row.
+
+    الأسماء والإصدارات قوائم نصوص، والمستودعات أرقام في جدول أسماء صغير، والأحجام مصفوفة
+    array('q')، وحالة التثبيت bytearray. الصفوف تُكشف للعرض على دفعات عبر fetchMore.
+    Names and versions are string lists, repositories are ids into a small name table, sizes
+    are an array('q') and the installed flags a bytearray. Rows are exposed to the view in
+    batches through fetchMore.
+
+    كل صف يُضاف كـ (الاسم، الإصدار، المستودع، الحجم أو None، مثبتة).
+    Each row is added as (name, version, repo, size or None, installed).
+    """
+
+    COLUMNS = ("Name", "Version", "Repository", "Size", "Installed")
+    NAME, VERSION, REPO, SIZE, INSTALLED = range(len(COLUMNS))
+    # عدد الصفوف التي تُكشف للعرض في كل مرة
+    # Number of rows exposed to the view at a time
+    FETCH_BATCH = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._clear_store()
+        # رسالة تظهر كصف وحيد غير قابل للتحديد عندما لا توجد نتائج
+        # Message shown as a single, unselectable row when there are no results
+        self._message = None
+
+    def _clear_store(self):
+        self._names = []
+        self._versions = []
+        self._repo_ids = array('H')
+        self._repo_names = []
+        self._repo_lookup = {}
+        self._sizes = array('q')
+        self._installed = bytearray()
+        self._loaded = 0
+
+    def _append_to_store(self, rows):
+        repo_lookup = self._repo_lookup
+        for name, version, repo, size, installed in rows:
+            repo_id = repo_lookup.get(repo)
+            if repo_id is None:
+                repo_id = repo_lookup[repo] = len(self._repo_names)
+                self._repo_names.append(repo)
+            self._names.append(name)
+            self._versions.append(version)
+            self._repo_ids.append(repo_id)
+            self._sizes.append(size if size is not None else -1)
+            self._installed.append(1 if installed else 0)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._clear_store()
+        self._message = None
+        self._append_to_store(rows)
+        self._loaded = min(len(self._names), self.FETCH_BATCH)
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """
+        إضافة صفوف (مثل دفعات نتائج البحث). تُكشف فوراً فقط حتى تمتلئ الدفعة الأولى.
+        Adds rows (e.g. search result chunks). They are exposed right away only until the
+        first batch is full.
+        """
+        if not rows:
+            return
+        if self._message is not None:
+            self.clear()
+        self._append_to_store(rows)
+        visible = min(len(self._names), self.FETCH_BATCH)
+        if visible > self._loaded:
+            self.beginInsertRows(QModelIndex(), self._loaded, visible - 1)
+            self._loaded = visible
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._clear_store()
+        self._message = None
+        self.endResetModel()
+
+    def set_message(self, message):
+        self.beginResetModel()
+        self._clear_store()
+        self._message = message
+        self.endResetModel()
+
+    def total_rows(self):
+        return len(self._names)
+
+    def name(self, row):
+        return self._names[row]
+
+    def is_installed(self, row):
+        return bool(self._installed[row])
+
+    def has_packages(self):
+        return bool(self._names)
+
+    # --- واجهة QAbstractTableModel / QAbstractTableModel interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._message is not None:
+            return 1
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._names)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        remaining = len(self._names) - self._loaded
+        if remaining <= 0:
+            return
+        count = min(remaining, self.FETCH_BATCH)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if self._message is not None:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if self._message is not None:
+            return self._message if role == Qt.DisplayRole and column == self.NAME else None
+
+        if role == Qt.DisplayRole:
+            if column == self.NAME:
+                return self._names[row]
+            if column == self.VERSION:
+                return self._versions[row]
+            if column == self.REPO:
+                return self._repo_names[self._repo_ids[row]]
+            if column == self.SIZE:
+                size = self._sizes[row]
+                return format_size(size) if size >= 0 else ""
+            if column == self.INSTALLED:
+                return "Yes" if self._installed[row] else ""
+        elif role == Qt.TextAlignmentRole and column == self.SIZE:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        ترتيب المخزن كله (وليس فقط الصفوف المكشوفة) حسب العمود.
+        Sorts the whole store (not only the exposed rows) by the column.
+        """
+        if column < 0 or self._message is not None or not self._names:
+            return
+        if column == self.NAME:
+            keys = [name.lower() for name in self._names]
+        elif column == self.VERSION:
+            # ترتيب pacman (vercmp) وليس ترتيب النصوص: 1.10 بعد 1.9. كل إصدار مميز يُقارن مرة واحدة
+            # pacman's order (vercmp), not string order: 1.10 comes after 1.9. Each distinct
+            # version is compared once
+            ranks = {version: rank for rank, version in enumerate(sorted(set(self._versions), key=version_key))}
+            keys = [ranks[version] for version in self._versions]
+        elif column == self.REPO:
+            keys = [self._repo_names[repo_id] for repo_id in self._repo_ids]
+        elif column == self.SIZE:
+            keys = self._sizes
+        else:
+            keys = self._installed
+        order_ids = sorted(range(len(keys)), key=keys.__getitem__, reverse=order == Qt.DescendingOrder)
+
+        self.layoutAboutToBeChanged.emit()
+        # تحديث الفهارس الدائمة (التحديد) لتتبع صفوفها بعد الترتيب
+        # Update persistent indexes (the selection) so they follow their rows after sorting
+        new_positions = [0] * len(order_ids)
+        for new_row, old_row in enumerate(order_ids):
+            new_positions[old_row] = new_row
+        self._names = [self._names[i] for i in order_ids]
+        self._versions = [self._versions[i] for i in order_ids]
+        self._repo_ids = array('H', (self._repo_ids[i] for i in order_ids))
+        self._sizes = array('q', (self._sizes[i] for i in order_ids))
+        self._installed = bytearray(self._installed[i] for i in order_ids)
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            new_row = new_positions[index.row()]
+            if new_row >= self._loaded:
+                # صف خرج من الجزء المكشوف: يتم إسقاطه من التحديد
+                # A row that moved out of the exposed part is dropped from the selection
+                new_indexes.append(QModelIndex())
+            else:
+                new_indexes.append(self.index(new_row, index.column()))
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+
+class PackageFilterProxyModel(QSortFilterProxyModel):
+    """
+    وسيط ترشيح فوق PackageTableModel. الترتيب يُمرر للنموذج المصدر حتى يشمل كل الصفوف وليس
+    الدفعات المكشوفة فقط.
+    Filtering proxy over PackageTableModel. Sorting is forwarded to the source model so it
+    covers every row, not only the exposed batches.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._installed_only = False
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterKeyColumn(PackageTableModel.NAME)
+
+    def set_installed_only(self, installed_only):
+        self._installed_only = installed_only
+        if installed_only:
+            # الترشيح يحتاج كل الصفوف؛ كشفها رخيص لأنها في الذاكرة أصلاً
+            # Filtering needs every row; exposing them is cheap since they are already in memory
+            self.sourceModel().fetch_all()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        model = self.sourceModel()
+        if self._installed_only and model.has_packages() and not model.is_installed(source_row):
+            return False
+        return super().filterAcceptsRow(source_row, source_parent)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def package_name(self, proxy_row):
+        source_row = self.mapToSource(self.index(proxy_row, 0)).row()
+        model = self.sourceModel()
+        if source_row < 0 or not model.has_packages():
+            return None
+        return model.name(source_row)
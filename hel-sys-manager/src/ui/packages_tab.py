@@ -1,17 +1,30 @@
 import sys
+import threading
+from collections import OrderedDict
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout,
-    QListWidget, QTextEdit, QMessageBox, QDialog, QProgressBar
+    QTableView, QAbstractItemView, QHeaderView, QCheckBox, QTextEdit, QMessageBox, QDialog,
+    QProgressBar, QApplication, QInputDialog, QFileDialog, QComboBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QTimer, QFileSystemWatcher, pyqtSignal
 from PyQt5.QtGui import QCursor
 import os
 from src.core.package_handler import PackageHandler
+from src.core.pacman_log import PacmanLog
+from src.core.pacman_local_db import format_size
+from .history_dialog import HistoryDialog
+from .activity_dialog import ActivityDialog
+from .disk_usage_dialog import DiskUsageDialog
+from .package_cache_dialog import PackageCacheDialog
+from .package_model import PackageTableModel, PackageFilterProxyModel
 
 # تعريف Worker Thread لتشغيل العمليات الطويلة في الخلفية
 class Worker(QThread):
-    # تم تغيير الإشارة لتصبح pyqtSignal(bool, object) لقبول أي نوع للمعامل الثاني
-    finished = pyqtSignal(bool, object)
+    # تم تغيير الإشارة لتصبح pyqtSignal(bool, object) لقبول أي نوع للمعامل الثاني.
+    # لا تُسمى finished حتى لا تحجب QThread.finished المدمجة (تُطلق من داخل run() قبل انتهاء الخيط)
+    # Not named finished so it does not shadow the built-in QThread.finished (it is emitted
+    # from inside run(), before the thread has ended)
+    result_ready = pyqtSignal(bool, object)
 
     def __init__(self, handler_method, *args, **kwargs):
         super().__init__()
@@ -21,14 +34,227 @@ class Worker(QThread):
 
     def run(self):
         success, result = self.handler_method(*self.args, **self.kwargs)
-        self.finished.emit(success, result)
+        self.result_ready.emit(success, result)
+
+
+# Worker لعمليات pacman المميزة: يبث كل سطر مخرجات وكل حدث تقدم كإشارة Qt أثناء التنفيذ
+# Worker for privileged pacman operations: emits every output line and progress event as a
+# Qt signal while the command is still running
+class StreamingWorker(Worker):
+    output_line = pyqtSignal(str)
+    progress_event = pyqtSignal(dict)
+
+    def run(self):
+        success, result = self.handler_method(
+            *self.args,
+            output_callback=self.output_line.emit,
+            progress_callback=self.progress_event.emit,
+            **self.kwargs
+        )
+        self.result_ready.emit(success, result)
+
+
+# خيط بحث دائم واحد: كل استعلام جديد يلغي الاستعلام السابق بدلاً من إنشاء خيط جديد لكل بحث
+# A single long-lived search thread: each new query supersedes the previous one instead of
+# starting a new thread per search
+class SearchWorker(QThread):
+    # (رقم الجيل، دفعة من النتائج، هل انتهت النتائج)
+    # (generation, chunk of results, whether results are complete)
+    results_ready = pyqtSignal(int, list, bool)
+    search_failed = pyqtSignal(int, str)
+
+    CHUNK_SIZE = 100
+
+    def __init__(self, search_method):
+        super().__init__()
+        self.search_method = search_method
+        self._condition = threading.Condition()
+        self._pending = None
+        self._generation = 0
+        self._stopping = False
+
+    def submit(self, query):
+        """
+        جدولة استعلام جديد وإرجاع رقم الجيل الخاص به. أي استعلام سابق لم يكتمل يتم تجاهله.
+        Schedules a new query and returns its generation. Any unfinished earlier query is dropped.
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, query)
+            self._condition.notify()
+            return self._generation
+
+    def cancel(self):
+        """
+        إلغاء أي استعلام معلق أو جارٍ دون جدولة استعلام جديد.
+        Cancels any pending or running query without scheduling a new one.
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+            return self._generation
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.wait()
+
+    def _is_superseded(self, generation):
+        with self._condition:
+            return self._stopping or generation != self._generation
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                generation, query = self._pending
+                self._pending = None
+
+            # استثناء غير متوقع يجب ألا يقتل الخيط الدائم، وإلا توقفت كل عمليات البحث اللاحقة
+            # An unexpected exception must not kill the long-lived thread, or every later
+            # search would silently stop working
+            try:
+                success, result = self.search_method(query)
+            except Exception as e:
+                success, result = False, f"Search failed: {e}"
+            if self._is_superseded(generation):
+                continue
+            if not success or not isinstance(result, list):
+                self.search_failed.emit(generation, str(result))
+                continue
+
+            # إرسال النتائج على دفعات حتى تظهر أولاً بأول دون حجب الواجهة
+            # Stream results in chunks so they show up progressively without blocking the UI
+            if not result:
+                self.results_ready.emit(generation, [], True)
+            for start in range(0, len(result), self.CHUNK_SIZE):
+                if self._is_superseded(generation):
+                    break
+                chunk = result[start:start + self.CHUNK_SIZE]
+                self.results_ready.emit(generation, chunk, start + self.CHUNK_SIZE >= len(result))
+
+
+# خيط دائم لجلب تفاصيل الحزم دفعة واحدة خارج خيط الواجهة
+# Long-lived thread fetching package details in batches off the GUI thread
+class DetailsWorker(QThread):
+    # قاموس الاسم -> (نجاح، نص التفاصيل)
+    # dict of name -> (success, details text)
+    details_ready = pyqtSignal(dict)
+
+    def __init__(self, batch_method):
+        super().__init__()
+        self.batch_method = batch_method
+        self._condition = threading.Condition()
+        self._pending = []
+        self._stopping = False
+
+    def request(self, package_names, urgent=False):
+        """
+        إضافة أسماء إلى الطلب التالي. الطلبات العاجلة (الحزمة المحددة) تتقدم على التحميل المسبق.
+        Adds names to the next batch. Urgent requests (the selected package) jump ahead of prefetching.
+        """
+        with self._condition:
+            for name in package_names:
+                if name in self._pending:
+                    if not urgent:
+                        continue
+                    self._pending.remove(name)
+                if urgent:
+                    self._pending.insert(0, name)
+                else:
+                    self._pending.append(name)
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                batch = self._pending
+                self._pending = []
+            self.details_ready.emit(self.batch_method(batch))
+
 
 class PackagesTab(QWidget):
-    def __init__(self):
+    # مدة الانتظار بعد آخر ضغطة مفتاح قبل بدء البحث (بالمللي ثانية)
+    # Delay after the last keystroke before searching (milliseconds)
+    SEARCH_DEBOUNCE_MS = 250
+    # الحد الأقصى لعدد الحزم المحفوظة تفاصيلها في الذاكرة
+    # Maximum number of packages whose details are kept in memory
+    DETAILS_CACHE_SIZE = 512
+    # عدد أكبر الحزم المعروضة في نافذة استخدام القرص
+    # Number of largest packages listed in the disk usage window
+    DISK_USAGE_TOP_N = 500
+    # مهلة تجميع تغييرات مجلد ذاكرة الحزم قبل إعادة الفهرسة
+    # Delay that coalesces package cache directory changes before re-indexing
+    CACHE_REFRESH_DELAY_MS = 500
+
+    def __init__(self, handler=None):
         super().__init__()
-        self.handler = PackageHandler()
+        self.handler = handler or PackageHandler()
         self._setup_ui()
         self.worker = None
+        # خيوط استُبدلت قبل أن تنتهي؛ تبقى هنا حتى تطلق QThread.finished المدمجة
+        # Threads replaced before they ended; kept here until the built-in QThread.finished fires
+        self._stopping_workers = set()
+
+        self.search_generation = 0
+        self._search_results_started = False
+        self.search_worker = SearchWorker(self.handler.search_package_rows)
+        self.search_worker.results_ready.connect(self._handle_search_chunk)
+        self.search_worker.search_failed.connect(self._handle_search_failed)
+        self.search_worker.start()
+
+        self.details_cache = OrderedDict()
+        self.details_worker = DetailsWorker(self.handler.get_packages_details)
+        self.details_worker.details_ready.connect(self._handle_details_ready)
+        self.details_worker.start()
+
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.search_worker.stop)
+            app.aboutToQuit.connect(self.details_worker.stop)
+
+        # التحميل المسبق لتفاصيل الصفوف الظاهرة بعد توقف التمرير
+        # Prefetch details for the visible rows once scrolling settles
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(100)
+        self.prefetch_timer.timeout.connect(self._prefetch_visible_details)
+        self.package_view.verticalScrollBar().valueChanged.connect(self.prefetch_timer.start)
+
+        self.search_debounce_timer = QTimer(self)
+        self.search_debounce_timer.setSingleShot(True)
+        self.search_debounce_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_debounce_timer.timeout.connect(self._run_incremental_search)
+        self.search_input.textChanged.connect(self._on_search_text_changed)
+
+        # فهرس الإصدارات المخزنة يُحدّث عند تغير مجلدات ذاكرة الحزم (تنزيل، تحديث، تنظيف)
+        # The cached-versions index is refreshed when the package cache directories change
+        # (downloads, upgrades, cleanups)
+        self.cache_refresh_worker = None
+        self.cache_refresh_timer = QTimer(self)
+        self.cache_refresh_timer.setSingleShot(True)
+        self.cache_refresh_timer.setInterval(self.CACHE_REFRESH_DELAY_MS)
+        self.cache_refresh_timer.timeout.connect(self._refresh_package_cache)
+        self.cache_watcher = QFileSystemWatcher(self)
+        cache_dirs = [directory for directory in self.handler.package_cache_dirs() if os.path.isdir(directory)]
+        if cache_dirs:
+            self.cache_watcher.addPaths(cache_dirs)
+            self.cache_watcher.directoryChanged.connect(self.cache_refresh_timer.start)
+            self._refresh_package_cache()
 
     def _setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -43,15 +269,39 @@ class PackagesTab(QWidget):
         self.search_input.setPlaceholderText("Search for packages...")
         self.search_button = QPushButton("Search")
         self.search_button.clicked.connect(self._search_packages)
+        self.search_input.returnPressed.connect(self._search_packages)
+        self.installed_only_check = QCheckBox("Installed only")
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(self.search_button)
+        search_layout.addWidget(self.installed_only_check)
         main_layout.addLayout(search_layout)
 
-        # قائمة نتائج البحث/الحزم المثبتة
-        self.package_list_widget = QListWidget()
-        self.package_list_widget.setSelectionMode(QListWidget.SingleSelection)
-        self.package_list_widget.itemSelectionChanged.connect(self._on_package_selection_changed)
-        main_layout.addWidget(self.package_list_widget)
+        # جدول نتائج البحث/الحزم المثبتة: نموذج أعمدة مع وسيط للترتيب والترشيح
+        # Search results / installed packages table: a columnar model behind a sort/filter proxy
+        self.package_model = PackageTableModel(self)
+        self.package_proxy = PackageFilterProxyModel(self)
+        self.package_proxy.setSourceModel(self.package_model)
+        self.installed_only_check.toggled.connect(self.package_proxy.set_installed_only)
+
+        self.package_view = QTableView()
+        self.package_view.setModel(self.package_proxy)
+        self.package_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.package_view.setSelectionMode(QAbstractItemView.ExtendedSelection) # السماح بتحديد عدة حزم لمعاملة واحدة
+        self.package_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.package_view.setShowGrid(False)
+        self.package_view.setWordWrap(False)
+        self.package_view.verticalHeader().hide()
+        # ارتفاع صف ثابت حتى لا يقيس العرض كل صف
+        # Fixed row height so the view never measures individual rows
+        self.package_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.package_view.verticalHeader().setDefaultSectionSize(self.package_view.fontMetrics().height() + 6)
+        header = self.package_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(PackageTableModel.NAME, QHeaderView.Stretch)
+        self.package_view.setSortingEnabled(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        self.package_view.selectionModel().selectionChanged.connect(self._on_package_selection_changed)
+        main_layout.addWidget(self.package_view)
 
         # عرض تفاصيل الحزمة المحددة
         self.package_details_label = QLabel("Package Details:")
@@ -60,6 +310,21 @@ class PackagesTab(QWidget):
         self.package_details_text.setReadOnly(True)
         main_layout.addWidget(self.package_details_text)
 
+        # الرجوع لإصدار مخزن في ذاكرة الحزم (يظهر فقط عند وجود إصدارات أخرى للحزمة المحددة)
+        # Downgrade to a version from the package cache (shown only when the selected package
+        # has other cached versions)
+        self.cached_versions_widget = QWidget()
+        cached_versions_layout = QHBoxLayout(self.cached_versions_widget)
+        cached_versions_layout.setContentsMargins(0, 0, 0, 0)
+        cached_versions_layout.addWidget(QLabel("Cached versions:"))
+        self.cached_versions_combo = QComboBox()
+        cached_versions_layout.addWidget(self.cached_versions_combo, 1)
+        self.install_cached_button = QPushButton("Install This Version")
+        self.install_cached_button.clicked.connect(self._install_cached_version)
+        cached_versions_layout.addWidget(self.install_cached_button)
+        self.cached_versions_widget.hide()
+        main_layout.addWidget(self.cached_versions_widget)
+
         # شريط التقدم (غير محدد)
         self.progress_bar = QProgressBar(self)
         self.progress_bar.setRange(0, 0) # لجعلها غير محددة (indeterminate)
@@ -67,6 +332,13 @@ class PackagesTab(QWidget):
         self.progress_bar.hide() # إخفاؤه في البداية
         main_layout.addWidget(self.progress_bar)
 
+        # آخر سطر من مخرجات العملية الجارية
+        # Latest output line of the running operation
+        self.operation_output_label = QLabel()
+        self.operation_output_label.setStyleSheet("color: gray;")
+        self.operation_output_label.hide()
+        main_layout.addWidget(self.operation_output_label)
+
         # أزرار الميزات الأخرى (تثبيت، إزالة، تحديث، سجل، إدارة المستودعات، قائمة المثبتة)
         bottom_buttons_layout = QHBoxLayout()
         
@@ -75,6 +347,10 @@ class PackagesTab(QWidget):
         self.list_installed_button.clicked.connect(self._list_installed_packages)
         bottom_buttons_layout.addWidget(self.list_installed_button)
 
+        self.list_all_button = QPushButton("List All")
+        self.list_all_button.clicked.connect(self._list_all_packages)
+        bottom_buttons_layout.addWidget(self.list_all_button)
+
         self.install_button = QPushButton("Install Selected")
         self.install_button.setEnabled(False) # تعطيل حتى يتم تحديد حزمة
         self.install_button.clicked.connect(self._install_selected_package)
@@ -93,6 +369,30 @@ class PackagesTab(QWidget):
         self.show_history_button.clicked.connect(self._show_package_history)
         bottom_buttons_layout.addWidget(self.show_history_button)
 
+        self.orphans_button = QPushButton("Orphans")
+        self.orphans_button.clicked.connect(self._show_orphans)
+        bottom_buttons_layout.addWidget(self.orphans_button)
+
+        self.find_owner_button = QPushButton("Find Owner")
+        self.find_owner_button.clicked.connect(self._find_file_owner)
+        bottom_buttons_layout.addWidget(self.find_owner_button)
+
+        self.unowned_files_button = QPushButton("Unowned Files")
+        self.unowned_files_button.clicked.connect(self._find_unowned_files)
+        bottom_buttons_layout.addWidget(self.unowned_files_button)
+
+        self.disk_usage_button = QPushButton("Disk Usage")
+        self.disk_usage_button.clicked.connect(self._show_disk_usage)
+        bottom_buttons_layout.addWidget(self.disk_usage_button)
+
+        self.package_cache_button = QPushButton("Package Cache")
+        self.package_cache_button.clicked.connect(self._manage_package_cache)
+        bottom_buttons_layout.addWidget(self.package_cache_button)
+
+        self.activity_button = QPushButton("Activity Stats")
+        self.activity_button.clicked.connect(self._show_package_activity)
+        bottom_buttons_layout.addWidget(self.activity_button)
+
         self.manage_repos_button = QPushButton("Manage Repositories")
         self.manage_repos_button.clicked.connect(self._manage_repositories)
         bottom_buttons_layout.addWidget(self.manage_repos_button)
@@ -106,42 +406,217 @@ class PackagesTab(QWidget):
 
         self.search_button.setEnabled(False)
         self.list_installed_button.setEnabled(False)
+        self.list_all_button.setEnabled(False)
         self.install_button.setEnabled(False)
         self.remove_button.setEnabled(False)
         self.update_button.setEnabled(False)
         self.show_history_button.setEnabled(False)
+        self.activity_button.setEnabled(False)
+        self.orphans_button.setEnabled(False)
+        self.find_owner_button.setEnabled(False)
+        self.unowned_files_button.setEnabled(False)
+        self.disk_usage_button.setEnabled(False)
+        self.package_cache_button.setEnabled(False)
+        self.install_cached_button.setEnabled(False)
         self.manage_repos_button.setEnabled(False)
 
     def _end_operation(self):
         self.unsetCursor()
         self.progress_bar.hide()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setTextVisible(False)
+        self.operation_output_label.clear()
+        self.operation_output_label.hide()
 
         self.search_button.setEnabled(True)
         self.list_installed_button.setEnabled(True)
+        self.list_all_button.setEnabled(True)
         self.update_button.setEnabled(True)
         self.show_history_button.setEnabled(True)
+        self.activity_button.setEnabled(True)
+        self.orphans_button.setEnabled(True)
+        self.find_owner_button.setEnabled(True)
+        self.unowned_files_button.setEnabled(True)
+        self.disk_usage_button.setEnabled(True)
+        self.package_cache_button.setEnabled(True)
+        self.install_cached_button.setEnabled(True)
         self.manage_repos_button.setEnabled(True)
         self._on_package_selection_changed()
 
+    def _selected_package_names(self):
+        rows = sorted(index.row() for index in self.package_view.selectionModel().selectedRows())
+        names = [self.package_proxy.package_name(row) for row in rows]
+        return [name for name in names if name is not None]
+
+    def _selected_package_name(self):
+        current = self.package_view.selectionModel().currentIndex()
+        if current.isValid() and self.package_view.selectionModel().isRowSelected(current.row(), current.parent()):
+            return self.package_proxy.package_name(current.row())
+        names = self._selected_package_names()
+        return names[0] if names else None
+
     def _on_package_selection_changed(self):
-        selected_items = self.package_list_widget.selectedItems()
-        
-        has_selection = bool(selected_items)
+        selected_package_name = self._selected_package_name()
+
+        has_selection = selected_package_name is not None
         self.install_button.setEnabled(has_selection)
         self.remove_button.setEnabled(has_selection)
+        self._update_cached_versions(selected_package_name)
 
-        if not selected_items:
+        if not has_selection:
             self.package_details_text.clear()
             return
 
-        selected_package_name = selected_items[0].text()
-        
-        success, details = self.handler.get_package_details(selected_package_name)
+        cached = self.details_cache.get(selected_package_name)
+        if cached is not None:
+            self.details_cache.move_to_end(selected_package_name)
+            self._show_details(cached)
+            return
+
+        self.package_details_text.setText("Loading details...")
+        self.details_worker.request([selected_package_name], urgent=True)
+
+    def _show_details(self, result):
+        success, details = result
         if success:
             self.package_details_text.setText(details)
         else:
             self.package_details_text.setText(f"Could not retrieve details: {details}")
-            QMessageBox.critical(self, "Details Error", details)
+
+    def _handle_details_ready(self, results):
+        for name, result in results.items():
+            self.details_cache[name] = result
+            self.details_cache.move_to_end(name)
+        while len(self.details_cache) > self.DETAILS_CACHE_SIZE:
+            self.details_cache.popitem(last=False)
+
+        selected_package_name = self._selected_package_name()
+        if selected_package_name in results:
+            self._show_details(results[selected_package_name])
+
+    def _update_cached_versions(self, package_name):
+        """
+        ملء قائمة الإصدارات المخزنة من الفهارس (بدون وصول للقرص)؛ يحدّثها _refresh_package_cache في خيط.
+        Fills the cached versions list from the indexes (without touching the disk);
+        _refresh_package_cache keeps them current on a worker thread.
+        """
+        candidates = self.handler.get_downgrade_candidates(package_name) if package_name else []
+        self.cached_versions_combo.clear()
+        for archive in candidates:
+            self.cached_versions_combo.addItem(
+                f"{archive.version} ({archive.arch}, {format_size(archive.size)})", archive
+            )
+        self.cached_versions_widget.setVisible(bool(candidates))
+
+    def _refresh_package_cache(self):
+        if self.cache_refresh_worker is not None and self.cache_refresh_worker.isRunning():
+            # فحص جارٍ؛ إعادة المحاولة بعد انتهائه
+            # A scan is running; try again once it settles
+            self.cache_refresh_timer.start()
+            return
+        self.cache_refresh_worker = Worker(self.handler.refresh_package_cache)
+        self.cache_refresh_worker.result_ready.connect(self._handle_package_cache_refreshed)
+        self.cache_refresh_worker.start()
+
+    def _handle_package_cache_refreshed(self, success, changed):
+        if not success:
+            print(changed)
+        elif changed:
+            self._update_cached_versions(self._selected_package_name())
+
+    def _install_cached_version(self):
+        archive = self.cached_versions_combo.currentData()
+        if archive is None:
+            return
+        reply = QMessageBox.question(self, 'Confirm Downgrade',
+                                    f"Install {archive.name} {archive.version} from the package cache?\n\n"
+                                    f"{os.path.join(archive.directory, archive.filename)}\n\n"
+                                    "This may require root privileges.",
+                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            QMessageBox.information(self, "Installation", "Please authorize the root privileges in the terminal/popup if prompted.")
+            self._start_operation()
+            self._start_streaming_worker(self.handler.downgrade_package, self._handle_install_result, archive)
+
+    def _visible_package_names(self):
+        view = self.package_view
+        count = self.package_proxy.rowCount()
+        if count == 0:
+            return []
+        first = view.rowAt(0)
+        last = view.rowAt(view.viewport().height() - 1)
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = count - 1
+        names = [self.package_proxy.package_name(row) for row in range(first, last + 1)]
+        return [name for name in names if name is not None]
+
+    def _prefetch_visible_details(self):
+        missing = [name for name in self._visible_package_names() if name not in self.details_cache]
+        if missing:
+            self.details_worker.request(missing)
+
+    def _keep_until_finished(self, worker):
+        """
+        الاحتفاظ بمرجع الخيط حتى تطلق QThread.finished المدمجة؛ result_ready تُطلق من داخل run()،
+        وحذف آخر مرجع بينما يعمل الخيط يدمر QThread ويُسقط البرنامج.
+        Keeps a reference to the thread until the built-in QThread.finished fires; result_ready
+        is emitted from inside run(), and dropping the last reference while the thread runs
+        destroys the QThread and aborts the program.
+        """
+        self._stopping_workers.add(worker)
+        worker.finished.connect(lambda: self._stopping_workers.discard(worker))
+        if worker.isFinished():
+            self._stopping_workers.discard(worker)
+
+    def _start_streaming_worker(self, handler_method, result_slot, *args):
+        if self.worker is not None:
+            self._keep_until_finished(self.worker)
+        self.worker = StreamingWorker(handler_method, *args)
+        self.worker.output_line.connect(self._handle_operation_output)
+        self.worker.progress_event.connect(self._handle_operation_progress)
+        self.worker.result_ready.connect(result_slot)
+        self.operation_output_label.show()
+        self.worker.start()
+
+    def _handle_operation_output(self, line):
+        if line.strip():
+            self.operation_output_label.setText(line.strip())
+
+    def _handle_operation_progress(self, event):
+        # التحول من شريط غير محدد إلى نسبة مئوية فعلية عند أول حدث تقدم
+        # Switch from the indeterminate bar to a real percentage on the first progress event
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setTextVisible(True)
+        self.progress_bar.setValue(event["percent"])
+        label = f"{event['stage']} {event['package']}".strip()
+        self.progress_bar.setFormat(f"{label} ({event['current']}/{event['total']}) %p%")
+
+    def _on_search_text_changed(self, text):
+        # إعادة تشغيل المؤقت مع كل ضغطة مفتاح؛ البحث يبدأ فقط عند توقف الكتابة
+        # Restart the timer on every keystroke; the search only runs once typing pauses
+        if text.strip():
+            self.search_debounce_timer.start()
+        else:
+            self.search_debounce_timer.stop()
+            self.search_generation = self.search_worker.cancel()
+            self._clear_packages()
+
+    def _clear_packages(self):
+        self.package_model.clear()
+        self.package_details_text.clear()
+        # النتائج الجديدة تصل بترتيبها الأصلي (حسب الصلة أو أبجدياً)
+        # New results arrive in their natural order (relevance or alphabetical)
+        self.package_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+
+    def _run_incremental_search(self):
+        query = self.search_input.text().strip()
+        if not query:
+            return
+        self.search_generation = self.search_worker.submit(query)
+        self._search_results_started = False
 
     def _search_packages(self):
         query = self.search_input.text().strip()
@@ -149,40 +624,61 @@ class PackagesTab(QWidget):
             QMessageBox.warning(self, "Search Error", "Please enter a package name to search.")
             return
 
-        self.package_list_widget.clear()
-        self.package_details_text.clear()
-        self._start_operation()
+        self.search_debounce_timer.stop()
+        self._run_incremental_search()
 
-        self.worker = Worker(self.handler.search_packages, query)
-        self.worker.finished.connect(self._handle_search_result)
-        self.worker.start()
+    def _handle_search_chunk(self, generation, chunk, done):
+        # تجاهل نتائج أي استعلام قديم تم استبداله
+        # Ignore results from any superseded query
+        if generation != self.search_generation:
+            return
 
-    def _handle_search_result(self, success, result):
-        self._end_operation()
+        if not self._search_results_started:
+            self._search_results_started = True
+            self._clear_packages()
 
-        if success:
-            # هنا التغيير: يجب التحقق مما إذا كانت النتيجة قائمة
-            if isinstance(result, list):
-                if result:
-                    self.package_list_widget.addItems(result)
-                else:
-                    self.package_list_widget.addItem(f"No packages found for '{self.search_input.text().strip()}'.")
-            else: # إذا كانت النتيجة ليست قائمة، فقد تكون رسالة خطأ أو غير متوقعة
-                QMessageBox.critical(self, "Search Error", str(result))
-        else:
-            QMessageBox.critical(self, "Search Error", str(result)) # تأكد من تحويل النتيجة إلى نص إذا كانت غير ذلك
-        
-        self._on_package_selection_changed()
+        if chunk:
+            self.package_model.append_rows(chunk)
+        elif done and not self.package_model.has_packages():
+            self.package_model.set_message(f"No packages found for '{self.search_input.text().strip()}'.")
+
+        if done:
+            self._on_package_selection_changed()
+            self.prefetch_timer.start()
+
+    def _handle_search_failed(self, generation, message):
+        if generation != self.search_generation:
+            return
+        QMessageBox.critical(self, "Search Error", message)
 
     def _list_installed_packages(self):
-        self.package_list_widget.clear()
-        self.package_details_text.clear()
+        self._clear_packages()
         self._start_operation()
 
-        self.worker = Worker(self.handler.list_installed_packages)
-        self.worker.finished.connect(self._handle_list_installed_result)
+        self.worker = Worker(self.handler.list_installed_package_rows)
+        self.worker.result_ready.connect(self._handle_list_installed_result)
         self.worker.start()
 
+    def _list_all_packages(self):
+        self._clear_packages()
+        self._start_operation()
+
+        self.worker = Worker(self.handler.list_available_package_rows)
+        self.worker.result_ready.connect(self._handle_list_all_result)
+        self.worker.start()
+
+    def _handle_list_all_result(self, success, result):
+        self._end_operation()
+        if success:
+            if result:
+                self.package_model.set_rows(result)
+            else:
+                self.package_model.set_message("No packages found.")
+        else:
+            QMessageBox.critical(self, "List All Error", str(result))
+        self._on_package_selection_changed()
+        self.prefetch_timer.start()
+
     def _handle_list_installed_result(self, success, result):
         self._end_operation()
 
@@ -190,37 +686,40 @@ class PackagesTab(QWidget):
             # هنا التغيير: يجب التحقق مما إذا كانت النتيجة قائمة
             if isinstance(result, list):
                 if result:
-                    self.package_list_widget.addItems(result)
+                    self.package_model.set_rows(result)
                 else:
-                    self.package_list_widget.addItem("No installed packages found.")
+                    self.package_model.set_message("No installed packages found.")
             else: # إذا كانت النتيجة ليست قائمة، فقد تكون رسالة خطأ أو غير متوقعة
                 QMessageBox.critical(self, "List Installed Error", str(result))
         else:
             QMessageBox.critical(self, "List Installed Error", str(result))
         
         self._on_package_selection_changed()
+        self.prefetch_timer.start()
 
 
     def _install_selected_package(self):
-        selected_items = self.package_list_widget.selectedItems()
-        if not selected_items:
+        package_names = self._selected_package_names()
+        if not package_names:
             QMessageBox.warning(self, "No Package Selected", "Please select a package to install.")
             return
 
-        package_name = selected_items[0].text()
         reply = QMessageBox.question(self, 'Confirm Installation',
-                                    f"Are you sure you want to install '{package_name}'?\n\nThis may require root privileges.",
+                                    f"Are you sure you want to install {len(package_names)} package(s)?\n\n"
+                                    f"{', '.join(package_names)}\n\nThis may require root privileges.",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         if reply == QMessageBox.Yes:
             QMessageBox.information(self, "Installation", "Please authorize the root privileges in the terminal/popup if prompted.")
             self._start_operation()
 
-            self.worker = Worker(self.handler.install_package, package_name)
-            self.worker.finished.connect(self._handle_install_result)
-            self.worker.start()
+            self._start_streaming_worker(self.handler.install_packages, self._handle_install_result, package_names)
 
     def _handle_install_result(self, success, message):
+        # حالة التثبيت تغيرت، لذلك التفاصيل المحفوظة والإصدارات المثبتة المفهرسة لم تعد صالحة
+        # Installation state changed, so the cached details and indexed installed versions are stale
+        self.details_cache.clear()
+        self.cache_refresh_timer.start()
         self._end_operation()
 
         if success:
@@ -229,25 +728,83 @@ class PackagesTab(QWidget):
             QMessageBox.critical(self, "Installation Error", message)
 
     def _remove_selected_package(self):
-        selected_items = self.package_list_widget.selectedItems()
-        if not selected_items:
+        package_names = self._selected_package_names()
+        if not package_names:
             QMessageBox.warning(self, "No Package Selected", "Please select a package to remove.")
             return
 
-        package_name = selected_items[0].text()
-        reply = QMessageBox.question(self, 'Confirm Removal',
-                                    f"Are you sure you want to remove '{package_name}'?\n\nThis may require root privileges.",
-                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        # المعاينة تبني رسم التبعيات (وتفحص قاعدة البيانات المحلية)، لذلك تعمل في خيط
+        # The preview builds the dependency graph (and re-checks the local database), so it runs
+        # on a worker thread
+        self._start_operation()
+        self.worker = Worker(self.handler.preview_removal, package_names)
+        self.worker.result_ready.connect(
+            lambda success, preview: self._confirm_removal(package_names, success, preview))
+        self.worker.start()
 
-        if reply == QMessageBox.Yes:
-            QMessageBox.information(self, "Removal", "Please authorize the root privileges in the terminal/popup if prompted.")
-            self._start_operation()
+    def _confirm_removal(self, package_names, success, preview):
+        """
+        طلب التأكيد مع معاينة كل ما سيحذفه pacman -Rns والمساحة المحررة، ثم بدء الحذف.
+        Asks for confirmation, previewing everything pacman -Rns would remove and the space freed,
+        then starts the removal.
+        """
+        self._end_operation()
+        message = f"Are you sure you want to remove {len(package_names)} package(s)?\n\n{', '.join(package_names)}"
+        details = None
+        if success:
+            removed = preview["packages"]
+            message += (f"\n\n{len(removed)} package(s) will be removed in total, "
+                        f"freeing {format_size(preview['size'])}.")
+            details = "\n".join(removed)
+            if preview["blockers"]:
+                message += "\n\nWarning: pacman will refuse this removal because other packages depend on:\n" + \
+                           "\n".join(f"{target} (required by {', '.join(users)})"
+                                     for target, users in preview["blockers"].items())
+        message += "\n\nThis may require root privileges."
+
+        box = QMessageBox(QMessageBox.Question, "Confirm Removal", message,
+                          QMessageBox.Yes | QMessageBox.No, self)
+        box.setDefaultButton(QMessageBox.No)
+        if details:
+            box.setDetailedText(details)
+        if box.exec_() != QMessageBox.Yes:
+            return
+        QMessageBox.information(self, "Removal", "Please authorize the root privileges in the terminal/popup if prompted.")
+        self._start_operation()
+        self._start_streaming_worker(self.handler.remove_packages, self._handle_remove_result, package_names)
 
-            self.worker = Worker(self.handler.remove_package, package_name)
-            self.worker.finished.connect(self._handle_remove_result)
-            self.worker.start()
+    def _show_orphans(self):
+        self._start_operation()
+        self.worker = Worker(self.handler.preview_orphan_removal)
+        self.worker.result_ready.connect(self._handle_orphans_result)
+        self.worker.start()
+
+    def _handle_orphans_result(self, success, result):
+        self._end_operation()
+        if not success:
+            QMessageBox.critical(self, "Orphans Error", result)
+            return
+        orphans, freed = result
+        if not orphans:
+            QMessageBox.information(self, "Orphan Packages", "No orphan packages found.")
+            return
+
+        package_names = [name for name, _, _ in orphans]
+        box = QMessageBox(QMessageBox.Question, "Orphan Packages",
+                          f"{len(orphans)} package(s) were installed as dependencies and are no longer "
+                          f"required by any package ({format_size(freed)}).\n\nRemove them?",
+                          QMessageBox.Yes | QMessageBox.No, self)
+        box.setDefaultButton(QMessageBox.No)
+        box.setDetailedText("\n".join(f"{name} {version} ({format_size(size)})" for name, version, size in orphans))
+        if box.exec_() == QMessageBox.Yes:
+            self._start_operation()
+            self._start_streaming_worker(self.handler.remove_packages, self._handle_remove_result, package_names)
 
     def _handle_remove_result(self, success, message):
+        # حالة التثبيت تغيرت، لذلك التفاصيل المحفوظة والإصدارات المثبتة المفهرسة لم تعد صالحة
+        # Installation state changed, so the cached details and indexed installed versions are stale
+        self.details_cache.clear()
+        self.cache_refresh_timer.start()
         self._end_operation()
 
         if success:
@@ -264,11 +821,13 @@ class PackagesTab(QWidget):
             QMessageBox.information(self, "System Update", "Please authorize the root privileges in the terminal/popup if prompted.")
             self._start_operation()
 
-            self.worker = Worker(self.handler.update_system)
-            self.worker.finished.connect(self._handle_update_result)
-            self.worker.start()
+            self._start_streaming_worker(self.handler.update_system, self._handle_update_result)
 
     def _handle_update_result(self, success, message):
+        # حالة التثبيت تغيرت، لذلك التفاصيل المحفوظة والإصدارات المثبتة المفهرسة لم تعد صالحة
+        # Installation state changed, so the cached details and indexed installed versions are stale
+        self.details_cache.clear()
+        self.cache_refresh_timer.start()
         self._end_operation()
 
         if success:
@@ -279,17 +838,101 @@ class PackagesTab(QWidget):
     def _show_package_history(self):
         self._start_operation()
 
-        self.worker = Worker(self.handler.get_package_history)
-        self.worker.finished.connect(self._handle_history_result)
+        self.worker = Worker(self.handler.open_package_history)
+        self.worker.result_ready.connect(self._handle_history_result)
         self.worker.start()
 
     def _handle_history_result(self, success, history_content):
         self._end_operation()
-        if success:
+        if success and isinstance(history_content, PacmanLog):
+            # سجل pacman يُعرض في جدول افتراضي مع فلاتر بدلاً من نص كامل
+            # The pacman log is shown in a virtual, filterable table instead of one big text
+            HistoryDialog(history_content, self).exec_()
+        elif success:
             self._show_scrollable_message("Package History", history_content)
         else:
             QMessageBox.critical(self, "History Error", history_content)
 
+    def _show_package_activity(self):
+        self._start_operation()
+
+        self.worker = Worker(self.handler.get_package_activity)
+        self.worker.result_ready.connect(self._handle_activity_result)
+        self.worker.start()
+
+    def _handle_activity_result(self, success, result):
+        self._end_operation()
+        if success:
+            ActivityDialog(result, self).exec_()
+        else:
+            QMessageBox.critical(self, "Activity Error", result)
+
+    def _find_file_owner(self):
+        path, ok = QInputDialog.getText(self, "Find Owner", "File or directory path:")
+        path = path.strip()
+        if not ok or not path:
+            return
+        self._start_operation()
+
+        self.worker = Worker(self.handler.find_file_owner, path)
+        self.worker.result_ready.connect(self._handle_file_owner_result)
+        self.worker.start()
+
+    def _handle_file_owner_result(self, success, message):
+        self._end_operation()
+        if success:
+            QMessageBox.information(self, "Find Owner", message)
+        else:
+            QMessageBox.warning(self, "Find Owner", message)
+
+    def _find_unowned_files(self):
+        directory = QFileDialog.getExistingDirectory(self, "Find Unowned Files In", "/usr")
+        if not directory:
+            return
+        self._start_operation()
+
+        self.worker = Worker(self.handler.find_unowned_files, directory)
+        self.worker.result_ready.connect(self._handle_unowned_files_result)
+        self.worker.start()
+
+    def _handle_unowned_files_result(self, success, result):
+        self._end_operation()
+        if not success:
+            QMessageBox.critical(self, "Unowned Files", result)
+        elif result:
+            self._show_scrollable_message("Unowned Files", "\n".join(result))
+        else:
+            QMessageBox.information(self, "Unowned Files", "Every file in this directory is owned by a package.")
+
+    def _show_disk_usage(self):
+        self._start_operation()
+
+        self.worker = Worker(self.handler.get_disk_usage, self.DISK_USAGE_TOP_N)
+        self.worker.result_ready.connect(self._handle_disk_usage_result)
+        self.worker.start()
+
+    def _handle_disk_usage_result(self, success, result):
+        self._end_operation()
+        if success:
+            DiskUsageDialog(result, self).exec_()
+        else:
+            QMessageBox.critical(self, "Disk Usage Error", result)
+
+    def _manage_package_cache(self):
+        dialog = PackageCacheDialog(self.handler, self)
+        if dialog.exec_() != QDialog.Accepted or not dialog.archives:
+            return
+        QMessageBox.information(self, "Package Cache", "Please authorize the root privileges in the terminal/popup if prompted.")
+        self._start_operation()
+        self._start_streaming_worker(self.handler.clean_package_cache, self._handle_cache_clean_result, dialog.archives)
+
+    def _handle_cache_clean_result(self, success, message):
+        self._end_operation()
+        if success:
+            QMessageBox.information(self, "Package Cache", message)
+        else:
+            QMessageBox.critical(self, "Package Cache Error", message)
+
     def _manage_repositories(self):
         QMessageBox.information(self, "Manage Repositories", "This feature will allow adding/removing/editing package repositories. (Advanced - To be implemented)")
 
@@ -0,0 +1,186 @@
+from bisect import bisect_left
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from src.core.pacman_local_db import format_size
+
+# دور البيانات الذي يُرتب به الوسيط: قيم خام بدلاً من النص المعروض (الأرقام لا تُرتب كنصوص)
+# The data role the proxy sorts by: raw values instead of the displayed text (numbers must
+# not sort as strings)
+SORT_ROLE = Qt.UserRole
+
+
+def format_cpu_time(nanoseconds):
+    seconds = nanoseconds / 1e9
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}min {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}min"
+
+
+class ServiceTableModel(QAbstractTableModel):
+    """
+    نموذج جدول لخدمات systemd مفتاحه اسم الوحدة، مرتب حسب الاسم.
+    Table model for systemd services keyed by unit name, kept in name order.
+
+    التحديثات تُطبق كفروقات: حذف وإدراج الصفوف المتغيرة فقط و dataChanged للصفوف التي تغيرت
+    خلاياها، فيبقى التحديد وموضع التمرير كما هما.
+    Updates are applied as diffs: only the rows that changed are removed or inserted, and
+    dataChanged is emitted for rows whose cells changed, so the selection and scroll position
+    are kept.
+    """
+
+    COLUMNS = ("Name", "Load", "Active", "Sub", "Unit File", "PID", "Memory", "CPU Time", "Description")
+    # مفتاح قاموس الخدمة لكل عمود
+    # The service dict key of each column
+    KEYS = ("name", "load", "active", "sub", "unit_file_state", "main_pid", "memory", "cpu_usage", "description")
+    NAME, LOAD, ACTIVE, SUB, UNIT_FILE, PID, MEMORY, CPU, DESCRIPTION = range(len(COLUMNS))
+    NUMERIC_COLUMNS = (PID, MEMORY, CPU)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._names = []
+        self._services = []
+
+    def _row(self, name):
+        row = bisect_left(self._names, name)
+        return row if row < len(self._names) and self._names[row] == name else None
+
+    def get(self, name):
+        row = self._row(name)
+        return self._services[row] if row is not None else None
+
+    def service(self, row):
+        return self._services[row]
+
+    def name(self, row):
+        return self._names[row]
+
+    def set_services(self, services):
+        """
+        استبدال القائمة كلها بالفرق فقط: الخدمات غير الموجودة في services تُحذف.
+        Replaces the whole list through a diff: services missing from services are removed.
+        """
+        updated = {service["name"]: service for service in services}
+        for name in self._names:
+            updated.setdefault(name, None)
+        self.update_services(updated)
+
+    def update_services(self, updated):
+        """
+        updated: قاموس الاسم -> قاموس الخدمة الجديد أو None للحذف.
+        updated: dict of name -> new service dict, or None to remove.
+        """
+        removed = sorted((row for row in map(self._row, (name for name, service in updated.items()
+                                                               if service is None))
+                          if row is not None), reverse=True)
+        self._remove_rows(removed)
+
+        added = []
+        for name, service in updated.items():
+            if service is None:
+                continue
+            row = self._row(name)
+            if row is None:
+                added.append(service)
+            elif self._services[row] != service:
+                old = self._services[row]
+                self._services[row] = service
+                changed = [column for column, key in enumerate(self.KEYS) if old.get(key) != service.get(key)]
+                self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
+        added.sort(key=lambda service: service["name"])
+        self._insert_services(added)
+
+    def _remove_rows(self, rows):
+        # rows مرتبة تنازلياً؛ الصفوف المتجاورة تُحذف معاً
+        # rows are in descending order; adjacent rows are removed together
+        i = 0
+        while i < len(rows):
+            last = first = rows[i]
+            i += 1
+            while i < len(rows) and rows[i] == first - 1:
+                first = rows[i]
+                i += 1
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._names[first:last + 1]
+            del self._services[first:last + 1]
+            self.endRemoveRows()
+
+    def _insert_services(self, services):
+        # services مرتبة حسب الاسم؛ الخدمات التي تقع في نفس الموضع تُدرج معاً
+        # services are in name order; services falling at the same position are inserted together
+        i = 0
+        while i < len(services):
+            row = bisect_left(self._names, services[i]["name"])
+            j = i + 1
+            while j < len(services) and (row == len(self._names) or services[j]["name"] < self._names[row]):
+                j += 1
+            self.beginInsertRows(QModelIndex(), row, row + j - i - 1)
+            self._names[row:row] = [service["name"] for service in services[i:j]]
+            self._services[row:row] = services[i:j]
+            self.endInsertRows()
+            i = j
+
+    # --- واجهة QAbstractTableModel / QAbstractTableModel interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        value = self._services[index.row()].get(self.KEYS[column])
+        if role == Qt.DisplayRole:
+            if value is None:
+                return ""
+            if column == self.MEMORY:
+                return format_size(value)
+            if column == self.CPU:
+                return format_cpu_time(value)
+            return str(value) if column == self.PID else value
+        if role == SORT_ROLE:
+            if column in self.NUMERIC_COLUMNS:
+                return value if value is not None else -1
+            return (value or "").lower()
+        if role == Qt.TextAlignmentRole and column in self.NUMERIC_COLUMNS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+
+class ServiceFilterProxyModel(QSortFilterProxyModel):
+    """
+    وسيط ترشيح وترتيب فوق ServiceTableModel: نص البحث يطابق الاسم أو الوصف.
+    Filtering and sorting proxy over ServiceTableModel: the search text matches the name or
+    the description.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self.setSortRole(SORT_ROLE)
+
+    def set_filter_text(self, text):
+        text = text.lower()
+        if text == self._text:
+            return
+        self._text = text
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._text:
+            return True
+        service = self.sourceModel().service(source_row)
+        return self._text in service["name"].lower() or self._text in service["description"].lower()
+
+    def service_name(self, proxy_row):
+        return self.sourceModel().name(self.mapToSource(self.index(proxy_row, 0)).row())
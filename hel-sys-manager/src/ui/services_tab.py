@@ -1,10 +1,65 @@
+import threading
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
-    QMessageBox, QScrollArea
+    QPushButton, QTableView, QAbstractItemView, QHeaderView,
+    QMessageBox, QScrollArea, QApplication
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from src.core.services_manager import ServicesManager # استيراد الكلاس الجديد
+from src.core.systemd_manager import (
+    SystemdError, EVENT_UPDATE, EVENT_REFRESH, EVENT_UNLOADED, EVENT_RELOAD
+)
+from .service_model import ServiceTableModel, ServiceFilterProxyModel
+
+# مدة تجميع أحداث systemd المتتالية قبل تحديث الجدول مرة واحدة
+# How long consecutive systemd events are batched before the table is updated once
+EVENT_BATCH_DELAY_MS = 100
+# فاصل الاستطلاع البديل عندما لا تتوفر إشارات D-Bus
+# Fallback polling interval when D-Bus signals are unavailable
+FALLBACK_REFRESH_INTERVAL_MS = 10000
+
+
+# الاستماع لإشارات systemd في الخلفية
+# Listens for systemd signals in the background
+class ServiceEventsWorker(QThread):
+    service_changed = pyqtSignal(str, str, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        try:
+            ServicesManager.watch_services(self._emit_event, self._stop_event)
+        except SystemdError as e:
+            if not self._stop_event.is_set():
+                self.failed.emit(str(e))
+
+    def _emit_event(self, event, name, fields):
+        self.service_changed.emit(event, name or "", fields)
+
+
+# تنفيذ إجراء على عدة خدمات في الخلفية (قد يستغرق الإيقاف حتى 90 ثانية لكل وحدة)
+# Runs an action on several services in the background (stopping can take up to 90 seconds per unit)
+class ServiceActionWorker(QThread):
+    progress = pyqtSignal(int, int)
+    # ليست finished: إشارة QThread.finished المدمجة تُستخدم لمعرفة متى ينتهي الخيط فعلاً
+    # Not finished: the built-in QThread.finished signal is used to know when the thread has really ended
+    action_finished = pyqtSignal(bool, object)
+
+    def __init__(self, action, service_names):
+        super().__init__()
+        self.action = action
+        self.service_names = service_names
+
+    def run(self):
+        success, results = ServicesManager.run_service_action(self.action, self.service_names, self.progress.emit)
+        self.action_finished.emit(success, results)
+
 
 class ServicesTab(QWidget):
     def __init__(self):
@@ -28,15 +83,23 @@ class ServicesTab(QWidget):
         self.search_layout.addWidget(self.refresh_button)
         self.layout.addLayout(self.search_layout)
 
-        # جدول الخدمات
-        # Services table
-        self.services_table = QTableWidget()
-        self.services_table.setColumnCount(5)
-        self.services_table.setHorizontalHeaderLabels(["Name", "Load", "Active", "Sub", "Description"])
+        # جدول الخدمات: نموذج مفتاحه اسم الوحدة يُحدث بالفروقات، ووسيط للبحث والترتيب
+        # Services table: a model keyed by unit name updated through diffs, and a proxy for
+        # searching and sorting
+        self.service_model = ServiceTableModel(self)
+        self.service_proxy = ServiceFilterProxyModel(self)
+        self.service_proxy.setSourceModel(self.service_model)
+
+        self.services_table = QTableView()
+        self.services_table.setModel(self.service_proxy)
         self.services_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch) # توزيع الأعمدة بالتساوي
-        self.services_table.setSelectionBehavior(QTableWidget.SelectRows) # تحديد الصف بأكمله
-        self.services_table.setEditTriggers(QTableWidget.NoEditTriggers) # منع التعديل المباشر في الجدول
-        self.services_table.itemSelectionChanged.connect(self._update_action_buttons_state) # تحديث حالة الأزرار
+        self.services_table.setSelectionBehavior(QAbstractItemView.SelectRows) # تحديد الصف بأكمله
+        self.services_table.setSelectionMode(QAbstractItemView.ExtendedSelection) # السماح بتحديد عدة خدمات لإجراء واحد
+        self.services_table.setEditTriggers(QAbstractItemView.NoEditTriggers) # منع التعديل المباشر في الجدول
+        self.services_table.verticalHeader().hide()
+        self.services_table.setSortingEnabled(True)
+        self.services_table.sortByColumn(ServiceTableModel.NAME, Qt.AscendingOrder)
+        self.services_table.selectionModel().selectionChanged.connect(self._update_action_buttons_state) # تحديث حالة الأزرار
 
         self.layout.addWidget(self.services_table)
 
@@ -62,55 +125,190 @@ class ServicesTab(QWidget):
         self.action_buttons_layout.addWidget(self.disable_button)
         self.layout.addLayout(self.action_buttons_layout)
 
+        self.action_status_label = QLabel("")
+        self.layout.addWidget(self.action_status_label)
+        self.action_worker = None
+
         self._update_action_buttons_state() # تعطيل الأزرار في البداية
-        self._load_services() # تحميل الخدمات عند بدء التبويبة
-        
-        # مؤقت للتحديث التلقائي (اختياري، يمكن إزالته إذا كان الحمل على النظام كبيراً)
-        # Auto-refresh timer (optional, can be removed if system load is high)
+
+        # التحديثات تأتي من إشارات systemd أثناء ظهور التبويبة؛ الاستطلاع كل 10 ثوانٍ مجرد بديل
+        # عند عدم توفر D-Bus. لا شيء يعمل والتبويبة مخفية، والتحميل الأول يتم عند أول ظهور.
+        # Updates come from systemd signals while the tab is visible; polling every 10 seconds
+        # is only a fallback when D-Bus is unavailable. Nothing runs while the tab is hidden,
+        # and the first load happens when it is first shown.
+        self.events_worker = None
+        self._stopping_workers = set()
+        self._pending_changes = {}
+        self._pending_unloaded = set()
+        self._pending_reload = False
+        self.event_timer = QTimer(self)
+        self.event_timer.setSingleShot(True)
+        self.event_timer.setInterval(EVENT_BATCH_DELAY_MS)
+        self.event_timer.timeout.connect(self._apply_service_events)
+
         self.refresh_timer = QTimer(self)
-        self.refresh_timer.setInterval(10000) # تحديث كل 10 ثوانٍ
-        self.refresh_timer.timeout.connect(self._load_services)
-        self.refresh_timer.start()
+        self.refresh_timer.setInterval(FALLBACK_REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self._poll_services)
+
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(lambda: self._stop_watching(wait=True))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.events_worker is None and not self.refresh_timer.isActive():
+            self._load_services()
+            self._start_watching()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._stop_watching()
+
+    def _start_watching(self):
+        if not ServicesManager.can_watch_services():
+            self.refresh_timer.start()
+            return
+        self.events_worker = ServiceEventsWorker()
+        self.events_worker.service_changed.connect(self._on_service_event)
+        self.events_worker.failed.connect(self._on_watch_failed)
+        self.events_worker.start()
+
+    def _stop_watching(self, wait=False):
+        self.refresh_timer.stop()
+        self.event_timer.stop()
+        self._pending_changes.clear()
+        self._pending_unloaded.clear()
+        self._pending_reload = False
+        worker = self.events_worker
+        self.events_worker = None
+        if worker is not None:
+            worker.service_changed.disconnect(self._on_service_event)
+            worker.failed.disconnect(self._on_watch_failed)
+            worker.stop()
+            # الخيط يتحقق من طلب الإيقاف كل نصف ثانية
+            # The thread checks for the stop request every half second
+            self._keep_until_finished(worker)
+        if wait:
+            for stopping in list(self._stopping_workers):
+                stopping.wait()
+
+    def _keep_until_finished(self, worker):
+        """
+        الاحتفاظ بمرجع الخيط حتى تطلق QThread.finished المدمجة؛ حذف آخر مرجع بينما يعمل الخيط
+        يدمر QThread ويُسقط البرنامج.
+        Keeps a reference to the thread until the built-in QThread.finished fires; dropping
+        the last reference while the thread runs destroys the QThread and aborts the program.
+        """
+        self._stopping_workers.add(worker)
+        worker.finished.connect(lambda: self._stopping_workers.discard(worker))
+        if worker.isFinished():
+            self._stopping_workers.discard(worker)
+
+    def _on_watch_failed(self, message):
+        print(f"Warning: {message}. Polling services every {FALLBACK_REFRESH_INTERVAL_MS // 1000} seconds instead.")
+        # failed تُطلق من داخل run()، أي قبل انتهاء الخيط
+        # failed is emitted from inside run(), i.e. before the thread has ended
+        worker = self.events_worker
+        self.events_worker = None
+        if worker is not None:
+            self._keep_until_finished(worker)
+        self._load_services()
+        if self.isVisible():
+            self.refresh_timer.start()
+
+    def _on_service_event(self, event, name, fields):
+        """
+        تجميع أحداث systemd؛ الأحداث الأحدث لنفس الخدمة تحل محل الأقدم.
+        Batches systemd events; newer events for the same service supersede older ones.
+        """
+        if event == EVENT_RELOAD:
+            self._pending_reload = True
+        elif event == EVENT_UNLOADED:
+            self._pending_changes.pop(name, None)
+            self._pending_unloaded.add(name)
+        elif event == EVENT_REFRESH:
+            # None تعني إعادة قراءة الخدمة كاملة
+            # None means the whole service is re-read
+            self._pending_changes[name] = None
+            self._pending_unloaded.discard(name)
+        elif event == EVENT_UPDATE:
+            changes = self._pending_changes.get(name, {})
+            if changes is not None:
+                changes.update(fields)
+                self._pending_changes[name] = changes
+        if not self.event_timer.isActive():
+            self.event_timer.start()
+
+    def _apply_service_events(self):
+        """
+        تطبيق الأحداث المجمعة على الصفوف المتأثرة فقط.
+        Applies the batched events to the affected rows only.
+        """
+        changes, self._pending_changes = self._pending_changes, {}
+        unloaded, self._pending_unloaded = self._pending_unloaded, set()
+        reload, self._pending_reload = self._pending_reload, False
+        if reload:
+            self._load_services()
+            return
+
+        updated = {}
+        for name in unloaded:
+            service = self.service_model.get(name)
+            # وحدة أُزيلت من الذاكرة: تبقى كخدمة متوقفة إذا كان لها ملف، وإلا (وحدة مؤقتة) تُحذف
+            # A unit dropped from memory: it stays as a stopped service if it has a unit file,
+            # otherwise (a transient unit) it is removed
+            if service is not None and service["unit_file_state"]:
+                updated[name] = dict(service, load="not-loaded", active="inactive", sub="dead",
+                                     main_pid=None, memory=None, cpu_usage=None)
+            else:
+                updated[name] = None
+        refresh = [name for name, fields in changes.items() if fields is None]
+        if refresh:
+            try:
+                updated.update(ServicesManager.get_services(refresh))
+            except SystemdError as e:
+                print(f"Warning: {e}. Reloading all services.")
+                self._load_services()
+                return
+        for name, fields in changes.items():
+            service = self.service_model.get(name)
+            if fields is not None and service is not None:
+                updated[name] = dict(service, **fields)
+        self.service_model.update_services(updated)
+
+    def _poll_services(self):
+        """
+        الاستطلاع البديل: النموذج يقارن القائمة الجديدة ولا يغير إلا ما اختلف.
+        Fallback polling: the model compares the new list and only changes what differs.
+        """
+        self._load_services()
 
     def _load_services(self):
         """
-        جلب وعرض قائمة الخدمات في الجدول.
-        Fetches and displays the list of services in the table.
+        جلب قائمة الخدمات وتطبيقها على الجدول كفروقات.
+        Fetches the list of services and applies it to the table as a diff.
         """
-        self.all_services = ServicesManager.list_services()
-        self._filter_services(self.search_input.text()) # إعادة تصفية الخدمات بعد التحميل
+        self.service_model.set_services(ServicesManager.list_services())
+        self._update_action_buttons_state() # تحديث حالة الأزرار بعد التحديث
 
     def _filter_services(self, text):
         """
         تصفية الخدمات المعروضة بناءً على نص البحث.
         Filters displayed services based on search text.
         """
-        filtered_services = [
-            s for s in self.all_services
-            if text.lower() in s["name"].lower() or text.lower() in s["description"].lower()
-        ]
-        self._display_services(filtered_services)
+        self.service_proxy.set_filter_text(text)
+        self._update_action_buttons_state()
 
-    def _display_services(self, services):
-        """
-        عرض الخدمات في جدول QTableWidget.
-        Displays services in the QTableWidget.
-        """
-        self.services_table.setRowCount(len(services))
-        for row, service in enumerate(services):
-            self.services_table.setItem(row, 0, QTableWidgetItem(service["name"]))
-            self.services_table.setItem(row, 1, QTableWidgetItem(service["load"]))
-            self.services_table.setItem(row, 2, QTableWidgetItem(service["active"]))
-            self.services_table.setItem(row, 3, QTableWidgetItem(service["sub"]))
-            self.services_table.setItem(row, 4, QTableWidgetItem(service["description"]))
-        self._update_action_buttons_state() # تحديث حالة الأزرار بعد التحديث
+    def _selected_service_names(self):
+        rows = sorted(index.row() for index in self.services_table.selectionModel().selectedRows())
+        return [self.service_proxy.service_name(row) for row in rows]
 
     def _update_action_buttons_state(self):
         """
         تحديث حالة أزرار الإجراءات (تمكين/تعطيل) بناءً على تحديد الصفوف.
         Updates the state of action buttons (enable/disable) based on row selection.
         """
-        is_selected = len(self.services_table.selectedItems()) > 0
+        is_selected = bool(self._selected_service_names()) and self.action_worker is None
         self.start_button.setEnabled(is_selected)
         self.stop_button.setEnabled(is_selected)
         self.restart_button.setEnabled(is_selected)
@@ -119,37 +317,63 @@ class ServicesTab(QWidget):
 
     def _perform_service_action(self, action):
         """
-        تنفيذ الإجراء المطلوب على الخدمة المحددة.
-        Performs the requested action on the selected service.
+        تنفيذ الإجراء المطلوب على الخدمات المحددة في الخلفية، باستدعاء systemctl واحد.
+        Performs the requested action on the selected services in the background, with a
+        single systemctl call.
         """
-        selected_items = self.services_table.selectedItems()
-        if not selected_items:
+        service_names = self._selected_service_names()
+        if not service_names:
             QMessageBox.warning(self, "No Service Selected", "Please select a service to perform this action.")
             return
+        if self.action_worker is not None:
+            return
 
-        # اسم الخدمة هو في العمود الأول (index 0) من الصف المحدد
-        # The service name is in the first column (index 0) of the selected row
-        service_name = selected_items[0].text()
-
+        if len(service_names) == 1:
+            target = f"service: <b>{service_names[0]}</b>"
+        else:
+            target = f"{len(service_names)} services:<br><b>{'<br>'.join(service_names)}</b>"
         reply = QMessageBox.question(self, f"Confirm {action.capitalize()}",
-                                     f"Are you sure you want to {action} service: <b>{service_name}</b>?",
+                                     f"Are you sure you want to {action} {target}?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
 
-        if reply == QMessageBox.Yes:
-            result = ""
-            if action == "start":
-                result = ServicesManager.start_service(service_name)
-            elif action == "stop":
-                result = ServicesManager.stop_service(service_name)
-            elif action == "restart":
-                result = ServicesManager.restart_service(service_name)
-            elif action == "enable":
-                result = ServicesManager.enable_service(service_name)
-            elif action == "disable":
-                result = ServicesManager.disable_service(service_name)
-            
-            if result.startswith("Error:"):
-                QMessageBox.critical(self, f"{action.capitalize()} Failed", result)
-            else:
-                QMessageBox.information(self, f"{action.capitalize()} Successful", f"Service '{service_name}' {action}ed successfully.")
-                self._load_services() # إعادة تحميل الخدمات لتحديث الحالة
+        self.action_status_label.setText(f"{action.capitalize()}: waiting for {len(service_names)} service(s)...")
+        self.action_worker = ServiceActionWorker(action, service_names)
+        self.action_worker.progress.connect(
+            lambda done, total: self.action_status_label.setText(f"{action.capitalize()}: {done}/{total} done...")
+        )
+        self.action_worker.action_finished.connect(
+            lambda success, results: self._handle_action_result(action, success, results)
+        )
+        # المرجع يُحذف فقط بعد انتهاء الخيط فعلاً، وعندها تعود الأزرار
+        # The reference is only dropped once the thread has really ended, and the buttons come back then
+        self.action_worker.finished.connect(self._on_action_worker_finished)
+        self._update_action_buttons_state()
+        self.action_worker.start()
+
+    def _on_action_worker_finished(self):
+        self.action_worker = None
+        self._update_action_buttons_state()
+
+    def _handle_action_result(self, action, success, results):
+        """
+        عرض نتيجة مجمعة للإجراء: عدد الناجحة وسبب فشل كل خدمة فاشلة.
+        Shows a combined result for the action: how many succeeded and why each failed
+        service failed.
+        """
+        failed = {name: message for name, (ok, message) in results.items() if not ok}
+        succeeded = len(results) - len(failed)
+        self.action_status_label.setText(f"{action.capitalize()}: {succeeded} succeeded, {len(failed)} failed.")
+        if self.events_worker is None:
+            # بدون إشارات systemd يجب إعادة التحميل لتحديث الحالة
+            # Without systemd signals, a reload is needed to update the state
+            self._load_services()
+
+        if success:
+            QMessageBox.information(self, f"{action.capitalize()} Successful",
+                                    f"{action.capitalize()} succeeded for {succeeded} service(s).")
+        else:
+            details = "\n".join(f"{name}: {message}" for name, message in failed.items())
+            QMessageBox.critical(self, f"{action.capitalize()} Failed",
+                                 f"{action.capitalize()} failed for {len(failed)} of {len(results)} service(s):\n\n{details}")
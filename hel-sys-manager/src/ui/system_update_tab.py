@@ -1,31 +1,106 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QTextEdit, QLineEdit, QMessageBox
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from src.core.system_utils import SystemUtils
+import datetime
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QLineEdit,
+    QMessageBox, QSpinBox
+)
+from PyQt5.QtCore import QThread, QTimer, QSettings, pyqtSignal
+from src.core.package_handler import PackageHandler
+from src.core.pacman_local_db import format_size
 
 
 class UpdateWorker(QThread):
     output_ready = pyqtSignal(str)
 
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+
     def run(self):
-        result = SystemUtils.run_pacman_update()
+        success, result = self.handler.update_system()
         self.output_ready.emit(result)
 
 
 class InstallWorker(QThread):
     output_ready = pyqtSignal(str)
 
-    def __init__(self, packages):
+    def __init__(self, handler, packages):
         super().__init__()
+        self.handler = handler
         self.packages = packages
 
     def run(self):
-        result = SystemUtils.install_packages(self.packages)
-        self.output_ready.emit(result)
+        # كل الحزم تُثبت في معاملة واحدة تحت مصادقة واحدة
+        # All packages are installed in one transaction under a single authorization
+        success, summary = self.handler.install_packages(self.packages)
+        self.output_ready.emit(summary)
+
+
+# فحص التحديثات في الخلفية بدون صلاحيات جذر
+# Background, rootless update check
+class UpdateCheckWorker(QThread):
+    check_finished = pyqtSignal(bool, object)
+
+    def __init__(self, handler, sync_interval_seconds):
+        super().__init__()
+        self.handler = handler
+        self.sync_interval_seconds = sync_interval_seconds
+
+    def run(self):
+        success, result = self.handler.check_for_updates(self.sync_interval_seconds)
+        self.check_finished.emit(success, result)
+
+
+# ترتيب المرايا في الخلفية (قياسات شبكة متوازية). الإشارات المخصصة لا تُسمى finished حتى لا تحجب
+# QThread.finished المدمجة، فهي تُطلق من داخل run() قبل انتهاء الخيط
+# Background mirror ranking (concurrent network probes). The custom signals are not named
+# finished so they do not shadow the built-in QThread.finished: they are emitted from inside
+# run(), before the thread has ended
+class MirrorRankWorker(QThread):
+    progress = pyqtSignal(int, int)
+    ranking_finished = pyqtSignal(bool, object)
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+
+    def run(self):
+        success, result = self.handler.rank_mirrors(self.progress.emit)
+        self.ranking_finished.emit(success, result)
+
+
+class MirrorSaveWorker(QThread):
+    save_finished = pyqtSignal(bool, object)
+
+    def __init__(self, handler, results, enabled_count):
+        super().__init__()
+        self.handler = handler
+        self.results = results
+        self.enabled_count = enabled_count
+
+    def run(self):
+        success, message = self.handler.save_mirror_ranking(self.results, self.enabled_count)
+        self.save_finished.emit(success, message)
 
 
 class SystemUpdateTab(QWidget):
-    def __init__(self):
+    # الفاصل الافتراضي بين عمليات فحص التحديثات (بالدقائق)
+    # Default interval between update checks (minutes)
+    DEFAULT_CHECK_INTERVAL_MINUTES = 60
+    # عدد المرايا الأسرع المفعلة في mirrorlist بعد الترتيب
+    # Number of fastest mirrors left enabled in the mirrorlist after ranking
+    RANKED_MIRRORS_ENABLED = 10
+
+    def __init__(self, handler=None):
         super().__init__()
+        # المعالج مشترك مع باقي التبويبات حتى لا يُنشأ فاحص تحديثات واتصال فهرس ثانيان
+        # The handler is shared with the other tabs so no second update checker and catalog
+        # connection are created
+        self.handler = handler or PackageHandler()
+        self.settings = QSettings("helwan-linux", "hel-sys-manager")
+        self.check_worker = None
+        # خيوط المرايا الجارية؛ كل خيط يبقى مرجعه هنا حتى تطلق QThread.finished المدمجة
+        # Running mirror threads; each one is referenced here until the built-in QThread.finished fires
+        self.mirror_workers = set()
 
         layout = QVBoxLayout()
 
@@ -34,12 +109,29 @@ class SystemUpdateTab(QWidget):
         self.output_box.setReadOnly(True)
 
         self.update_button = QPushButton("Update System")
+        self.rank_mirrors_button = QPushButton("Rank Mirrors")
+        self.check_button = QPushButton("Check Now")
         self.install_input = QLineEdit()
         self.install_input.setPlaceholderText("Enter package names separated by space...")
         self.install_button = QPushButton("Install Packages")
 
+        interval_layout = QHBoxLayout()
+        interval_layout.addWidget(QLabel("Check for updates every"))
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(5, 24 * 60)
+        self.interval_spin.setSuffix(" min")
+        self.interval_spin.setValue(int(self.settings.value(
+            "updates/check_interval_minutes", self.DEFAULT_CHECK_INTERVAL_MINUTES)))
+        interval_layout.addWidget(self.interval_spin)
+        interval_layout.addStretch(1)
+        interval_layout.addWidget(self.check_button)
+
         layout.addWidget(self.update_info_label)
-        layout.addWidget(self.update_button)
+        layout.addLayout(interval_layout)
+        update_layout = QHBoxLayout()
+        update_layout.addWidget(self.update_button, 1)
+        update_layout.addWidget(self.rank_mirrors_button)
+        layout.addLayout(update_layout)
         layout.addWidget(QLabel("Installation:"))
         layout.addWidget(self.install_input)
         layout.addWidget(self.install_button)
@@ -50,23 +142,89 @@ class SystemUpdateTab(QWidget):
 
         self.update_button.clicked.connect(self.perform_update)
         self.install_button.clicked.connect(self.perform_install)
+        self.rank_mirrors_button.clicked.connect(self.rank_mirrors)
+        self.check_button.clicked.connect(lambda: self.start_update_check(force_sync=True))
+        self.interval_spin.valueChanged.connect(self._on_interval_changed)
+
+        # مؤقت الفحص الدوري في الخلفية
+        # Periodic background check timer
+        self.check_timer = QTimer(self)
+        self.check_timer.timeout.connect(self.start_update_check)
+        self.check_timer.start(self.interval_spin.value() * 60 * 1000)
 
         self.load_update_info()
+        self.start_update_check()
+
+    def _check_interval_seconds(self):
+        return self.interval_spin.value() * 60
+
+    def _on_interval_changed(self, minutes):
+        self.settings.setValue("updates/check_interval_minutes", minutes)
+        self.check_timer.start(minutes * 60 * 1000)
 
     def load_update_info(self):
-        stats = SystemUtils.get_pacman_stats()
+        """
+        عرض آخر نتيجة محفوظة فوراً بدون انتظار أي مزامنة.
+        Shows the last saved result instantly without waiting for any sync.
+        """
+        stats = self.handler.get_cached_update_status()
+        if stats is None:
+            self.update_info_label.setText("Checking for updates...")
+            return
+        self._show_update_status(stats)
+
+    def _show_update_status(self, stats):
+        last_sync = stats.get('last_sync')
+        checked = datetime.datetime.fromtimestamp(last_sync).strftime("%Y-%m-%d %H:%M") if last_sync else "never"
         self.update_info_label.setText(
-            f"Installed packages: {stats['total']} | Updates available: {stats['updates_count']}"
+            f"Installed packages: {stats['total']} | Updates available: {stats['updates_count']} "
+            f"({format_size(stats['download_size'])} to download) | Last checked: {checked}"
         )
         if stats['updates_count'] > 0:
-            self.output_box.setPlainText("\n".join(stats['updates']))
+            self.output_box.setPlainText("\n".join(
+                f"{update['name']} {update['old_version']} -> {update['new_version']} "
+                f"({format_size(update['download_size'])})"
+                for update in stats['updates']
+            ))
         else:
             self.output_box.setPlainText("System is up to date.")
 
+        # تحديثات AUR للحزم الأجنبية (تظهر فقط بعد الفحص، لا تُحفظ مع الحالة)
+        # AUR updates for foreign packages (only shown after a check, not saved with the status)
+        aur = stats.get('aur')
+        if aur is None:
+            return
+        if aur['error']:
+            self.output_box.append(f"\nAUR: {aur['error']}")
+        elif aur['updates']:
+            self.output_box.append(f"\nAUR updates ({len(aur['updates'])}):")
+            self.output_box.append("\n".join(
+                f"{update['name']} {update['old_version']} -> {update['new_version']}"
+                + (" (flagged out of date)" if update['out_of_date'] else "")
+                for update in aur['updates']
+            ))
+
+    def start_update_check(self, force_sync=False):
+        if self.check_worker is not None and self.check_worker.isRunning():
+            return
+        self.check_button.setEnabled(False)
+        interval = 0 if force_sync else self._check_interval_seconds()
+        self.check_worker = UpdateCheckWorker(self.handler, interval)
+        self.check_worker.check_finished.connect(self._handle_update_check_result)
+        self.check_worker.start()
+
+    def _handle_update_check_result(self, success, result):
+        self.check_button.setEnabled(True)
+        if success:
+            self._show_update_status(result)
+        else:
+            self.update_info_label.setText(f"Update check failed: {result}")
+
     def perform_update(self):
         self.output_box.setPlainText("Updating system...")
-        self.update_thread = UpdateWorker()
+        self.update_thread = UpdateWorker(self.handler)
         self.update_thread.output_ready.connect(self.output_box.setPlainText)
+        self.update_thread.finished.connect(self.start_update_check)
         self.update_thread.start()
 
     def perform_install(self):
@@ -76,6 +234,69 @@ class SystemUpdateTab(QWidget):
             return
 
         self.output_box.setPlainText(f"Installing: {' '.join(packages)}")
-        self.install_thread = InstallWorker(packages)
+        self.install_thread = InstallWorker(self.handler, packages)
         self.install_thread.output_ready.connect(self.output_box.setPlainText)
         self.install_thread.start()
+
+    def _start_mirror_worker(self, worker):
+        """
+        تشغيل خيط مرايا مع الاحتفاظ بمرجعه حتى ينتهي فعلاً؛ حذف آخر مرجع بينما يعمل الخيط
+        يدمر QThread ويُسقط البرنامج.
+        Starts a mirror thread and keeps a reference to it until it has really ended; dropping
+        the last reference while the thread runs destroys the QThread and aborts the program.
+        """
+        self.mirror_workers.add(worker)
+        worker.finished.connect(lambda: self.mirror_workers.discard(worker))
+        worker.start()
+
+    def rank_mirrors(self):
+        if not self.rank_mirrors_button.isEnabled():
+            return
+        self.rank_mirrors_button.setEnabled(False)
+        self.output_box.setPlainText("Ranking mirrors...")
+        worker = MirrorRankWorker(self.handler)
+        worker.progress.connect(
+            lambda done, total: self.rank_mirrors_button.setText(f"Ranking {done}/{total}...")
+        )
+        worker.ranking_finished.connect(self._handle_mirror_ranking)
+        self._start_mirror_worker(worker)
+
+    def _handle_mirror_ranking(self, success, results):
+        self.rank_mirrors_button.setText("Rank Mirrors")
+        if not success:
+            self.rank_mirrors_button.setEnabled(True)
+            self.output_box.setPlainText(f"Mirror ranking failed: {results}")
+            return
+
+        working = [result for result in results if result.error is None]
+        lines = [
+            f"{result.latency * 1000:6.0f} ms {result.rate / 1024:9.0f} KiB/s  {result.server}"
+            for result in working
+        ]
+        lines += [f"{'failed':>23}  {result.server} ({result.error})" for result in results if result.error]
+        self.output_box.setPlainText("\n".join(lines))
+        if not working:
+            self.rank_mirrors_button.setEnabled(True)
+            QMessageBox.warning(self, "Rank Mirrors", "No mirror could be reached.")
+            return
+
+        enabled_count = min(self.RANKED_MIRRORS_ENABLED, len(working))
+        reply = QMessageBox.question(
+            self, "Rank Mirrors",
+            f"{len(working)} of {len(results)} mirrors responded. Save the ranking to the mirrorlist "
+            f"with the fastest {enabled_count} enabled?\n\nThis requires root privileges.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No,
+        )
+        if reply != QMessageBox.Yes:
+            self.rank_mirrors_button.setEnabled(True)
+            return
+        worker = MirrorSaveWorker(self.handler, results, enabled_count)
+        worker.save_finished.connect(self._handle_mirror_save)
+        self._start_mirror_worker(worker)
+
+    def _handle_mirror_save(self, success, message):
+        self.rank_mirrors_button.setEnabled(True)
+        if success:
+            QMessageBox.information(self, "Rank Mirrors", message)
+        else:
+            QMessageBox.critical(self, "Rank Mirrors", message)
@@ -0,0 +1,111 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from src.core.aur_client import AURClient, AURError, MAX_QUERY_LENGTH, batch_names
+
+
+class FakeAUR:
+    """
+    خادم AUR RPC محلي يجيب على type=info من قاموس الحزم ويسجل الطلبات.
+    A local AUR RPC server that answers type=info from a dict of packages and records the
+    requests.
+    """
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                fake.requests.append(url.query)
+                params = parse_qs(url.query)
+                if params.get("type") != ["info"]:
+                    body = {"type": "error", "error": "Incorrect request type specified."}
+                else:
+                    results = [{"Name": name, "Version": fake.packages[name], "PackageBase": name}
+                               for name in params.get("arg[]", []) if name in fake.packages]
+                    body = {"version": 5, "type": "multiinfo", "resultcount": len(results), "results": results}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/rpc/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@unittest.skipUnless(AURClient.is_available(), "needs python-requests")
+class AURClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.aur = FakeAUR({"yay": "12.3.5-1", "paru": "2.0.3-1"})
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.client = AURClient(self.cache_dir.name, base_url=self.aur.url, timeout=2)
+
+    def tearDown(self):
+        self.aur.close()
+        self.cache_dir.cleanup()
+
+    def test_info_batches_names_and_caches_results(self):
+        names = ["yay", "paru"] + [f"local-package-{i:04d}" for i in range(500)]
+        packages = self.client.info(names)
+        self.assertEqual(sorted(packages), ["paru", "yay"])
+        self.assertEqual(packages["yay"].version, "12.3.5-1")
+        self.assertGreater(len(self.aur.requests), 1)
+        self.assertTrue(all(len(query) <= MAX_QUERY_LENGTH + 100 for query in self.aur.requests))
+
+        # النتائج، بما فيها "غير موجود"، تُحفظ فلا تُعاد الطلبات
+        # Results, including "not found", are cached so nothing is requested again
+        count = len(self.aur.requests)
+        self.assertEqual(sorted(self.client.info(names)), ["paru", "yay"])
+        self.assertEqual(len(self.aur.requests), count)
+
+    def test_disk_cache_is_shared_between_clients(self):
+        self.client.info(["yay", "missing"])
+        count = len(self.aur.requests)
+        client = AURClient(self.cache_dir.name, base_url=self.aur.url, timeout=2)
+        self.assertEqual(list(client.info(["yay", "missing"])), ["yay"])
+        self.assertEqual(len(self.aur.requests), count)
+
+    def test_stale_results_are_used_when_the_aur_is_unreachable(self):
+        self.client.info(["yay"])
+        self.client.ttl_seconds = 0
+        self.aur.close()
+        self.assertEqual(self.client.info(["yay"])["yay"].version, "12.3.5-1")
+        self.assertIsNotNone(self.client.last_error)
+        with self.assertRaises(AURError):
+            self.client.info(["paru"])
+
+    def test_check_updates(self):
+        updates, not_found = self.client.check_updates({"yay": "12.3.0-1", "paru": "2.0.3-1", "mine": "1.0-1"})
+        self.assertEqual([(update["name"], update["new_version"]) for update in updates], [("yay", "12.3.5-1")])
+        self.assertEqual(not_found, ["mine"])
+
+
+class BatchNamesTest(unittest.TestCase):
+
+    def test_batches_keep_order_and_respect_the_budget(self):
+        names = [f"package-{i}" for i in range(1000)]
+        batches = batch_names(names, max_query_length=500)
+        self.assertEqual([name for batch in batches for name in batch], names)
+        self.assertTrue(all(sum(len(name) + 9 for name in batch) <= 500 for batch in batches))
+
+
+if __name__ == "__main__":
+    unittest.main()
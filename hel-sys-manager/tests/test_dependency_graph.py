@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from src.core.dependency_graph import DependencyGraph, dependency_name
+from src.core.pacman_local_db import PacmanLocalDB
+
+
+def _write_package(db_path, name, reason=0, size=1024, **lists):
+    directory = os.path.join(db_path, f"{name}-1.0-1")
+    os.makedirs(directory)
+    sections = [("NAME", [name]), ("VERSION", ["1.0-1"]), ("SIZE", [str(size)]), ("REASON", [str(reason)])]
+    sections += [(key.upper(), values) for key, values in lists.items()]
+    with open(os.path.join(directory, "desc"), "w", encoding="utf-8") as f:
+        f.write("".join(f"%{key}%\n" + "".join(value + "\n" for value in values) + "\n" for key, values in sections))
+
+
+class DependencyGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        db_path = directory.name
+        _write_package(db_path, "app", depends=["libfoo>=1", "sh"])
+        _write_package(db_path, "libfoo-ng", reason=1, size=4096, provides=["libfoo=1.2"], replaces=["oldlib"])
+        _write_package(db_path, "bash", reason=1, provides=["sh"])
+        _write_package(db_path, "legacy", depends=["ghost"], optdepends=["bash: for scripts"])
+        _write_package(db_path, "newpkg", reason=1, replaces=["ghost"])
+        _write_package(db_path, "stray", reason=1)
+        self.graph = DependencyGraph(PacmanLocalDB(db_path))
+
+    def test_dependencies_resolve_through_names_and_provides(self):
+        self.assertEqual(self.graph.depends_on("app"), ["libfoo-ng", "bash"])
+        self.assertEqual(self.graph.required_by("libfoo-ng"), ["app"])
+        self.assertEqual(self.graph.required_by("sh"), ["app"])
+        self.assertEqual(self.graph.optional_for("bash"), ["legacy"])
+
+    def test_replaces_does_not_satisfy_dependencies(self):
+        # pacman لا يحل التبعيات عبر replaces، لذلك newpkg يتيمة مثل pacman -Qdt
+        # pacman never resolves dependencies through replaces, so newpkg is an orphan as in pacman -Qdt
+        self.assertEqual(self.graph.depends_on("legacy"), [])
+        self.assertEqual(self.graph.required_by("newpkg"), [])
+        self.assertEqual(self.graph.orphans(), ["newpkg", "stray"])
+
+    def test_removal_closure(self):
+        closure = self.graph.removal_closure(["app", "missing"])
+        self.assertEqual(closure["packages"], ["app", "bash", "libfoo-ng"])
+        self.assertEqual(closure["size"], 1024 + 4096 + 1024)
+        self.assertEqual(closure["missing"], ["missing"])
+        self.assertEqual(self.graph.removal_closure(["bash"])["blockers"], {"bash": ["app"]})
+
+    def test_why_installed(self):
+        self.assertEqual(self.graph.why_installed("libfoo-ng"), [["app", "libfoo-ng"]])
+
+    def test_dependency_name(self):
+        for dependency, name in (("foo>=1.2", "foo"), ("foo: desc", "foo"), ("libfoo.so=1-64", "libfoo.so"),
+                                 ("bar", "bar")):
+            self.assertEqual(dependency_name(dependency), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
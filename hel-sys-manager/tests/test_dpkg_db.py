@@ -0,0 +1,131 @@
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import unittest
+
+from src.core.dpkg_db import (
+    AptListsDB, DpkgStatusDB, deb_vercmp, parse_stanzas, read_packages_file, record_from_stanza,
+)
+
+STATUS = """Package: libc6
+Status: install ok installed
+Priority: optional
+Architecture: amd64
+Multi-Arch: same
+Version: 2.36-9+deb12u4
+Installed-Size: 12988
+Depends: libgcc-s1
+Pre-Depends: debconf
+Description: GNU C Library: Shared libraries
+ Contains the standard libraries that are used by nearly all programs on
+ the system.
+Conffiles:
+ /etc/ld.so.conf.d/x86_64-linux-gnu.conf d4e7a7b88a71b5ffd9e2644e71a0cfab
+
+Package: libc6
+Status: install ok installed
+Architecture: i386
+Version: 2.36-9+deb12u4
+Description: GNU C Library: Shared libraries
+
+
+Package: oldpkg
+Status: deinstall ok config-files
+Version: 1.0-1
+Description: removed, only its configuration is left
+
+Package: bash
+Status: install ok installed
+Version: 5.2.15-2+b7
+Provides: sh ,  bash-static
+Description: GNU Bourne Again SHell"""
+
+
+class DebVercmpTest(unittest.TestCase):
+
+    def test_tilde_sorts_before_everything_even_the_end(self):
+        ordered = ["1.0~~", "1.0~~a", "1.0~", "1.0~rc1", "1.0", "1.0a", "1.0+dfsg", "1.0.1"]
+        for lower, higher in zip(ordered, ordered[1:]):
+            with self.subTest(lower=lower, higher=higher):
+                self.assertLess(deb_vercmp(lower, higher), 0)
+                self.assertGreater(deb_vercmp(higher, lower), 0)
+
+    def test_epoch_upstream_and_revision(self):
+        self.assertGreater(deb_vercmp("1:0.1", "2.0"), 0)
+        self.assertEqual(deb_vercmp("0:1.0", "1.0"), 0)
+        self.assertGreater(deb_vercmp("2.30", "2.4"), 0)
+        self.assertEqual(deb_vercmp("1.002", "1.2"), 0)
+        self.assertGreater(deb_vercmp("1.0-1ubuntu1", "1.0-1"), 0)
+        self.assertLess(deb_vercmp("1.0", "1.0-1"), 0)
+        self.assertEqual(deb_vercmp("1.0", "1.0-0"), 0)
+        # الشرطة الأخيرة فقط تفصل المراجعة
+        # Only the last hyphen starts the revision
+        self.assertLess(deb_vercmp("1.0-beta-2", "1.0-beta-10"), 0)
+        self.assertGreater(deb_vercmp("1.0-beta-2", "1.0-1"), 0)
+
+
+class ParseStanzasTest(unittest.TestCase):
+
+    def test_keeps_wanted_fields_and_the_short_description(self):
+        stanzas = list(parse_stanzas(io.StringIO(STATUS)))
+        self.assertEqual([stanza["Package"] for stanza in stanzas], ["libc6", "libc6", "oldpkg", "bash"])
+        self.assertEqual(stanzas[0]["Description"], "GNU C Library: Shared libraries")
+        self.assertNotIn("Multi-Arch", stanzas[0])
+        self.assertNotIn("Conffiles", stanzas[0])
+
+    def test_custom_field_set(self):
+        stanzas = list(parse_stanzas(io.StringIO(STATUS), wanted={"Package"}))
+        self.assertEqual(stanzas[-1], {"Package": "bash"})
+
+    def test_record_from_stanza(self):
+        libc = record_from_stanza("", next(parse_stanzas(io.StringIO(STATUS))))
+        self.assertEqual(libc.installed_size, 12988 * 1024)
+        self.assertEqual(libc.depends, ("debconf", "libgcc-s1"))
+        bash = record_from_stanza("", list(parse_stanzas(io.StringIO(STATUS)))[-1])
+        self.assertEqual(bash.provides, ("sh", "bash-static"))
+        self.assertEqual((bash.installed_size, bash.size), (0, 0))
+
+
+class DpkgDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_status_keeps_installed_packages_and_qualifies_other_architectures(self):
+        path = os.path.join(self.directory, "status")
+        with open(path, "w") as f:
+            f.write(STATUS)
+        self.assertEqual([pkg.name for pkg in read_packages_file("", path)], ["libc6", "libc6", "oldpkg", "bash"])
+        db = DpkgStatusDB(path)
+        self.assertEqual(db.list_names(), ["bash", "libc6", "libc6:i386"])
+        self.assertFalse(db.refresh())
+
+    def test_apt_lists_keep_the_highest_version_across_compressed_lists(self):
+        main = "deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages"
+        updates = "security.debian.org_debian-security_dists_bookworm-security_main_binary-amd64_Packages"
+        with open(os.path.join(self.directory, main), "w") as f:
+            f.write("Package: bash\nVersion: 5.2.15-2\nSize: 1500\n\nPackage: zsh\nVersion: 5.9-4\n")
+        with gzip.open(os.path.join(self.directory, updates + ".gz"), "wt") as f:
+            f.write("Package: bash\nVersion: 5.2.15-2+deb12u1\n")
+        with lzma.open(os.path.join(self.directory, "ignored_Sources.xz"), "wt") as f:
+            f.write("Package: bash\nVersion: 9.9-9\n")
+        db = AptListsDB(self.directory)
+        packages = db.packages()
+        self.assertEqual(sorted(packages), ["bash", "zsh"])
+        self.assertEqual((packages["bash"].version, packages["bash"].repo),
+                         ("5.2.15-2+deb12u1", "bookworm-security/main"))
+        self.assertEqual(packages["zsh"].repo, "bookworm/main")
+        self.assertFalse(db.refresh())
+
+    def test_repo_name(self):
+        self.assertEqual(AptListsDB.repo_name("ppa.launchpadcontent.net_foo_ubuntu_dists_noble_main_binary-amd64_Packages"),
+                         "noble/main")
+        self.assertEqual(AptListsDB.repo_name("local_Packages"), "local")
+
+
+if __name__ == "__main__":
+    unittest.main()
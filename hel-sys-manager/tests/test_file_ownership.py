@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from src.core.file_ownership import FileOwnershipIndex, read_files_list
+
+
+class FileOwnershipIndexTest(unittest.TestCase):
+    """
+    قاعدة بيانات محلية وجذر نظام وهميان في مجلد مؤقت.
+    A fake local database and system root in a temporary directory.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db_path = os.path.join(directory.name, "local")
+        self.root = os.path.join(directory.name, "root")
+        os.makedirs(self.db_path)
+        self._package("bash-5.2.026-2", ["usr/", "usr/bin/", "usr/bin/bash", "usr/bin/sh", "etc/", "etc/bash.bashrc"])
+        self._package("coreutils-9.5-1", ["usr/", "usr/bin/", "usr/bin/ls"])
+        for path in ("usr/bin/bash", "usr/bin/sh", "usr/bin/ls", "usr/bin/stray", "etc/bash.bashrc",
+                     "etc/local/config"):
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+        os.symlink("usr/bin", os.path.join(self.root, "bin"))
+        self.index = FileOwnershipIndex(self.db_path, root_dir=self.root)
+
+    def _package(self, entry, files):
+        os.makedirs(os.path.join(self.db_path, entry), exist_ok=True)
+        with open(os.path.join(self.db_path, entry, "files"), "w") as f:
+            f.write("%FILES%\n" + "\n".join(files) + "\n\n%BACKUP%\netc/bash.bashrc\t0123\n\n")
+
+    def _path(self, relative):
+        return os.path.join(self.root, relative)
+
+    def test_read_files_list_stops_at_the_next_section(self):
+        files = read_files_list(os.path.join(self.db_path, "bash-5.2.026-2", "files"))
+        self.assertEqual(files[-1], "etc/bash.bashrc")
+        self.assertEqual(len(files), 6)
+
+    def test_owners_of_files_and_shared_directories(self):
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.owners(self._path("usr/bin/bash")), ["bash"])
+        self.assertEqual(sorted(self.index.owners(self._path("usr/bin"))), ["bash", "coreutils"])
+        self.assertEqual(self.index.owners(self._path("usr/bin/stray")), [])
+        self.assertEqual(self.index.owners("/outside/the/root"), [])
+        # /bin -> usr/bin غير مملوك بنفسه، فيُحل عبر الرابط الرمزي
+        # /bin -> usr/bin is not owned itself, so it is resolved through the symlink
+        self.assertEqual(self.index.owners(self._path("bin/ls")), ["coreutils"])
+        self.assertEqual(len(self.index), 9)
+
+    def test_unowned_files_do_not_descend_into_unowned_directories(self):
+        self.index.refresh()
+        self.assertCountEqual(self.index.unowned_files(self.root), [
+            self._path("usr/bin/stray"), self._path("etc/local/"), self._path("bin"),
+        ])
+        self.assertEqual(len(self.index.unowned_files(self.root, limit=1)), 1)
+
+    def test_refresh_rereads_only_changed_packages(self):
+        self.index.refresh()
+        self.assertFalse(self.index.refresh())
+        self._package("coreutils-9.5-1", ["usr/", "usr/bin/", "usr/bin/ls", "usr/bin/stray"])
+        os.utime(os.path.join(self.db_path, "coreutils-9.5-1", "files"), ns=(1, 1))
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.owners(self._path("usr/bin/stray")), ["coreutils"])
+
+        os.remove(os.path.join(self.db_path, "bash-5.2.026-2", "files"))
+        os.rmdir(os.path.join(self.db_path, "bash-5.2.026-2"))
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.owners(self._path("usr/bin/bash")), [])
+        self.assertEqual(self.index.owners(self._path("usr/bin")), ["coreutils"])
+
+
+if __name__ == "__main__":
+    unittest.main()
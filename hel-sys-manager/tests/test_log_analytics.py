@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.core import log_analytics
+from src.core.log_analytics import PackageActivity
+from src.core.pacman_log import PacmanLog
+
+LOG = (
+    "[2024-01-01T10:00:00+0100] [ALPM] transaction started\n"
+    "[2024-01-01T10:00:00+0100] [ALPM] upgraded foo (1-1 -> 2-1)\n"
+    "[garbage] [ALPM] upgraded bar (1-1 -> 2-1)\n"
+    "[2024-13-45T10:00:00+0100] [ALPM] installed baz (1-1)\n"
+    "[2024-01-01T10:05:00+0100] [ALPM] transaction completed\n"
+    "[2024-01-02T10:05:00+0100] [ALPM] installed qux (1-1)\n"
+)
+
+
+class PackageActivityTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "pacman.log")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(LOG)
+        self.log = PacmanLog(path)
+        self.log.open()
+        self.addCleanup(self.log.close)
+
+    def _check_skips_malformed_stamps(self):
+        activity = PackageActivity(self.log)
+        self.assertEqual(activity.update(), 4)
+        summary = activity.summary(5)
+        self.assertEqual(summary["per_day"], [("2024-01-01", 0, 1, 0, 0, 0), ("2024-01-02", 1, 0, 0, 0, 0)])
+        self.assertEqual(summary["top_upgraded"], [("foo", 1)])
+        self.assertEqual((summary["sessions"]["count"], summary["sessions"]["total"]), (1, 300.0))
+
+    def test_malformed_stamps_are_skipped(self):
+        self._check_skips_malformed_stamps()
+
+    def test_malformed_stamps_are_skipped_without_numpy(self):
+        with mock.patch.object(log_analytics, "_NUMPY_AVAILABLE", False):
+            self._check_skips_malformed_stamps()
+
+
+if __name__ == "__main__":
+    unittest.main()
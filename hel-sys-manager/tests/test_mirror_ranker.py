@@ -0,0 +1,152 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.mirror_ranker import MirrorRanker, read_mirrorlist, probe_url
+
+
+class FakeMirrors:
+    """
+    خادم HTTP محلي يمثل عدة مرايا: /fast/ و /slow/ (تأخير قبل الرد) تخدمان core.db، و /missing/ ترد 404.
+    A local HTTP server standing in for several mirrors: /fast/ and /slow/ (delayed reply)
+    serve core.db, and /missing/ answers 404.
+    """
+
+    DATA = os.urandom(256 * 1024)
+    SLOW_SECONDS = 0.3
+
+    def __init__(self):
+        fake = self
+        self.paths = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake.paths.append(self.path)
+                if self.path.startswith("/missing/") or not self.path.endswith("/core.db"):
+                    self.send_error(404)
+                    return
+                if self.path.startswith("/slow/"):
+                    time.sleep(fake.SLOW_SECONDS)
+                first, _, last = self.headers.get("Range", "bytes=0-").partition("=")[2].partition("-")
+                data = fake.DATA[int(first):int(last) + 1 if last else None]
+                self.send_response(206)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def mirror(self, name):
+        return f"{self.base}/{name}/$repo/os/$arch"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MirrorRankerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mirrors = FakeMirrors()
+        self.ranker = MirrorRanker(arch="x86_64", probe_bytes=64 * 1024, timeout=2)
+
+    def tearDown(self):
+        self.mirrors.close()
+
+    def test_rank_orders_working_mirrors_and_puts_failures_last(self):
+        refused = f"http://127.0.0.1:{_closed_port()}/$repo/os/$arch"
+        servers = [self.mirrors.mirror("slow"), refused, self.mirrors.mirror("missing"), self.mirrors.mirror("fast")]
+        progress = []
+        results = self.ranker.rank(servers, progress_callback=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual([result.server for result in results[:2]],
+                         [self.mirrors.mirror("fast"), self.mirrors.mirror("slow")])
+        self.assertEqual({result.server for result in results[2:]}, {refused, self.mirrors.mirror("missing")})
+        self.assertTrue(all(result.rate > 0 and result.error is None for result in results[:2]))
+        self.assertEqual([result.error for result in results if result.server == self.mirrors.mirror("missing")],
+                         ["HTTP 404"])
+        self.assertEqual(progress[-1], (4, 4))
+        self.assertIn("/fast/core/os/x86_64/core.db", self.mirrors.paths)
+
+    def test_probe_timeout(self):
+        self.ranker.timeout = FakeMirrors.SLOW_SECONDS / 3
+        results = self.ranker.rank([self.mirrors.mirror("slow")])
+        self.assertEqual(results[0].error, "timed out")
+
+    def test_render_mirrorlist(self):
+        results = self.ranker.rank([self.mirrors.mirror("fast"), self.mirrors.mirror("slow"),
+                                    self.mirrors.mirror("missing")])
+        lines = MirrorRanker.render_mirrorlist(results, enabled_count=1).splitlines()
+        server_lines = [line for line in lines if "Server = " in line]
+        self.assertEqual(server_lines, [f"Server = {self.mirrors.mirror('fast')}",
+                                        f"#Server = {self.mirrors.mirror('slow')}",
+                                        f"#Server = {self.mirrors.mirror('missing')}"])
+
+    def test_render_mirrorlist_keeps_unranked_mirrors(self):
+        results = self.ranker.rank([self.mirrors.mirror("fast")])
+        text = MirrorRanker.render_mirrorlist(results, unranked=[self.mirrors.mirror("fast"), "https://a.example/"])
+        self.assertEqual(text.count(self.mirrors.mirror("fast")), 1)
+        self.assertTrue(text.endswith("## Not ranked\n#Server = https://a.example/\n"))
+
+
+class MirrorlistTest(unittest.TestCase):
+
+    def _write_mirrorlist(self, lines):
+        f = tempfile.NamedTemporaryFile("w", suffix="mirrorlist", delete=False)
+        with f:
+            f.write("\n".join(lines) + "\n")
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_candidates_keep_enabled_mirrors_and_cap_the_commented_ones(self):
+        path = self._write_mirrorlist([f"#Server = https://m{i}.example/$repo/os/$arch" for i in range(1000)]
+                                      + ["Server = https://enabled.example/$repo/os/$arch"])
+        ranker = MirrorRanker(path, max_candidates=50)
+        candidates = ranker.candidates()
+        self.assertEqual(len(candidates), 50)
+        self.assertEqual(candidates[0], "https://enabled.example/$repo/os/$arch")
+        commented = [int(url.split(".")[0][len("https://m"):]) for url in candidates[1:]]
+        self.assertEqual(commented, sorted(commented))
+        self.assertEqual(ranker.candidates(include_commented=False), ["https://enabled.example/$repo/os/$arch"])
+        self.assertEqual(len(MirrorRanker(path, max_candidates=2000).candidates()), 1001)
+
+    def test_read_mirrorlist(self):
+        with tempfile.NamedTemporaryFile("w", suffix="mirrorlist", delete=False) as f:
+            f.write("## Germany\n"
+                    "#Server = https://a.example/$repo/os/$arch\n"
+                    "Server = https://b.example/$repo/os/$arch\n"
+                    "# Server = https://b.example/$repo/os/$arch\n"
+                    "#Server=https://c.example/$repo/os/$arch\n"
+                    "SigLevel = Never\n")
+        try:
+            self.assertEqual(read_mirrorlist(f.name), [("https://a.example/$repo/os/$arch", False),
+                                                       ("https://b.example/$repo/os/$arch", True),
+                                                       ("https://c.example/$repo/os/$arch", False)])
+        finally:
+            os.unlink(f.name)
+
+    def test_probe_url(self):
+        self.assertEqual(probe_url("https://a.example/archlinux/$repo/os/$arch/", "aarch64"),
+                         "https://a.example/archlinux/core/os/aarch64/core.db")
+
+
+if __name__ == "__main__":
+    unittest.main()
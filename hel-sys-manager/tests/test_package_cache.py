@@ -0,0 +1,136 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from src.core import package_cache
+from src.core.package_cache import PackageCache, CacheArchive, parse_archive_filename
+
+Installed = namedtuple("Installed", ["name", "version"])
+
+
+class FakeConfig:
+
+    def __init__(self, cache_dirs):
+        self.cache_dirs = cache_dirs
+
+    def load(self):
+        pass
+
+
+class FakeLocalDB:
+
+    def __init__(self, versions):
+        self.versions = versions
+
+    def packages(self):
+        return {name: Installed(name, version) for name, version in self.versions.items()}
+
+
+class ParseArchiveFilenameTest(unittest.TestCase):
+
+    def test_parses_name_version_and_arch(self):
+        self.assertEqual(parse_archive_filename("foo-1:2.0-3-x86_64.pkg.tar.zst"), ("foo", "1:2.0-3", "x86_64"))
+        self.assertEqual(parse_archive_filename("python-foo-bar-1.0.r5.g1a2b-1.1-any.pkg.tar.xz"),
+                         ("python-foo-bar", "1.0.r5.g1a2b-1.1", "any"))
+
+    def test_rejects_signatures_partial_downloads_and_other_files(self):
+        for filename in ("foo-1.0-1-x86_64.pkg.tar.zst.sig", "foo-1.0-1-x86_64.pkg.tar.zst.part",
+                         "foo-x86_64.pkg.tar.zst", ".pkg.tar.zst", "foo-1.0-1-x86_64.tar.gz"):
+            self.assertIsNone(parse_archive_filename(filename), filename)
+
+
+class PackageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.local_db = FakeLocalDB({})
+        self.cache = PackageCache(FakeConfig([self.directory]), self.local_db)
+
+    def _add(self, *filenames, size=10):
+        for filename in filenames:
+            with open(os.path.join(self.directory, filename), "wb") as f:
+                f.write(b"x" * size)
+        # وقت تعديل المجلد قد لا يتغير بين إضافتين سريعتين
+        # The directory mtime may not change between two quick additions
+        self.cache._dir_mtimes = None
+
+    def _doomed(self, **policy):
+        return [archive.filename for archive in self.cache.cleanup_plan(**policy)["archives"]]
+
+    def test_versions_are_sorted_with_vercmp(self):
+        self._add("foo-1.10-1-x86_64.pkg.tar.zst", "foo-1.9-1-x86_64.pkg.tar.zst", "foo-1:0.1-1-x86_64.pkg.tar.zst",
+                  "foo-1.10-1-x86_64.pkg.tar.zst.sig", "bar-1.0-1-any.pkg.tar.zst.part")
+        versions = self.cache.versions("foo")
+        self.assertEqual([archive.version for archive in versions], ["1:0.1-1", "1.10-1", "1.9-1"])
+        self.assertEqual(versions[1].signature, "foo-1.10-1-x86_64.pkg.tar.zst.sig")
+        self.assertEqual(list(self.cache.packages()), ["foo"])
+
+    def test_rescans_pick_up_added_and_removed_archives(self):
+        self._add("foo-1.0-1-any.pkg.tar.zst")
+        self.assertEqual(len(self.cache.versions("foo")), 1)
+        self._add("foo-2.0-1-any.pkg.tar.zst")
+        os.remove(os.path.join(self.directory, "foo-1.0-1-any.pkg.tar.zst"))
+        self.assertEqual([archive.version for archive in self.cache.versions("foo")], ["2.0-1"])
+        self.assertEqual(self.cache.cached_versions("foo")[0].size, 10)
+
+    def test_installed_version_counts_toward_the_kept_versions(self):
+        self._add(*(f"foo-{version}-1-x86_64.pkg.tar.zst" for version in range(1, 6)))
+        self.local_db.versions = {"foo": "5-1"}
+        self.assertEqual(self._doomed(keep_versions=3), ["foo-1-1-x86_64.pkg.tar.zst", "foo-2-1-x86_64.pkg.tar.zst"])
+        # إصدار مثبت قديم (بعد الرجوع لإصدار سابق) لا يُحذف أبداً
+        # An older installed version (after a downgrade) is never deleted
+        self.local_db.versions = {"foo": "1-1"}
+        self.assertEqual(self._doomed(keep_versions=2), ["foo-2-1-x86_64.pkg.tar.zst", "foo-3-1-x86_64.pkg.tar.zst"])
+        self.assertEqual(len(self._doomed(keep_versions=0)), 4)
+
+    def test_versions_are_kept_per_architecture(self):
+        self._add("foo-1-1-x86_64.pkg.tar.zst", "foo-2-1-x86_64.pkg.tar.zst", "foo-1-1-i686.pkg.tar.zst")
+        self.assertEqual(self._doomed(keep_versions=1), ["foo-1-1-x86_64.pkg.tar.zst"])
+
+    def test_uninstalled_only_skips_installed_packages(self):
+        self._add("foo-1-1-any.pkg.tar.zst", "foo-2-1-any.pkg.tar.zst", "bar-1-1-any.pkg.tar.zst", size=100)
+        self.local_db.versions = {"foo": "2-1"}
+        plan = self.cache.cleanup_plan(keep_versions=0, uninstalled_only=True)
+        self.assertEqual([archive.filename for archive in plan["archives"]], ["bar-1-1-any.pkg.tar.zst"])
+        self.assertEqual((plan["size"], plan["total_count"], plan["total_size"]), (100, 3, 300))
+
+
+class BuildDeleteCommandsTest(unittest.TestCase):
+
+    def _archives(self, directory, filenames, signed=True):
+        return [CacheArchive("foo", "1", "any", filename, directory, 1, filename + ".sig" if signed else None)
+                for filename in filenames]
+
+    def test_one_command_removes_archives_and_signatures_in_every_directory(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            tricky = ["a b.pkg.tar.zst", "quote'\"$(touch pwned).pkg.tar.zst", "-rf.pkg.tar.zst"]
+            for directory in (first, second):
+                for filename in tricky + ["keep.pkg.tar.zst"]:
+                    for name in (filename, filename + ".sig"):
+                        open(os.path.join(directory, name), "w").close()
+            archives = self._archives(first, tricky) + self._archives(second, tricky[:1], signed=False)
+            commands = PackageCache.build_delete_commands(archives)
+            self.assertEqual(len(commands), 1)
+            subprocess.run(commands[0], check=True, cwd=first)
+            self.assertEqual(sorted(os.listdir(first)), ["keep.pkg.tar.zst", "keep.pkg.tar.zst.sig"])
+            self.assertEqual(sorted(os.listdir(second)), sorted(
+                [name for filename in tricky[1:] + ["keep.pkg.tar.zst"] for name in (filename, filename + ".sig")]
+                + ["a b.pkg.tar.zst.sig"]))
+
+    def test_commands_are_split_at_the_argument_budget(self):
+        filenames = [f"package-{i:04d}.pkg.tar.zst" for i in range(100)]
+        with mock.patch.object(package_cache, "DELETE_ARGUMENT_BUDGET", 500):
+            commands = PackageCache.build_delete_commands(self._archives("/var/cache/pacman/pkg", filenames))
+        self.assertGreater(len(commands), 1)
+        self.assertTrue(all(sum(len(arg) + 1 for arg in command[4:]) <= 500 for command in commands))
+        removed = [arg for command in commands for arg in command[6:]]
+        self.assertEqual(removed, [name for filename in filenames for name in (filename, filename + ".sig")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import io
+import os
+import sqlite3
+import tarfile
+import tempfile
+import unittest
+
+from src.core import package_catalog
+from src.core.package_catalog import PackageCatalog
+
+
+def write_sync_db(path, packages):
+    """
+    كتابة أرشيف مستودع (.db) من قائمة (الاسم، الإصدار، الوصف، ISIZE).
+    Writes a repository archive (.db) from a list of (name, version, description, ISIZE).
+    """
+    with tarfile.open(path, "w:gz") as archive:
+        for name, version, description, isize in packages:
+            data = (f"%NAME%\n{name}\n\n%VERSION%\n{version}\n\n%DESC%\n{description}\n\n"
+                    f"%ISIZE%\n{isize}\n\n").encode()
+            member = tarfile.TarInfo(f"{name}-{version}/desc")
+            member.size = len(data)
+            archive.addfile(member, io.BytesIO(data))
+
+
+class FakeSyncDB:
+    """
+    بديل PacmanSyncDB يعرض ملفات .db من مجلد مؤقت، ويفشل إذا طُلب تحليل كل المستودعات.
+    A PacmanSyncDB stand-in serving .db files from a temporary directory, failing if every
+    repository is asked to be parsed.
+    """
+
+    def __init__(self, directory, repos):
+        self.directory = directory
+        self.repos = repos
+
+    def db_file(self, repo):
+        return os.path.join(self.directory, f"{repo}.db")
+
+    def db_mtimes(self):
+        return {repo: os.stat(self.db_file(repo)).st_mtime_ns for repo in self.repos}
+
+    def packages(self):
+        raise AssertionError("the search path must not build the whole sync index")
+
+
+@unittest.skipUnless(PackageCatalog.is_supported(), "needs SQLite with FTS5")
+class PackageCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        write_sync_db(os.path.join(self.directory, "core.db"), [
+            ("bash", "5.2.026-2", "The GNU Bourne Again shell", 9437184),
+            ("bash-completion", "2.14.0-2", "Programmable completion for the bash shell", 1048576),
+        ])
+        write_sync_db(os.path.join(self.directory, "extra.db"), [
+            ("zsh", "5.9-5", "A very advanced and programmable command interpreter (shell)", 8388608),
+        ])
+        self.sync_db = FakeSyncDB(self.directory, ["core", "extra"])
+        self.catalog_path = os.path.join(self.directory, "catalog.sqlite3")
+        self.catalog = PackageCatalog(self.sync_db, self.catalog_path)
+        self.addCleanup(self.catalog.close)
+
+    def test_search_returns_installed_sizes_ranked_by_relevance(self):
+        results = self.catalog.search("bash")
+        self.assertEqual([(pkg["repo"], pkg["name"], pkg["size"]) for pkg in results],
+                         [("core", "bash", 9437184), ("core", "bash-completion", 1048576)])
+        self.assertEqual([pkg["name"] for pkg in self.catalog.search("shell", limit=1)], ["bash"])
+
+    def test_only_changed_repositories_are_reindexed(self):
+        self.assertEqual(sorted(self.catalog.refresh()), ["core", "extra"])
+        self.assertEqual(self.catalog.refresh(), [])
+        self.sync_db.repos = ["core"]
+        self.assertEqual(self.catalog.refresh(), ["extra"])
+        self.assertEqual(self.catalog.search("zsh"), [])
+
+    def test_older_schema_is_rebuilt(self):
+        self.catalog.close()
+        conn = sqlite3.connect(self.catalog_path)
+        conn.execute(f"PRAGMA user_version = {package_catalog.CATALOG_SCHEMA_VERSION - 1}")
+        conn.commit()
+        conn.close()
+        self.catalog = PackageCatalog(self.sync_db, self.catalog_path)
+        self.addCleanup(self.catalog.close)
+        self.assertEqual(self.catalog.search("zsh")[0]["size"], 8388608)
+
+
+if __name__ == "__main__":
+    unittest.main()
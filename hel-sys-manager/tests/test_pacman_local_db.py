@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from src.core.pacman_local_db import (
+    PacmanLocalDB, parse_desc, record_from_desc, package_info_dict, format_size, REASON_DEPEND, REASON_EXPLICIT,
+)
+
+DESC = """%NAME%
+bash
+
+%VERSION%
+5.2.026-2
+
+%DESC%
+The GNU Bourne Again shell
+
+%SIZE%
+9437184
+
+%REASON%
+1
+
+%LICENSE%
+GPL-3.0-or-later
+
+%DEPENDS%
+readline
+libreadline.so=8-64
+glibc
+
+%OPTDEPENDS%
+bash-completion: for tab completion
+
+%PROVIDES%
+sh
+
+%INSTALLDATE%
+not-a-number
+
+"""
+
+
+class ParseDescTest(unittest.TestCase):
+
+    def test_sections_become_lists(self):
+        fields = parse_desc(DESC)
+        self.assertEqual(fields["NAME"], ["bash"])
+        self.assertEqual(fields["DEPENDS"], ["readline", "libreadline.so=8-64", "glibc"])
+        self.assertEqual(fields["OPTDEPENDS"], ["bash-completion: for tab completion"])
+
+    def test_lines_outside_a_section_are_ignored(self):
+        fields = parse_desc("stray\n%NAME%\nfoo\nbar\n\nalso stray\n%%\n%EMPTY%\n")
+        self.assertEqual(fields, {"NAME": ["foo", "bar"], "EMPTY": []})
+
+    def test_record_from_desc(self):
+        pkg = record_from_desc(parse_desc(DESC))
+        self.assertEqual((pkg.name, pkg.version, pkg.size, pkg.reason), ("bash", "5.2.026-2", 9437184, REASON_DEPEND))
+        self.assertEqual(pkg.provides, ("sh",))
+        self.assertEqual(pkg.depends, ("readline", "libreadline.so=8-64", "glibc"))
+        # القيم الرقمية التالفة أو الغائبة تأخذ القيمة الافتراضية
+        # Malformed or missing numbers take the default
+        self.assertEqual((pkg.install_date, pkg.build_date), (0, 0))
+        self.assertEqual((pkg.groups, pkg.replaces, pkg.url), ((), (), ""))
+
+    def test_reason_defaults_to_explicit(self):
+        self.assertEqual(record_from_desc(parse_desc("%NAME%\nfoo\n")).reason, REASON_EXPLICIT)
+
+    def test_package_info_dict_uses_pacman_keys(self):
+        info = package_info_dict(record_from_desc(parse_desc(DESC)), required_by=[], optional_for=["foo"])
+        self.assertEqual(info["Installed Size"], "9.00 MiB")
+        self.assertEqual(info["Required By"], "None")
+        self.assertEqual(info["Optional For"], "foo")
+        self.assertEqual(info["Install Reason"], "Installed as a dependency for another package")
+        self.assertEqual(info["Install Date"], "None")
+
+    def test_format_size(self):
+        self.assertEqual(format_size(0), "0.00 B")
+        self.assertEqual(format_size(1536), "1.50 KiB")
+        self.assertEqual(format_size(5 * 1024 ** 4), "5120.00 GiB")
+
+
+class PacmanLocalDBTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db_path = directory.name
+        self.db = PacmanLocalDB(self.db_path)
+
+    def _write(self, name, version):
+        entry = os.path.join(self.db_path, f"{name}-{version}")
+        os.makedirs(entry)
+        with open(os.path.join(entry, "desc"), "w") as f:
+            f.write(f"%NAME%\n{name}\n\n%VERSION%\n{version}\n\n")
+        return entry
+
+    def test_refresh_only_reports_real_changes(self):
+        foo = self._write("foo", "1-1")
+        bar = self._write("bar", "1-1")
+        self.assertTrue(self.db.refresh())
+        self.assertEqual(self.db.list_names(), ["bar", "foo"])
+        generation = self.db.generation
+        self.assertFalse(self.db.refresh())
+        self.assertEqual(self.db.generation, generation)
+
+        # الترقية تستبدل مجلد الحزمة، والحذف يزيله
+        # An upgrade replaces the package's directory and a removal deletes it
+        for entry in (foo, bar):
+            os.remove(os.path.join(entry, "desc"))
+            os.rmdir(entry)
+        self._write("foo", "2-1")
+        self.assertTrue(self.db.refresh())
+        self.assertEqual(self.db.get("foo").version, "2-1")
+        self.assertIsNone(self.db.cached("bar"))
+
+    def test_missing_database(self):
+        db = PacmanLocalDB(os.path.join(self.db_path, "missing"))
+        self.assertFalse(db.is_available())
+        self.assertEqual(db.packages(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
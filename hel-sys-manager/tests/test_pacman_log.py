@@ -0,0 +1,100 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.core import pacman_log
+from src.core.pacman_log import PacmanLog, parse_log_timestamp
+
+
+def _stamp(day, hour):
+    return f"2024-01-{day:02d}T{hour:02d}:00:00+0000"
+
+
+def _seconds(day, hour=0):
+    return datetime.datetime(2024, 1, day, hour, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class ParseLogTimestampTest(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(parse_log_timestamp("2024-01-02T03:00:00+0000"), _seconds(2, 3))
+        self.assertEqual(parse_log_timestamp("2024-01-02 03:00"),
+                         datetime.datetime(2024, 1, 2, 3).timestamp())
+        self.assertIsNone(parse_log_timestamp("garbage"))
+        self.assertIsNone(parse_log_timestamp("2024-13-45T10:00:00+0000"))
+
+
+class PacmanLogTest(unittest.TestCase):
+
+    def setUp(self):
+        # فهرس متفرق صغير حتى يقع السطر التالف على إحدى نقاطه
+        # A small sparse interval so the garbled line lands on one of its points
+        patcher = mock.patch.object(pacman_log, "SPARSE_INTERVAL", 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "pacman.log")
+
+    def _open(self, lines):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        log = PacmanLog(self.path)
+        log.open()
+        self.addCleanup(log.close)
+        return log
+
+    def _entries(self, count):
+        # مدخل واحد في الساعة على مدى عدة أيام، مع أسطر غير ALPM بينها
+        # One entry per hour over several days, with non-ALPM lines in between
+        lines = []
+        for i in range(count):
+            day, hour = 1 + i // 24, i % 24
+            lines.append(f"[{_stamp(day, hour)}] [PACMAN] Running 'pacman -Syu'")
+            lines.append(f"[{_stamp(day, hour)}] [ALPM] upgraded pkg{i} (1.0-1 -> 1.{i}-1)")
+        return lines
+
+    def test_entries(self):
+        log = self._open(self._entries(2) + [f"[{_stamp(1, 5)}] [ALPM] installed new (2.0-1)"])
+        self.assertEqual(len(log), 3)
+        entry = log.entry(1)
+        self.assertEqual((entry.timestamp, entry.action, entry.package, entry.old_version, entry.new_version),
+                         (_seconds(1, 1), "upgraded", "pkg1", "1.0-1", "1.1-1"))
+        self.assertEqual(log.entry(2)[1:], ("installed", "new", "", "2.0-1"))
+
+    def test_garbled_line_keeps_date_filtering_ordered(self):
+        lines = self._entries(48)
+        # المدخل 8 (نقطة في الفهرس المتفرق) بطابع تالف
+        # Entry 8 (a sparse index point) gets a malformed stamp
+        lines[17] = "[garbage] [ALPM] upgraded pkg8 (1.0-1 -> 1.8-1)"
+        log = self._open(lines)
+        self.assertEqual(len(log), 48)
+        self.assertEqual(log.entry(8).timestamp, log.entry(7).timestamp)
+
+        day_two = log.filter(_seconds(2), _seconds(2, 23))
+        self.assertEqual(list(day_two), list(range(24, 48)))
+        self.assertEqual(list(log.filter(_seconds(1, 5), _seconds(1, 10))), [5, 6, 7, 8, 9, 10])
+        self.assertEqual(list(log.filter(_seconds(1, 9), _seconds(1, 10))), [9, 10])
+
+    def test_filter_by_action_and_package(self):
+        log = self._open(self._entries(10) + [f"[{_stamp(1, 12)}] [ALPM] removed pkg3 (1.0-1)"])
+        self.assertEqual(list(log.filter(actions={"removed"})), [10])
+        self.assertEqual(list(log.filter(package="pkg3")), [3, 10])
+        self.assertEqual(list(log.filter(start_time=_seconds(1, 5), package="pkg")), [5, 6, 7, 8, 9, 10])
+
+    def test_partial_trailing_line_is_indexed_once_complete(self):
+        lines = self._entries(3)
+        log = self._open(lines)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"[{_stamp(1, 4)}] [ALPM] installed late (1")
+        self.assertEqual(log.refresh(), 0)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(".0-1)\n")
+        self.assertEqual(log.refresh(), 1)
+        self.assertEqual(log.entry(3).package, "late")
+
+
+if __name__ == "__main__":
+    unittest.main()
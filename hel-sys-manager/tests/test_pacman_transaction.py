@@ -0,0 +1,118 @@
+import os
+import stat
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from src.core.pacman_aur_manager import PacmanAURManager
+from src.core.pacman_local_db import LocalPackage, REASON_DEPEND, REASON_EXPLICIT
+from src.core.process_stream import stream_process
+
+SyncRecord = namedtuple("SyncRecord", ["name", "groups", "provides"])
+
+
+class FakeDB:
+
+    def __init__(self, packages):
+        self._packages = packages
+
+    def is_available(self):
+        return True
+
+    def packages(self):
+        return self._packages
+
+
+def run_unprivileged(command, output_callback=None, progress_callback=None):
+    result = stream_process(command, lambda stream, line: output_callback(line))
+    if result.returncode != 0:
+        return f"Error: exit status {result.returncode}"
+    return result.stdout
+
+
+class RunTransactionTest(unittest.TestCase):
+    """
+    تشغيل سلسلة أوامر المعاملة الحقيقية مع pacman وهمي يسجل وسائطه ويفشل في عملية محددة.
+    Runs the real transaction command chain with a fake pacman that logs its arguments and
+    fails on a chosen operation.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, "calls")
+        self.pacman = os.path.join(directory.name, "pacman")
+        self.local = {}
+        self.sync = {}
+        for patcher in (
+            mock.patch.object(PacmanAURManager, "PACMAN_FULL_PATH", self.pacman),
+            mock.patch.object(PacmanAURManager, "_run_privileged_command", staticmethod(run_unprivileged)),
+            mock.patch.object(PacmanAURManager, "local_db", FakeDB(self.local)),
+            mock.patch.object(PacmanAURManager, "sync_db", FakeDB(self.sync)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake_pacman(self, failing_operation):
+        with open(self.pacman, "w") as f:
+            f.write(f'#!/bin/sh\necho "$*" >> "{self.log_path}"\n[ "$1" != "{failing_operation}" ]\n')
+        os.chmod(self.pacman, os.stat(self.pacman).st_mode | stat.S_IEXEC)
+
+    def _install(self, name, reason=REASON_EXPLICIT, provides=()):
+        self.local[name] = LocalPackage(name=name, version="1-1", reason=reason, provides=provides)
+
+    def _calls(self):
+        with open(self.log_path) as f:
+            return [line.split()[0] for line in f]
+
+    def test_steps_after_a_failure_are_reported_as_not_run(self):
+        self._fake_pacman("-S")
+        self._install("app", reason=REASON_DEPEND)
+        self.sync["new"] = SyncRecord("new", (), ())
+        lines = []
+        output, results = PacmanAURManager.run_transaction(
+            install=["new"], remove=["old"], mark_as_deps=["app"], output_callback=lines.append)
+        self.assertTrue(output.startswith("Error"))
+        self.assertEqual(self._calls(), ["-Rns", "-S"])
+        self.assertEqual(lines, ["Transaction step 1 of 3 finished."])
+        self.assertEqual(results, {
+            "old": (True, "removed"),
+            "new": (False, "not installed"),
+            "app": (False, "not run (an earlier step failed)"),
+        })
+
+    def test_every_step_is_checked_when_the_chain_succeeds(self):
+        self._fake_pacman("none")
+        self._install("new")
+        self._install("app", reason=REASON_DEPEND)
+        output, results = PacmanAURManager.run_transaction(install=["new"], remove=["old"], mark_as_deps=["app"])
+        self.assertFalse(output.startswith("Error"))
+        self.assertEqual(self._calls(), ["-Rns", "-S", "-D"])
+        self.assertTrue(all(ok for ok, _ in results.values()))
+
+    def test_groups_and_providers_are_resolved_to_packages(self):
+        self._fake_pacman("none")
+        self.sync["gnome-shell"] = SyncRecord("gnome-shell", ("gnome",), ())
+        self.sync["nautilus"] = SyncRecord("nautilus", ("gnome",), ())
+        self.sync["bash"] = SyncRecord("bash", (), ("sh=5.2",))
+        self.sync["dash"] = SyncRecord("dash", (), ("sh",))
+        # عضو واحد من المجموعة ومزود آخر (ليس الذي سيختاره pacman) مثبتان مسبقاً
+        # One group member and another provider (not the one pacman would pick) were already installed
+        self._install("gnome-shell", provides=("gnome",))
+        self._install("dash", provides=("sh",))
+        _, results = PacmanAURManager.run_transaction(install=["gnome", "sh", "extra/nautilus"])
+        self.assertEqual(results, {
+            "gnome": (False, "not installed (gnome-shell, nautilus)"),
+            "sh": (False, "not installed (bash)"),
+            "extra/nautilus": (False, "not installed (nautilus)"),
+        })
+        self._install("nautilus")
+        self._install("bash")
+        _, results = PacmanAURManager.run_transaction(install=["gnome", "sh"])
+        self.assertEqual(results, {"gnome": (True, "installed (gnome-shell, nautilus)"),
+                                   "sh": (True, "installed (bash)")})
+
+
+if __name__ == "__main__":
+    unittest.main()
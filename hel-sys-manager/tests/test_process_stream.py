@@ -0,0 +1,58 @@
+import sys
+import unittest
+
+from src.core.process_stream import PacmanProgressParser, STDOUT, STDERR, stream_process
+
+
+class PacmanProgressParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = PacmanProgressParser()
+
+    def test_step_counters_with_and_without_padding(self):
+        for line, current, total in (("(1/3) installing foo", 1, 3),
+                                     ("( 1/12) installing foo", 1, 12),
+                                     ("(  7/120) installing foo", 7, 120),
+                                     ("(12/12) installing foo", 12, 12)):
+            event = self.parser.parse(line)
+            self.assertIsNotNone(event, line)
+            self.assertEqual((event["stage"], event["package"], event["current"], event["total"]),
+                             ("installing", "foo", current, total))
+        self.assertEqual(self.parser.parse("( 3/12) upgrading linux-firmware")["percent"], 25)
+
+    def test_checking_steps(self):
+        event = self.parser.parse("( 2/12) checking package integrity")
+        self.assertEqual((event["stage"], event["package"]), ("checking package integrity", ""))
+
+    def test_downloads_use_the_package_count(self):
+        self.assertIsNone(self.parser.parse("Packages (4) foo-1-1  bar-2-1  baz-3-1  qux-4-1"))
+        event = self.parser.parse(" foo-1-1-x86_64 downloading...")
+        self.assertEqual((event["stage"], event["package"], event["current"], event["total"], event["percent"]),
+                         ("downloading", "foo-1-1-x86_64", 1, 4, 25))
+
+    def test_other_lines(self):
+        for line in ("", ":: Proceed with installation? [Y/n]", "(a/b) installing foo", "resolving dependencies..."):
+            self.assertIsNone(self.parser.parse(line))
+
+
+class StreamProcessTest(unittest.TestCase):
+
+    def test_streams_both_pipes_line_by_line(self):
+        script = ("import sys\n"
+                  "print('one'); print('two\\rTWO')\n"
+                  "sys.stderr.write('err\\n'); sys.stdout.write('tail')\n"
+                  "sys.exit(3)\n")
+        lines = []
+        result = stream_process([sys.executable, "-c", script], lambda stream, line: lines.append((stream, line)))
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout_lines, ["one", "TWO", "tail"])
+        self.assertEqual(result.stderr, "err")
+        self.assertEqual(sorted(lines), sorted([(STDOUT, "one"), (STDOUT, "TWO"), (STDOUT, "tail"), (STDERR, "err")]))
+
+    def test_transcript_is_bounded(self):
+        result = stream_process([sys.executable, "-c", "for i in range(100): print(i)"], transcript_lines=10)
+        self.assertEqual(result.stdout_lines, [str(i) for i in range(90, 100)])
+
+
+if __name__ == "__main__":
+    unittest.main()
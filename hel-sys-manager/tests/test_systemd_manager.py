@@ -0,0 +1,199 @@
+import shutil
+import subprocess
+import threading
+import time
+import unittest
+
+from src.core.systemd_manager import (
+    SystemdClient, EVENT_UPDATE, EVENT_REFRESH, EVENT_UNLOADED, EVENT_RELOAD,
+    unit_object_path, unit_name_from_path,
+)
+
+try:
+    from jeepney import DBusAddress, MessageType, HeaderFields, message_bus, new_method_call, \
+        new_method_return, new_error, new_signal
+    from jeepney.io.blocking import open_dbus_connection
+    _JEEPNEY_AVAILABLE = True
+except ImportError:
+    _JEEPNEY_AVAILABLE = False
+
+MANAGER_PATH = "/org/freedesktop/systemd1"
+MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+
+
+class MockSystemd:
+    """
+    خدمة systemd وهمية على ناقل D-Bus خاص (dbus-daemon منفصل).
+    A fake systemd on a private D-Bus bus (a separate dbus-daemon).
+    """
+
+    def __init__(self, units, unit_files, runtime):
+        # units: الاسم -> (الوصف، load، active، sub)؛ runtime: الاسم -> (MainPID، MemoryCurrent، CPUUsageNSec)
+        # units: name -> (description, load, active, sub); runtime: name -> (MainPID, MemoryCurrent, CPUUsageNSec)
+        self.units = units
+        self.unit_files = unit_files
+        self.runtime = runtime
+        self.calls = []
+        self.daemon = subprocess.Popen(["dbus-daemon", "--session", "--print-address", "--nofork"],
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        self.address = self.daemon.stdout.readline().strip()
+        self.connection = open_dbus_connection(bus=self.address)
+        self.connection.send_and_get_reply(
+            new_method_call(message_bus, "RequestName", "su", ("org.freedesktop.systemd1", 0)))
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.daemon.kill()
+        self.daemon.wait()
+        self.daemon.stdout.close()
+
+    def _unit_name(self, path):
+        return unit_name_from_path(path)
+
+    def _reply(self, message):
+        member = message.header.fields[HeaderFields.member]
+        self.calls.append(member)
+        if member == "ListUnitsByPatterns":
+            units = [(name, description, load, active, sub, "", unit_object_path(name), 0, "", "/")
+                     for name, (description, load, active, sub) in self.units.items()]
+            return new_method_return(message, "a(ssssssouso)", (units,))
+        if member == "ListUnitFilesByPatterns":
+            files = [(f"/usr/lib/systemd/system/{name}", state) for name, state in self.unit_files.items()]
+            return new_method_return(message, "a(ss)", (files,))
+        if member == "ListJobs":
+            return new_method_return(message, "a(usssoo)", ([],))
+        if member == "Subscribe":
+            return new_method_return(message)
+        name = self._unit_name(message.header.fields[HeaderFields.path])
+        if name not in self.units:
+            return new_error(message, "org.freedesktop.systemd1.NoSuchUnit", "s", (f"Unit {name} not found.",))
+        if member == "GetAll":
+            description, load, active, sub = self.units[name]
+            properties = {
+                "Id": ("s", name), "Description": ("s", description), "LoadState": ("s", load),
+                "ActiveState": ("s", active), "SubState": ("s", sub),
+                "UnitFileState": ("s", self.unit_files.get(name, "")),
+            }
+            return new_method_return(message, "a{sv}", (properties,))
+        if member == "Get":
+            _, key = message.body
+            pid, memory, cpu = self.runtime.get(name, (0, 2 ** 64 - 1, 2 ** 64 - 1))
+            value = {"MainPID": ("u", pid), "MemoryCurrent": ("t", memory), "CPUUsageNSec": ("t", cpu)}[key]
+            return new_method_return(message, "v", (value,))
+        return new_error(message, "org.freedesktop.DBus.Error.UnknownMethod", "s", (member,))
+
+    def _serve(self):
+        while True:
+            try:
+                message = self.connection.receive()
+            except (OSError, EOFError):
+                return
+            if message.header.message_type == MessageType.method_call:
+                self.connection.send(self._reply(message))
+
+    def emit(self, path, interface, member, signature=None, body=()):
+        self.connection.send(new_signal(DBusAddress(path, interface=interface), member, signature, body))
+
+
+@unittest.skipUnless(_JEEPNEY_AVAILABLE and shutil.which("dbus-daemon"), "needs jeepney and dbus-daemon")
+class SystemdClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.systemd = MockSystemd(
+            units={
+                "sshd.service": ("OpenSSH Daemon", "loaded", "active", "running"),
+                "backup.service": ("Nightly backup", "loaded", "failed", "failed"),
+                "1password-agent.service": ("Agent", "loaded", "active", "running"),
+            },
+            unit_files={"sshd.service": "enabled", "backup.service": "disabled", "cups.service": "disabled",
+                        "getty@.service": "enabled"},
+            runtime={"sshd.service": (512, 4 * 1024 * 1024, 2 * 10 ** 9),
+                     "1password-agent.service": (900, 2 ** 64 - 1, 10 ** 6)},
+        )
+        self.client = SystemdClient(bus=self.systemd.address, timeout=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.systemd.close()
+
+    def test_list_services_merges_units_files_and_runtime(self):
+        services = {service["name"]: service for service in self.client.list_services()}
+        self.assertEqual(sorted(services), ["1password-agent.service", "backup.service", "cups.service",
+                                            "sshd.service"])
+        sshd = services["sshd.service"]
+        self.assertEqual((sshd["active"], sshd["unit_file_state"]), ("active", "enabled"))
+        self.assertEqual((sshd["main_pid"], sshd["memory"], sshd["cpu_usage"]), (512, 4 * 1024 * 1024, 2 * 10 ** 9))
+        # ملف غير محمل يظهر كخدمة متوقفة، والقوالب لا تظهر
+        # An unloaded unit file shows up as a stopped service, and templates do not
+        self.assertEqual(services["cups.service"]["load"], "not-loaded")
+        # الخدمات الفاشلة لا عمليات لها فلا تُطلب خصائص تشغيلها
+        # Failed services have no processes, so their runtime properties are not requested
+        self.assertIsNone(services["backup.service"]["main_pid"])
+        self.assertIsNone(services["1password-agent.service"]["memory"])
+        self.assertEqual(self.systemd.calls.count("Get"), 6)
+
+    def test_get_services_reports_missing_units(self):
+        services = self.client.get_services(["sshd.service", "1password-agent.service", "gone.service"])
+        self.assertEqual(services["sshd.service"]["description"], "OpenSSH Daemon")
+        self.assertEqual(services["1password-agent.service"]["main_pid"], 900)
+        self.assertIsNone(services["gone.service"])
+
+    def test_list_jobs(self):
+        self.assertEqual(self.client.list_jobs(), {})
+
+    def test_watch_turns_signals_into_events(self):
+        events = []
+        stop = threading.Event()
+        watcher = threading.Thread(target=self.client.watch, args=(lambda *event: events.append(event), stop))
+        watcher.start()
+        try:
+            deadline = time.monotonic() + 2
+            while "Subscribe" not in self.systemd.calls and time.monotonic() < deadline:
+                time.sleep(0.01)
+            properties = "org.freedesktop.DBus.Properties"
+            self.systemd.emit(MANAGER_PATH, MANAGER_INTERFACE, "UnitNew", "so",
+                              ("new.service", unit_object_path("new.service")))
+            self.systemd.emit(MANAGER_PATH, MANAGER_INTERFACE, "UnitNew", "so",
+                              ("new.socket", unit_object_path("new.socket")))
+            self.systemd.emit(MANAGER_PATH, MANAGER_INTERFACE, "UnitRemoved", "so",
+                              ("old.service", unit_object_path("old.service")))
+            self.systemd.emit(unit_object_path("sshd.service"), properties, "PropertiesChanged", "sa{sv}as",
+                              ("org.freedesktop.systemd1.Unit", {"SubState": ("s", "reloading")}, []))
+            self.systemd.emit(unit_object_path("sshd.service"), properties, "PropertiesChanged", "sa{sv}as",
+                              ("org.freedesktop.systemd1.Service", {"MainPID": ("u", 513)}, []))
+            self.systemd.emit(unit_object_path("backup.service"), properties, "PropertiesChanged", "sa{sv}as",
+                              ("org.freedesktop.systemd1.Unit", {"ActiveState": ("s", "active")}, []))
+            self.systemd.emit(MANAGER_PATH, MANAGER_INTERFACE, "UnitFilesChanged")
+            deadline = time.monotonic() + 2
+            while len(events) < 6 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            stop.set()
+            watcher.join()
+        self.assertEqual(events, [
+            (EVENT_REFRESH, "new.service", None),
+            (EVENT_UNLOADED, "old.service", None),
+            (EVENT_UPDATE, "sshd.service", {"sub": "reloading"}),
+            (EVENT_UPDATE, "sshd.service", {"main_pid": 513}),
+            (EVENT_REFRESH, "backup.service", None),
+            (EVENT_RELOAD, None, None),
+        ])
+
+
+class UnitObjectPathTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for name in ("sshd.service", "getty@tty1.service", "foo_bar-baz.service", "ünï.service", "1password.service"):
+            self.assertEqual(unit_name_from_path(unit_object_path(name)), name)
+
+    def test_escapes_like_systemd(self):
+        self.assertEqual(unit_object_path("dbus-broker.service"),
+                         "/org/freedesktop/systemd1/unit/dbus_2dbroker_2eservice")
+        self.assertEqual(unit_object_path("1password-agent.service"),
+                         "/org/freedesktop/systemd1/unit/_31password_2dagent_2eservice")
+        self.assertEqual(unit_object_path("k3s.service"), "/org/freedesktop/systemd1/unit/k3s_2eservice")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from src.core.vercmp import vercmp, version_key
+
+# الحالات من test/util/vercmptest.sh في pacman: (أ، ب، النتيجة المتوقعة)
+# The cases from pacman's test/util/vercmptest.sh: (a, b, expected result)
+PACMAN_CASES = [
+    # all similar length, no pkgrel
+    ("1.5.0", "1.5.0", 0),
+    ("1.5.1", "1.5.0", 1),
+    # mixed length
+    ("1.5.1", "1.5", 1),
+    # with pkgrel, simple
+    ("1.5.0-1", "1.5.0-1", 0),
+    ("1.5.0-1", "1.5.0-2", -1),
+    ("1.5.0-1", "1.5.1-1", -1),
+    ("1.5.0-2", "1.5.1-1", -1),
+    # with pkgrel, mixed lengths
+    ("1.5-1", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-2", -1),
+    # mixed pkgrel inclusion
+    ("1.5", "1.5-1", 0),
+    ("1.5-1", "1.5", 0),
+    ("1.1-1", "1.1", 0),
+    ("1.0-1", "1.1", -1),
+    ("1.1-1", "1.0", 1),
+    # alphanumeric versions
+    ("1.5b-1", "1.5-1", -1),
+    ("1.5b", "1.5", -1),
+    ("1.5b-1", "1.5", -1),
+    ("1.5b", "1.5.1", -1),
+    # from the manpage
+    ("1.0a", "1.0alpha", -1),
+    ("1.0alpha", "1.0b", -1),
+    ("1.0b", "1.0beta", -1),
+    ("1.0beta", "1.0rc", -1),
+    ("1.0rc", "1.0", -1),
+    # alpha-dotted versions
+    ("1.5.a", "1.5", 1),
+    ("1.5.b", "1.5.a", 1),
+    ("1.5.1", "1.5.b", 1),
+    # alpha dots and dashes
+    ("1.5.b-1", "1.5.b", 0),
+    ("1.5-1", "1.5.b", -1),
+    # same/similar content, differing separators
+    ("2.0", "2_0", 0),
+    ("2.0_a", "2_0.a", 0),
+    ("2.0a", "2.0.a", -1),
+    ("2___a", "2_a", 1),
+    # epoch included version comparisons
+    ("0:1.0", "0:1.0", 0),
+    ("0:1.0", "0:1.1", -1),
+    ("1:1.0", "0:1.0", 1),
+    ("1:1.0", "0:1.1", 1),
+    ("1:1.0", "2:1.1", -1),
+    # epoch + sometimes present pkgrel
+    ("1:1.0", "0:1.0-1", 1),
+    ("1:1.0-1", "0:1.1-1", 1),
+    # epoch included on one version
+    ("0:1.0", "1.0", 0),
+    ("0:1.0", "1.1", -1),
+    ("0:1.1", "1.0", 1),
+    ("1:1.0", "1.0", 1),
+    ("1:1.0", "1.1", 1),
+    ("1:1.1", "1.1", 1),
+]
+
+
+class VercmpTest(unittest.TestCase):
+
+    def test_matches_pacman_in_both_directions(self):
+        for a, b, expected in PACMAN_CASES:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(vercmp(a, b), expected)
+                self.assertEqual(vercmp(b, a), -expected)
+
+    def test_numeric_segments_ignore_leading_zeros_and_length(self):
+        self.assertEqual(vercmp("1.010", "1.10"), 0)
+        self.assertEqual(vercmp("1.10", "1.9"), 1)
+        self.assertEqual(vercmp("20240101", "9999"), 1)
+
+    def test_version_key_sorts_like_pacman(self):
+        versions = ["1.10-1", "1:0.1-1", "1.9-1", "1.9rc1-1", "1.9-2"]
+        self.assertEqual(sorted(versions, key=version_key), ["1.9rc1-1", "1.9-1", "1.9-2", "1.10-1", "1:0.1-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()